@@ -0,0 +1,48 @@
+"""denormalize user_id onto predictions for history pagination
+
+Revision ID: a3d6e9f2c481
+Revises: f27c4d9a1b68
+Create Date: 2025-11-26 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "a3d6e9f2c481"
+down_revision = "f27c4d9a1b68"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "predictions",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.execute(
+        """
+        UPDATE predictions AS p
+        SET user_id = c.user_id
+        FROM transactions AS t
+        JOIN cards AS c ON c.id = t.card_id
+        WHERE t.id = p.transaction_id
+        """
+    )
+    op.alter_column("predictions", "user_id", nullable=False)
+    op.create_foreign_key(
+        "predictions_user_id_fkey", "predictions", "users", ["user_id"], ["id"]
+    )
+    op.create_index(
+        "ix_predictions_user_created",
+        "predictions",
+        ["user_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_predictions_user_created", table_name="predictions")
+    op.drop_constraint("predictions_user_id_fkey", "predictions", type_="foreignkey")
+    op.drop_column("predictions", "user_id")
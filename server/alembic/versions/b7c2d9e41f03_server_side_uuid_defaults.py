@@ -0,0 +1,30 @@
+"""server-side uuid defaults
+
+Revision ID: b7c2d9e41f03
+Revises: 5a8b3a4e9a0b
+Create Date: 2025-11-24 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b7c2d9e41f03"
+down_revision = "5a8b3a4e9a0b"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ("users", "cards", "transactions", "predictions", "fraud_alerts")
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto")
+    for table in TABLES:
+        op.alter_column(table, "id", server_default=sa.text("gen_random_uuid()"))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.alter_column(table, "id", server_default=None)
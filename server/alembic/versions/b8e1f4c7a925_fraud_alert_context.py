@@ -0,0 +1,44 @@
+"""structured alert_context on fraud_alerts, alert_message optional
+
+Revision ID: b8e1f4c7a925
+Revises: a3d6e9f2c481
+Create Date: 2025-11-26 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "b8e1f4c7a925"
+down_revision = "a3d6e9f2c481"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "fraud_alerts",
+        sa.Column("alert_context", postgresql.JSONB(), nullable=True),
+    )
+    op.alter_column("fraud_alerts", "alert_message", nullable=True)
+
+
+def downgrade() -> None:
+    # Render context-only alerts into the message before it becomes required again
+    op.execute(
+        """
+        UPDATE fraud_alerts
+        SET alert_message = format(
+            'Transaction of $%s at %s flagged as %s risk (score: %s%%)',
+            to_char((alert_context->>'amount')::numeric, 'FM999999990.00'),
+            alert_context->>'merchant',
+            alert_context->>'risk',
+            to_char((alert_context->>'score')::numeric * 100, 'FM990.00')
+        )
+        WHERE alert_message IS NULL
+        """
+    )
+    op.alter_column("fraud_alerts", "alert_message", nullable=False)
+    op.drop_column("fraud_alerts", "alert_context")
@@ -0,0 +1,35 @@
+"""brin indexes on time columns
+
+Revision ID: c41e8a7b2d56
+Revises: b7c2d9e41f03
+Create Date: 2025-11-24 11:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c41e8a7b2d56"
+down_revision = "b7c2d9e41f03"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_transaction_date_brin",
+        "transactions",
+        ["transaction_date"],
+        postgresql_using="brin",
+    )
+    op.create_index(
+        "ix_predictions_created_at_brin",
+        "predictions",
+        ["created_at"],
+        postgresql_using="brin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_predictions_created_at_brin", table_name="predictions")
+    op.drop_index("ix_transactions_transaction_date_brin", table_name="transactions")
@@ -0,0 +1,28 @@
+"""index for keyset pagination of transaction lists
+
+Revision ID: c9f2a7d4e613
+Revises: b8e1f4c7a925
+Create Date: 2025-11-28 09:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c9f2a7d4e613"
+down_revision = "b8e1f4c7a925"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_card_date_id",
+        "transactions",
+        ["card_id", sa.text("transaction_date DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_card_date_id", table_name="transactions")
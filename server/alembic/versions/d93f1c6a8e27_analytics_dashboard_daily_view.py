@@ -0,0 +1,66 @@
+"""analytics dashboard daily materialized view
+
+Revision ID: d93f1c6a8e27
+Revises: c41e8a7b2d56
+Create Date: 2025-11-25 09:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d93f1c6a8e27"
+down_revision = "c41e8a7b2d56"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_dashboard_daily AS
+        SELECT
+            c.user_id,
+            date_trunc('day', t.transaction_date)::date AS day,
+            count(*) AS total_transactions,
+            count(*) FILTER (WHERE t.is_fraud) AS fraud_count,
+            sum(t.amount) AS total_amount
+        FROM transactions t
+        JOIN cards c ON c.id = t.card_id
+        GROUP BY c.user_id, date_trunc('day', t.transaction_date)::date
+        """
+    )
+    # A unique index is required for REFRESH ... CONCURRENTLY
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_analytics_dashboard_daily_user_day "
+        "ON analytics_dashboard_daily (user_id, day)"
+    )
+    # Let pg_cron own the refresh when the extension is installed
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+                PERFORM cron.schedule(
+                    'refresh_analytics_dashboard_daily',
+                    '* * * * *',
+                    'REFRESH MATERIALIZED VIEW CONCURRENTLY analytics_dashboard_daily'
+                );
+            END IF;
+        END $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+                PERFORM cron.unschedule('refresh_analytics_dashboard_daily');
+            END IF;
+        END $$;
+        """
+    )
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS analytics_dashboard_daily")
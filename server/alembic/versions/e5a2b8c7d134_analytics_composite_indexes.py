@@ -0,0 +1,50 @@
+"""composite indexes for analytics filters
+
+Revision ID: e5a2b8c7d134
+Revises: d93f1c6a8e27
+Create Date: 2025-11-24 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a2b8c7d134"
+down_revision = "d93f1c6a8e27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Plain (card_id, transaction_date) windows use ix_transactions_card_date_id
+    op.create_index(
+        "ix_transactions_card_date_fraud",
+        "transactions",
+        ["card_id", "transaction_date"],
+        postgresql_where=sa.text("is_fraud"),
+    )
+    op.create_index(
+        "ix_transactions_card_location",
+        "transactions",
+        ["card_id", "location"],
+        postgresql_where=sa.text("location IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_transactions_card_merchant_category",
+        "transactions",
+        ["card_id", "merchant_category"],
+        postgresql_where=sa.text("merchant_category IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_fraud_alerts_transaction_created",
+        "fraud_alerts",
+        ["transaction_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_fraud_alerts_transaction_created", table_name="fraud_alerts")
+    op.drop_index("ix_transactions_card_merchant_category", table_name="transactions")
+    op.drop_index("ix_transactions_card_location", table_name="transactions")
+    op.drop_index("ix_transactions_card_date_fraud", table_name="transactions")
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Any, Optional
+import msgpack
 
 from app.database import get_async_db
 from app.core.dependencies import get_current_user
@@ -8,6 +10,7 @@ from app.models.user import User
 from app.services.analytics_service import analytics_service
 from app.schemas.analytics import (
     DashboardMetrics,
+    DashboardOverview,
     FraudTrendsResponse,
     GeographicAnalysis,
     MerchantCategoryAnalysis
@@ -15,9 +18,22 @@ from app.schemas.analytics import (
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def _negotiate(request: Request, payload: Any) -> Any:
+    """Send msgpack to clients that accept it; everyone else gets JSON."""
+    if MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+        return Response(
+            msgpack.packb(jsonable_encoder(payload), use_bin_type=True),
+            media_type=MSGPACK_MEDIA_TYPE
+        )
+    return payload
+
 
 @router.get("/dashboard", response_model=DashboardMetrics)
 async def get_dashboard_metrics(
+    request: Request,
     days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
@@ -32,13 +48,45 @@ async def get_dashboard_metrics(
         metrics = await analytics_service.get_dashboard_metrics(
             db, current_user.id, days
         )
-        return DashboardMetrics(**metrics)
+        return _negotiate(request, DashboardMetrics(**metrics))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve dashboard metrics: {str(e)}")
 
 
+@router.get("/overview", response_model=DashboardOverview)
+async def get_dashboard_overview(
+    request: Request,
+    days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
+    period: str = Query("daily", description="Aggregation period: daily, weekly, or monthly"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get every dashboard analytics block in one call.
+    
+    - **days**: Number of days to look back (max 365)
+    - **period**: Aggregation period for the trends (daily, weekly, monthly)
+    - Returns dashboard metrics, fraud trends, geographic and merchant category analysis
+    - Metrics and trends lag new transactions by up to one refresh of the
+      daily rollup (see `/trends`)
+    """
+    try:
+        if period not in ["daily", "weekly", "monthly"]:
+            raise HTTPException(status_code=400, detail="Period must be: daily, weekly, or monthly")
+        
+        overview = await analytics_service.get_all_dashboard(
+            db, current_user.id, days, period
+        )
+        return _negotiate(request, DashboardOverview(**overview))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve dashboard overview: {str(e)}")
+
+
 @router.get("/trends", response_model=FraudTrendsResponse)
 async def get_fraud_trends(
+    request: Request,
     days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
     period: str = Query("daily", description="Aggregation period: daily, weekly, or monthly"),
     db: AsyncSession = Depends(get_async_db),
@@ -50,6 +98,9 @@ async def get_fraud_trends(
     - **days**: Number of days to look back (max 365)
     - **period**: Aggregation period (daily, weekly, monthly)
     - Returns trend data with fraud rates over time
+    - Trends are read from a daily rollup refreshed about once a minute
+      (`ANALYTICS_VIEW_REFRESH_SECONDS`, or the pg_cron job), so the newest
+      transactions can take up to one refresh interval to appear
     """
     try:
         if period not in ["daily", "weekly", "monthly"]:
@@ -58,7 +109,7 @@ async def get_fraud_trends(
         trends = await analytics_service.get_fraud_trends(
             db, current_user.id, days, period
         )
-        return FraudTrendsResponse(**trends)
+        return _negotiate(request, FraudTrendsResponse(**trends))
     except HTTPException:
         raise
     except Exception as e:
@@ -67,6 +118,7 @@ async def get_fraud_trends(
 
 @router.get("/geographic", response_model=GeographicAnalysis)
 async def get_geographic_analysis(
+    request: Request,
     days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
@@ -81,13 +133,14 @@ async def get_geographic_analysis(
         analysis = await analytics_service.get_geographic_analysis(
             db, current_user.id, days
         )
-        return GeographicAnalysis(**analysis)
+        return _negotiate(request, GeographicAnalysis(**analysis))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve geographic analysis: {str(e)}")
 
 
 @router.get("/merchant-categories", response_model=list[MerchantCategoryAnalysis])
 async def get_merchant_category_analysis(
+    request: Request,
     days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
@@ -102,7 +155,7 @@ async def get_merchant_category_analysis(
         analysis = await analytics_service.get_merchant_category_analysis(
             db, current_user.id, days
         )
-        return [MerchantCategoryAnalysis(**item) for item in analysis]
+        return _negotiate(request, [MerchantCategoryAnalysis(**item) for item in analysis])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve merchant category analysis: {str(e)}")
 
@@ -33,7 +33,7 @@ async def register(
     db: Session = Depends(get_db)
 ) -> Any:
     """Register a new user."""
-    user = AuthService.create_user(db, user_data)
+    user = await AuthService.create_user(db, user_data)
     
     # Create tokens
     access_token = AuthService.create_access_token(str(user.id))
@@ -128,10 +128,8 @@ async def change_password(
     db: Session = Depends(get_db)
 ) -> Any:
     """Change user password."""
-    AuthService.change_password(db, str(current_user.id), password_data)
-    
-    # Logout all sessions (force re-login with new password)
-    await AuthService.logout_user(str(current_user.id))
+    # Also logs out all sessions (force re-login with new password)
+    await AuthService.change_password(db, str(current_user.id), password_data)
     
     return {"message": "Password changed successfully"}
 
@@ -142,8 +140,7 @@ async def forgot_password(
     db: Session = Depends(get_db)
 ) -> Any:
     """Request password reset."""
-    user = AuthService.get_user_by_email(db, email)
-    if not user:
+    if not AuthService.email_exists(db, email):
         # Don't reveal if user exists or not
         return {"message": "If email exists, reset instructions have been sent"}
     
@@ -164,7 +161,7 @@ async def reset_password(
     db: Session = Depends(get_db)
 ) -> Any:
     """Reset password using token."""
-    AuthService.reset_password(db, token, new_password)
+    await AuthService.reset_password(db, token, new_password)
     return {"message": "Password reset successfully"}
 
 
@@ -205,8 +202,7 @@ async def deactivate_account(
     db: Session = Depends(get_db)
 ) -> Any:
     """Deactivate user account."""
-    AuthService.deactivate_user(db, str(current_user.id))
-    await AuthService.logout_user(str(current_user.id))
+    await AuthService.deactivate_user(db, str(current_user.id))
     return {"message": "Account deactivated successfully"}
 
 
@@ -290,7 +286,7 @@ async def google_callback(code: str = Query(...), state: str = Query(""), reques
     if not user:
         # create a pseudo-random password for OAuth user
         random_pwd = _generate_state_token(48)
-        user = AuthService.create_user(db, type("UserCreate", (), {
+        user = await AuthService.create_user(db, type("UserCreate", (), {
             "email": email,
             "username": username_candidate,
             "password": random_pwd,
@@ -19,6 +19,7 @@ from app.schemas.prediction import (
 )
 from app.services.prediction_service import prediction_service
 from app.ml.inference import prediction_engine, PredictionResult
+from app.utils.pagination import decode_cursor, encode_cursor
 
 # Expose all prediction endpoints under /api/v1/predictions/* to match frontend
 router = APIRouter(prefix="/predictions", tags=["Predictions"])
@@ -155,6 +156,7 @@ async def create_batch_predictions(
 async def get_prediction_history(
     limit: int = Query(50, ge=1, le=1000, description="Number of predictions to return"),
     offset: int = Query(0, ge=0, description="Number of predictions to skip"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     start_date: Optional[datetime] = Query(None, description="Filter predictions from this date"),
     end_date: Optional[datetime] = Query(None, description="Filter predictions until this date"),
     risk_level: Optional[str] = Query(None, description="Filter by risk level (low, medium, high, critical)"),
@@ -166,10 +168,13 @@ async def get_prediction_history(
     
     - **limit**: Number of predictions to return (max 1000)
     - **offset**: Number of predictions to skip for pagination
+    - **cursor**: Continue after the previous page (faster than offset for deep pages)
     - **start_date**: Filter predictions from this date
     - **end_date**: Filter predictions until this date  
     - **risk_level**: Filter by risk level
     """
+    cursor_key = decode_cursor(cursor) if cursor else None
+    
     try:
         # Validate risk level if provided
         if risk_level and risk_level not in ['low', 'medium', 'high', 'critical']:
@@ -177,7 +182,8 @@ async def get_prediction_history(
         
         # Get prediction history
         predictions, total_count = await prediction_service.get_prediction_history(
-            db, current_user.id, limit, offset, start_date, end_date, risk_level
+            db, current_user.id, limit, offset, start_date, end_date, risk_level,
+            cursor=cursor_key
         )
         
         # Format predictions
@@ -202,7 +208,8 @@ async def get_prediction_history(
             total_count=total_count,
             limit=limit,
             offset=offset,
-            has_more=offset + limit < total_count
+            has_more=len(predictions) == limit if cursor else offset + limit < total_count,
+            next_cursor=encode_cursor(predictions[-1].created_at, predictions[-1].id) if len(predictions) == limit else None
         )
         
     except ValueError as e:
@@ -305,6 +312,41 @@ async def get_model_info(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve model information: {str(e)}")
 
 
+@router.get("/{prediction_id}", response_model=PredictionResponse)
+async def get_prediction(
+    prediction_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a single prediction of the current user.
+    
+    - **prediction_id**: ID of the prediction
+    """
+    try:
+        pred_uuid = uuid.UUID(prediction_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid prediction ID format")
+    
+    prediction = await prediction_service.get_prediction(db, pred_uuid, current_user.id)
+    if not prediction:
+        raise HTTPException(status_code=404, detail="Prediction not found or access denied")
+    
+    return PredictionResponse(
+        prediction_id=str(prediction.id),
+        transaction_id=str(prediction.transaction_id),
+        is_fraud=prediction.prediction_class is True,
+        fraud_probability=prediction.fraud_probability,
+        confidence_score=prediction.confidence_score or 0.0,
+        risk_level=prediction.risk_level or "low",
+        model_version=prediction.model_version,
+        processing_time_ms=prediction.processing_time_ms,
+        timestamp=prediction.created_at,
+        fraud_alert_id=None,
+        feature_importance=prediction.feature_importance,
+    )
+
+
 async def send_fraud_alert_notification(user_id: uuid.UUID, alert_id: uuid.UUID):
     """
     Background task to send fraud alert notifications.
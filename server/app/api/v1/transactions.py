@@ -8,9 +8,10 @@ from io import BytesIO
 from app.database import get_async_db
 from app.core.dependencies import get_current_user
 from app.services.transaction_service import TransactionService
+from app.utils.pagination import decode_cursor
 from app.schemas.transaction import (
     TransactionResponse, TransactionCreate, TransactionUpdate, 
-    TransactionFilters, TransactionListResponse
+    TransactionFilters, TransactionListResponse, BatchTransactionCreate
 )
 from app.schemas.user import UserResponse
 
@@ -34,6 +35,26 @@ async def create_transaction(
     return await service.create_transaction(transaction, current_user.id)
 
 
+@router.post("/batch", status_code=status.HTTP_201_CREATED)
+async def create_transactions_batch(
+    batch: BatchTransactionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Create up to 1000 transactions in one request
+    
+    - Validates ownership of every referenced card
+    - Rows are written with multi-row INSERT ... RETURNING
+    """
+    service = TransactionService(db)
+    transaction_ids = await service.create_transactions_batch(batch, current_user.id)
+    return {
+        "created": len(transaction_ids),
+        "transaction_ids": [str(tid) for tid in transaction_ids],
+    }
+
+
 @router.get("/", response_model=TransactionListResponse)
 async def get_transactions(
     skip: int = Query(0, ge=0),
@@ -45,6 +66,7 @@ async def get_transactions(
     is_fraud: Optional[bool] = None,
     merchant_category: Optional[str] = None,
     card_id: Optional[UUID] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces skip"),
     db: AsyncSession = Depends(get_async_db),
     current_user: UserResponse = Depends(get_current_user)
 ):
@@ -52,8 +74,10 @@ async def get_transactions(
     Get paginated and filtered transactions
     
     - Supports filtering by date, amount, fraud status, category
+    - Pass the returned next_cursor to page without OFFSET
     - Results are cached for 5 minutes
     """
+    after_date, after_id = decode_cursor(cursor) if cursor else (None, None)
     filters = TransactionFilters(
         start_date=start_date,
         end_date=end_date,
@@ -61,11 +85,15 @@ async def get_transactions(
         max_amount=max_amount,
         is_fraud=is_fraud,
         merchant_category=merchant_category,
-        card_id=card_id
+        card_id=card_id,
+        after_date=after_date,
+        after_id=after_id
     )
     service = TransactionService(db)
-    result = await service.get_transactions(current_user.id, filters, skip=skip, limit=limit)
-    return result
+    # Cached pages are sent on as stored; nothing is decoded or re-validated
+    # against response_model (which stays for the OpenAPI schema)
+    content = await service.get_transactions_json(current_user.id, filters, skip=skip, limit=limit)
+    return Response(content=content, media_type="application/json")
 
 
 @router.post("/import", status_code=status.HTTP_200_OK)
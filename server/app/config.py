@@ -16,15 +16,21 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # bcrypt work factor for new hashes; only lower it for tests
+    BCRYPT_ROUNDS: int = 12
     
     # Database
     DATABASE_URL: str
     DATABASE_POOL_SIZE: int = 10
     DATABASE_MAX_OVERFLOW: int = 20
+    # Seconds before a pooled connection is replaced, and to wait when opening one
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_CONNECT_TIMEOUT: int = 5
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_POOL_MAX: int = 50
     
     # ML Model
     ML_MODEL_PATH: str = "/app/ml_models/lstm_fraud_model.h5"
@@ -44,6 +50,17 @@ class Settings(BaseSettings):
     ADMIN_EMAIL: Optional[str] = None
     ADMIN_PASSWORD: Optional[str] = None
     
+    # Predictions
+    # Transactions per model forward pass, and per bulk database write in
+    # batch predictions; tune the former to the model/hardware sweet spot.
+    PREDICT_ML_BATCH: int = 128
+    PREDICT_DB_BATCH: int = 500
+    
+    # Analytics
+    # Seconds between in-app refreshes of the dashboard materialized view
+    # (skipped when pg_cron schedules the refresh); 0 disables them.
+    ANALYTICS_VIEW_REFRESH_SECONDS: int = 60
+    
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
     RATE_LIMIT_PER_HOUR: int = 1000
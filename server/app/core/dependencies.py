@@ -7,6 +7,7 @@ from app.database import get_db
 from app.core.security import verify_token
 from app.models.user import User
 from app.redis_client import redis_client
+from app.services.auth_service import AuthService
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
@@ -32,7 +33,7 @@ async def get_current_user(
     db: Session = Depends(get_db)
 ) -> User:
     """Get current authenticated user."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = AuthService.get_user_by_id(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
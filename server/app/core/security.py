@@ -1,3 +1,6 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Union, Optional
 from jose import jwt, JWTError
@@ -9,7 +12,12 @@ import uuid
 from app.config import settings
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt holds the CPU for tens of milliseconds per call; async callers run it
+# on this dedicated pool so it neither blocks the event loop nor starves the
+# default executor.
+_kdf_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="kdf")
 
 
 def create_access_token(
@@ -66,6 +74,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def get_password_hash_async(password: str) -> str:
+    """Hash password on the KDF thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_kdf_executor, get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash on the KDF thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_kdf_executor, verify_password, plain_password, hashed_password)
+
+
 def generate_password_reset_token(email: str) -> str:
     """Generate password reset token."""
     delta = timedelta(hours=1)  # Reset token expires in 1 hour
@@ -22,6 +22,9 @@ else:
         settings.DATABASE_URL,
         pool_size=settings.DATABASE_POOL_SIZE,
         max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args={"connect_timeout": settings.DATABASE_CONNECT_TIMEOUT},
         echo=settings.DEBUG,
     )
 
@@ -32,6 +35,11 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def enum_values(enum_cls) -> list[str]:
+    """Persist Python enums by value so they match the native Postgres enum labels."""
+    return [member.value for member in enum_cls]
+
+
 # Dependency to get database session
 def get_db():
     """Dependency to get database session."""
@@ -68,6 +76,9 @@ else:
         echo=settings.DEBUG,
         pool_size=settings.DATABASE_POOL_SIZE,
         max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args={"timeout": settings.DATABASE_CONNECT_TIMEOUT},
     )
 
 AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
@@ -91,6 +102,7 @@ async def get_redis() -> redis.Redis:
             settings.REDIS_URL,
             password=settings.REDIS_PASSWORD,
             decode_responses=True,
+            max_connections=settings.REDIS_POOL_MAX,
         )
     return redis_client
 
@@ -3,22 +3,25 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse, HTMLResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi.encoders import jsonable_encoder
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import time
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.database import engine, Base, SessionLocal
+from app.database import engine, Base, SessionLocal, AsyncSessionLocal
 from sqlalchemy import text
 from app.api.v1 import auth, transactions, predictions, analytics
 from app.redis_client import redis_client
 from fastapi.staticfiles import StaticFiles
 import os
-from app.services.auth_service import AuthService
+from app.services.auth_service import AuthService, listen_for_user_invalidations
+from app.services.analytics_service import analytics_service
 from app.schemas.user import UserCreate
 from app.models.user import User
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 
 # Configure logging
 log_level = settings.LOG_LEVEL.upper() if hasattr(settings.LOG_LEVEL, 'upper') else settings.LOG_LEVEL
@@ -29,6 +32,28 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+ANALYTICS_VIEW_REFRESH_LOCK = "analytics_view_refresh"
+
+
+async def refresh_analytics_view_periodically(interval: int):
+    """
+    Keep the dashboard materialized view fresh when pg_cron is not in use.
+    
+    Every worker runs this loop, but only the one that takes the refresh lock
+    refreshes. The lock is left to expire after `interval`, so the view is
+    refreshed at most once per interval across the deployment.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await redis_client.acquire_lock(ANALYTICS_VIEW_REFRESH_LOCK, interval) is None:
+                continue
+            async with AsyncSessionLocal() as session:
+                await analytics_service.refresh_dashboard_view(session)
+        except Exception as e:
+            logger.warning(f"Analytics view refresh failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
@@ -50,10 +75,109 @@ async def lifespan(app: FastAPI):
                 ALTER TABLE IF EXISTS predictions
                 ADD COLUMN IF NOT EXISTS feedback_notes TEXT;
             """))
-        logger.info("Schema guard executed: predictions columns ensured")
+            # predictions.user_id (migration a3d6e9f2c481): add, backfill from
+            # the transaction's card owner, then enforce it like the model does
+            conn.execute(text("""
+                ALTER TABLE IF EXISTS predictions
+                ADD COLUMN IF NOT EXISTS user_id UUID;
+            """))
+            conn.execute(text("""
+                UPDATE predictions AS p
+                SET user_id = c.user_id
+                FROM transactions AS t
+                JOIN cards AS c ON c.id = t.card_id
+                WHERE t.id = p.transaction_id AND p.user_id IS NULL;
+            """))
+            conn.execute(text("""
+                ALTER TABLE IF EXISTS predictions
+                ALTER COLUMN user_id SET NOT NULL;
+            """))
+            conn.execute(text("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_constraint WHERE conname = 'predictions_user_id_fkey'
+                    ) THEN
+                        ALTER TABLE predictions
+                        ADD CONSTRAINT predictions_user_id_fkey
+                        FOREIGN KEY (user_id) REFERENCES users (id);
+                    END IF;
+                END $$;
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_predictions_user_created
+                ON predictions (user_id, created_at, id);
+            """))
+            # fraud_alerts.alert_context (migration b8e1f4c7a925): the message
+            # is rendered from the context, so the stored text becomes optional
+            conn.execute(text("""
+                ALTER TABLE IF EXISTS fraud_alerts
+                ADD COLUMN IF NOT EXISTS alert_context JSONB;
+            """))
+            conn.execute(text("""
+                ALTER TABLE IF EXISTS fraud_alerts
+                ALTER COLUMN alert_message DROP NOT NULL;
+            """))
+            # Redundant with ix_transactions_card_date_id; databases migrated
+            # before it was dropped from e5a2b8c7d134 still carry it
+            conn.execute(text("""
+                DROP INDEX IF EXISTS ix_transactions_card_date;
+            """))
+        logger.info("Schema guard executed: predictions and fraud_alerts columns ensured")
     except Exception as e:
         logger.error(f"Schema guard failed: {e}")
     
+    # Dashboard rollup view (migrations d93f1c6a8e27 and f27c4d9a1b68): create
+    # it, or rebuild it if it predates fraud_amount, and hand the refresh to
+    # pg_cron when the extension is installed
+    pg_cron_refresh = False
+    if engine.dialect.name == "postgresql":
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    DO $$
+                    BEGIN
+                        IF NOT EXISTS (
+                            SELECT 1 FROM pg_attribute
+                            WHERE attrelid = to_regclass('analytics_dashboard_daily')
+                              AND attname = 'fraud_amount'
+                        ) THEN
+                            DROP MATERIALIZED VIEW IF EXISTS analytics_dashboard_daily;
+                            CREATE MATERIALIZED VIEW analytics_dashboard_daily AS
+                            SELECT
+                                c.user_id,
+                                date_trunc('day', t.transaction_date)::date AS day,
+                                count(*) AS total_transactions,
+                                count(*) FILTER (WHERE t.is_fraud) AS fraud_count,
+                                sum(t.amount) AS total_amount,
+                                coalesce(sum(t.amount) FILTER (WHERE t.is_fraud), 0) AS fraud_amount
+                            FROM transactions t
+                            JOIN cards c ON c.id = t.card_id
+                            GROUP BY c.user_id, date_trunc('day', t.transaction_date)::date;
+                        END IF;
+                    END $$;
+                """))
+                conn.execute(text("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS ix_analytics_dashboard_daily_user_day
+                    ON analytics_dashboard_daily (user_id, day);
+                """))
+                pg_cron_refresh = conn.execute(text("""
+                    SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron');
+                """)).scalar()
+                if pg_cron_refresh:
+                    # cron.schedule replaces an existing job of the same name
+                    conn.execute(text("""
+                        SELECT cron.schedule(
+                            'refresh_analytics_dashboard_daily',
+                            '* * * * *',
+                            'REFRESH MATERIALIZED VIEW CONCURRENTLY analytics_dashboard_daily'
+                        );
+                    """))
+            analytics_service.use_daily_view = True
+            logger.info("Schema guard executed: analytics dashboard view ensured")
+        except Exception as e:
+            logger.error(f"Analytics view guard failed, using base tables: {e}")
+    
     # Connect to Redis
     await redis_client.connect()
     logger.info("Redis connection established")
@@ -73,7 +197,7 @@ async def lifespan(app: FastAPI):
                         full_name="Admin",
                         is_active=True,
                     )
-                    admin = AuthService.create_user(db, user_data)
+                    admin = await AuthService.create_user(db, user_data)
                     admin.is_superuser = True
                     admin.is_verified = True
                     db.commit()
@@ -94,7 +218,7 @@ async def lifespan(app: FastAPI):
                     # Update password to ADMIN_PASSWORD
                     if settings.ADMIN_PASSWORD:
                         try:
-                            admin.hashed_password = get_password_hash(settings.ADMIN_PASSWORD)
+                            admin.hashed_password = await get_password_hash_async(settings.ADMIN_PASSWORD)
                             updated = True
                         except Exception:
                             pass
@@ -107,10 +231,25 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error("Failed to seed admin user: %s", e)
     
+    invalidation_task = asyncio.create_task(listen_for_user_invalidations())
+    
+    refresh_task = None
+    if (
+        settings.ANALYTICS_VIEW_REFRESH_SECONDS > 0
+        and analytics_service.use_daily_view
+        and not pg_cron_refresh
+    ):
+        refresh_task = asyncio.create_task(
+            refresh_analytics_view_periodically(settings.ANALYTICS_VIEW_REFRESH_SECONDS)
+        )
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Fraud Detection API...")
+    if refresh_task:
+        refresh_task.cancel()
+    invalidation_task.cancel()
     await redis_client.disconnect()
     logger.info("Redis connection closed")
 
@@ -178,7 +317,8 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={
             "error": True,
             "message": "Validation error",
-            "details": exc.errors(),
+            # Errors raised in validators carry the exception itself in ctx
+            "details": jsonable_encoder(exc.errors()),
             "status_code": 422,
             "path": str(request.url)
         }
@@ -329,11 +469,17 @@ async def root():
 # Metrics endpoint (basic implementation)
 @app.get("/metrics", tags=["Metrics"])
 async def metrics():
-    """Basic metrics endpoint."""
+    """Basic metrics endpoint, including Redis cache hit/miss counters."""
+    try:
+        cache_stats = await redis_client.get_cache_stats()
+    except Exception as e:
+        logger.warning(f"Failed to read cache stats: {e}")
+        cache_stats = {}
     return {
         "uptime": time.time(),
         "version": settings.APP_VERSION,
-        "status": "running"
+        "status": "running",
+        "cache": cache_stats
     }
 
 
@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import time
 import uuid
 from dataclasses import dataclass
@@ -13,6 +14,13 @@ from app.ml.model import FraudDetectionLSTM
 from app.ml.preprocessing import FeatureEngineer
 from app.redis_client import redis_client
 
+logger = logging.getLogger(__name__)
+
+
+# Cached scores are stored as integers in units of 1/CACHE_SCORE_SCALE (±5e-5);
+# the database keeps full precision.
+CACHE_SCORE_SCALE = 10000
+
 
 class RiskLevel(Enum):
     """Risk level enumeration for fraud predictions."""
@@ -43,6 +51,7 @@ class PredictionEngine:
         self.model = FraudDetectionLSTM()
         self.preprocessor = FeatureEngineer()
         self.model_version = "v1.0"
+        self.ml_batch_size = settings.PREDICT_ML_BATCH
         self._model_loaded = False
         
         # Risk level thresholds
@@ -75,54 +84,96 @@ class PredictionEngine:
         confidence = 1.0 - (2 * abs(fraud_probability - 0.5))
         return max(0.0, min(1.0, confidence))
     
+    def _result_from_cache(self, data: List) -> PredictionResult:
+        """Rebuild a PredictionResult from its cached form."""
+        (is_fraud, probability, confidence, risk_level, model_version,
+         processing_time_ms, timestamp, prediction_id, feature_importance) = data
+        return PredictionResult(
+            is_fraud=is_fraud,
+            fraud_probability=probability / CACHE_SCORE_SCALE,
+            confidence_score=confidence / CACHE_SCORE_SCALE,
+            risk_level=RiskLevel(risk_level),
+            model_version=model_version,
+            processing_time_ms=processing_time_ms,
+            timestamp=timestamp,
+            prediction_id=str(uuid.UUID(bytes=prediction_id)),
+            feature_importance=feature_importance,
+        )
+    
+    def _result_to_cache(self, result: PredictionResult) -> List:
+        """
+        Cached form of a PredictionResult: a positional list with the scores as
+        fixed-point integers and the id as raw UUID bytes, so each entry packs
+        to a fraction of the keyed-dict size.
+        """
+        return [
+            result.is_fraud,
+            round(result.fraud_probability * CACHE_SCORE_SCALE),
+            round(result.confidence_score * CACHE_SCORE_SCALE),
+            result.risk_level.value,
+            result.model_version,
+            result.processing_time_ms,
+            result.timestamp,
+            uuid.UUID(result.prediction_id).bytes,
+            result.feature_importance,
+        ]
+    
     async def _check_cache(self, transaction_id: str) -> Optional[PredictionResult]:
         """Check if prediction result is cached."""
         try:
-            cached_data = await redis_client.get(f"prediction:{transaction_id}")
+            cached_data = await redis_client.get_cached_prediction(transaction_id)
             if cached_data:
-                data = cached_data
-                return PredictionResult(
-                    is_fraud=data["is_fraud"],
-                    fraud_probability=data["fraud_probability"],
-                    confidence_score=data["confidence_score"],
-                    risk_level=RiskLevel(data["risk_level"]),
-                    model_version=data["model_version"],
-                    processing_time_ms=data["processing_time_ms"],
-                    timestamp=data["timestamp"],
-                    prediction_id=data["prediction_id"],
-                    feature_importance=data.get("feature_importance"),
-                )
+                return self._result_from_cache(cached_data)
         except Exception:
             pass
         return None
     
+    async def _check_cache_batch(self, transaction_ids: List[str]) -> Dict[str, PredictionResult]:
+        """Look up cached results for several transactions with a single MGET."""
+        try:
+            cached = await redis_client.get_cached_predictions(transaction_ids)
+            return {
+                transaction_id: self._result_from_cache(data)
+                for transaction_id, data in zip(transaction_ids, cached)
+                if data
+            }
+        except Exception:
+            return {}
+    
     async def _cache_result(self, transaction_id: str, result: PredictionResult):
         """Cache prediction result for 5 minutes."""
         try:
-            await redis_client.setex(
-                f"prediction:{transaction_id}",
-                300,  # 5 minutes
-                {
-                    "is_fraud": result.is_fraud,
-                    "fraud_probability": result.fraud_probability,
-                    "confidence_score": result.confidence_score,
-                    "risk_level": result.risk_level.value,
-                    "model_version": result.model_version,
-                    "processing_time_ms": result.processing_time_ms,
-                    "timestamp": result.timestamp,
-                    "prediction_id": result.prediction_id,
-                    "feature_importance": result.feature_importance,
-                }
+            await redis_client.cache_prediction(
+                transaction_id, self._result_to_cache(result), expire_minutes=5
+            )
+        except Exception:
+            pass  # Cache failure should not block prediction
+    
+    async def _evict_cache(self, transaction_ids: List[str]):
+        """Drop cached results, e.g. when persisting them failed."""
+        try:
+            await redis_client.delete_cached_predictions(transaction_ids)
+        except Exception:
+            pass
+    
+    async def _cache_results(self, results: Dict[str, PredictionResult]):
+        """Cache several prediction results for 5 minutes in one pipelined round-trip."""
+        try:
+            await redis_client.cache_predictions(
+                {transaction_id: self._result_to_cache(result) for transaction_id, result in results.items()},
+                expire_minutes=5,
             )
         except Exception:
             pass  # Cache failure should not block prediction
     
-    async def predict_single(self, transaction_data: Dict) -> PredictionResult:
+    async def predict_single(self, transaction_data: Dict, use_cache: bool = True) -> PredictionResult:
         """
         Make a single transaction prediction.
         
         Args:
             transaction_data: Dictionary containing transaction features
+            use_cache: Read and write the result cache; callers that manage the
+                cache themselves pass False
             
         Returns:
             PredictionResult with comprehensive prediction information
@@ -131,7 +182,7 @@ class PredictionEngine:
         prediction_id = str(uuid.uuid4())
         
         # Check cache first
-        transaction_id = transaction_data.get("id")
+        transaction_id = transaction_data.get("id") if use_cache else None
         if transaction_id:
             cached_result = await self._check_cache(transaction_id)
             if cached_result:
@@ -199,62 +250,77 @@ class PredictionEngine:
                 feature_importance=None,
             )
     
-    async def predict_batch(self, transactions_data: List[Dict]) -> List[PredictionResult]:
+    async def predict_batch(self, columns: Dict[str, np.ndarray]) -> List[PredictionResult]:
         """
         Make batch predictions for multiple transactions.
         
         Args:
-            transactions_data: List of transaction dictionaries
+            columns: Transaction fields as column arrays (see
+                FeatureEngineer.build_feature_matrix), one entry per transaction
             
         Returns:
-            List of PredictionResult objects
+            List of PredictionResult objects, in input order
         """
         results = []
+        transaction_ids = columns["id"]
         
-        # Process in batches to avoid memory issues
-        batch_size = 100
-        for i in range(0, len(transactions_data), batch_size):
-            batch = transactions_data[i:i + batch_size]
+        # Process in model-sized batches to avoid memory issues
+        batch_size = self.ml_batch_size
+        for i in range(0, len(transaction_ids), batch_size):
+            batch = slice(i, i + batch_size)
+            batch_ids = transaction_ids[batch]
             
-            # Check cache for each transaction
-            uncached_transactions: List[Tuple[int, Dict]] = []
+            # Check the cache for the whole batch in one round-trip
+            uncached: List[int] = []
             cached_results: Dict[int, PredictionResult] = {}
+            cached_by_id = await self._check_cache_batch([tid for tid in batch_ids if tid])
             
-            for idx, transaction in enumerate(batch):
-                transaction_id = transaction.get("id")
-                if transaction_id:
-                    cached_result = await self._check_cache(transaction_id)
-                    if cached_result:
-                        cached_results[idx] = cached_result
-                        continue
-                uncached_transactions.append((idx, transaction))
+            for idx, transaction_id in enumerate(batch_ids):
+                cached_result = cached_by_id.get(transaction_id) if transaction_id else None
+                if cached_result:
+                    cached_results[idx] = cached_result
+                else:
+                    uncached.append(idx)
             
             batch_predictions: Dict[int, PredictionResult] = {}
             
-            if uncached_transactions:
+            if uncached:
                 try:
                     await self._ensure_model_loaded()
                     
-                    feature_vectors = [
-                        self.preprocessor.build_feature_vector(txn)
-                        for _, txn in uncached_transactions
-                    ]
-                    sequences = [
-                        self.preprocessor.build_sequence(vector)[0]
-                        for vector in feature_vectors
-                    ]
-                    sequence_data = np.stack(sequences, axis=0)
+                    rows = np.asarray(uncached) + i
+                    uncached_columns = {name: values[rows] for name, values in columns.items()}
+                    feature_matrix = self.preprocessor.build_feature_matrix(uncached_columns)
+                    sequence_data = self.preprocessor.build_batch_sequences(feature_matrix)
                     
+                    inference_start = time.time()
                     _, probabilities = await asyncio.to_thread(
                         self.model.predict, sequence_data
                     )
+                    inference_ms = (time.time() - inference_start) * 1000
+                    logger.debug(
+                        "Scored %d transactions in %.1f ms (%.0f/s, batch size %d)",
+                        len(uncached), inference_ms,
+                        len(uncached) / max(inference_ms / 1000, 1e-9), batch_size,
+                    )
                     
-                    for (idx, transaction), prob in zip(uncached_transactions, probabilities):
+                    to_cache: Dict[str, PredictionResult] = {}
+                    hours = (
+                        uncached_columns["transaction_date"].astype("datetime64[h]").astype(np.int64) % 24
+                    )
+                    for pos, (idx, prob) in enumerate(zip(uncached, probabilities)):
                         fraud_probability = float(prob)
                         is_fraud = fraud_probability >= 0.5
                         confidence_score = self._calculate_confidence_score(fraud_probability)
                         risk_level = self._calculate_risk_level(fraud_probability)
-                        feature_importance = self._calculate_feature_importance(transaction, fraud_probability)
+                        feature_importance = self._feature_importance(
+                            float(uncached_columns["amount"][pos]),
+                            uncached_columns["merchant_category"][pos],
+                            uncached_columns["location"][pos],
+                            uncached_columns["transaction_type"][pos],
+                            int(hours[pos]),
+                            fraud_probability,
+                        )
                         
                         result = PredictionResult(
                             is_fraud=is_fraud,
@@ -268,13 +334,15 @@ class PredictionEngine:
                             feature_importance=feature_importance,
                         )
                         
-                        transaction_id = transaction.get("id")
+                        transaction_id = batch_ids[idx]
                         if transaction_id:
-                            await self._cache_result(transaction_id, result)
+                            to_cache[transaction_id] = result
                         
                         batch_predictions[idx] = result
+                    
+                    await self._cache_results(to_cache)
                 except Exception:
-                    for idx, _ in uncached_transactions:
+                    for idx in uncached:
                         batch_predictions[idx] = PredictionResult(
                             is_fraud=False,
                             fraud_probability=0.0,
@@ -288,7 +356,7 @@ class PredictionEngine:
                         )
             
             # Assemble results preserving original order
-            for idx in range(len(batch)):
+            for idx in range(len(batch_ids)):
                 if idx in cached_results:
                     results.append(cached_results[idx])
                 elif idx in batch_predictions:
@@ -336,11 +404,6 @@ class PredictionEngine:
         This is not a full SHAP explanation but gives analysts a hint about what
         influenced the score by combining simple heuristics derived from the payload.
         """
-        amount = float(transaction_data.get("amount") or 0)
-        merchant_category = (transaction_data.get("merchant_category") or "unknown").lower()
-        location = (transaction_data.get("location") or "unknown").lower()
-        txn_type = (transaction_data.get("transaction_type") or "unknown").lower()
-
         hour = 0
         timestamp = transaction_data.get("transaction_date")
         if isinstance(timestamp, str):
@@ -349,6 +412,29 @@ class PredictionEngine:
             except ValueError:
                 hour = 0
 
+        return self._feature_importance(
+            float(transaction_data.get("amount") or 0),
+            transaction_data.get("merchant_category"),
+            transaction_data.get("location"),
+            transaction_data.get("transaction_type"),
+            hour,
+            fraud_probability,
+        )
+
+    def _feature_importance(
+        self,
+        amount: float,
+        merchant_category: Optional[str],
+        location: Optional[str],
+        txn_type: Optional[str],
+        hour: int,
+        fraud_probability: float,
+    ) -> Dict[str, float]:
+        """Feature-importance heuristic over already-extracted transaction fields."""
+        merchant_category = (merchant_category or "unknown").lower()
+        location = (location or "unknown").lower()
+        txn_type = (txn_type or "unknown").lower()
+
         raw_scores = {
             "Transaction Amount": min(100.0, max(10.0, amount / 15)),
             "Merchant Category": 30.0 + (hash(merchant_category) % 30),
@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
+import zlib
 
 import joblib
 import numpy as np
+import orjson
+from numpy.lib.stride_tricks import sliding_window_view
 
 from app.config import settings
 
@@ -28,6 +30,13 @@ def _safe_int(value: Optional[int]) -> int:
         return 0
 
 
+def _stable_hash(value) -> int:
+    # Built-in hash() of a str is salted per process (PYTHONHASHSEED), so the
+    # same card or merchant would get different features in every worker and
+    # every training run; CRC32 is the same everywhere.
+    return zlib.crc32(str(value).encode("utf-8"))
+
+
 @dataclass
 class FeatureEngineer:
     """
@@ -127,6 +136,97 @@ class FeatureEngineer:
 
         return stacked.astype(np.float32)[np.newaxis, :, :]
 
+    def build_feature_matrix(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Return an (n, feature_count) matrix for a batch given as column arrays.
+
+        Produces the same features as ``build_feature_vector`` row by row, but the
+        numeric and calendar features are computed on whole columns and the scaler
+        runs once over the matrix. Expects ``amount`` as a float array,
+        ``transaction_date`` as datetime64 and the remaining fields as object arrays.
+        """
+        amount = columns["amount"].astype(np.float32)
+        n = amount.shape[0]
+        if n == 0:
+            return np.zeros((0, self.feature_count), dtype=np.float32)
+
+        dates = columns["transaction_date"].astype("datetime64[us]")
+        # Missing or unparseable dates (NaT) get the zero calendar features that
+        # build_feature_vector gives a timestamp it cannot parse
+        has_date = ~np.isnat(dates)
+        dates = np.where(has_date, dates, np.datetime64(0, "us"))
+        days = dates.astype("datetime64[D]")
+        months = dates.astype("datetime64[M]")
+        hour = (dates - days).astype("timedelta64[h]").astype(np.int64)
+        day = (days - months).astype(np.int64) + 1
+        month = months.astype(np.int64) % 12 + 1
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekday = (days.astype(np.int64) + 3) % 7
+        hour, day, month, weekday = (
+            np.where(has_date, values, 0) for values in (hour, day, month, weekday)
+        )
+
+        card_ids = columns["card_id"]
+        card_velocity = np.fromiter(
+            ((_stable_hash(card_id) % 5) / 10.0 if card_id else 0.0 for card_id in card_ids),
+            dtype=np.float32,
+            count=n,
+        )
+
+        matrix = np.empty((n, self.feature_count), dtype=np.float32)
+        matrix[:, 0] = amount
+        matrix[:, 1] = np.log1p(amount)
+        matrix[:, 2] = hour
+        matrix[:, 3] = day
+        matrix[:, 4] = month
+        matrix[:, 5] = weekday
+        matrix[:, 6] = has_date & (weekday >= 5)
+        matrix[:, 7] = [
+            self._encode_value(self.merchant_map, (value or "unknown").lower())
+            for value in columns["merchant_category"]
+        ]
+        matrix[:, 8] = [
+            self._encode_value(self.transaction_type_map, (value or "unknown").lower())
+            for value in columns["transaction_type"]
+        ]
+        matrix[:, 9] = [
+            self._encode_value(self.device_type_map, self._extract_device_type(value))
+            for value in columns["device_info"]
+        ]
+        matrix[:, 10] = [self._location_risk_score(value) for value in columns["location"]]
+        matrix[:, 11] = [self._ip_risk_score(value) for value in columns["ip_address"]]
+        matrix[:, 12] = [self._card_risk_score(value) for value in card_ids]
+        matrix[:, 13] = np.minimum(amount / 1000.0 + card_velocity, 1.0)
+        matrix[:, 14] = [self._merchant_velocity_proxy(value) for value in columns["merchant_name"]]
+        matrix[:, 15] = 1.0 / (1.0 + np.exp(-amount / 500))
+        matrix[:, 16] = has_date & ((hour < 6) | (hour > 22))
+
+        if self._scaler is not None:
+            try:
+                matrix = self._scaler.transform(matrix).astype(np.float32)
+            except Exception:
+                # Fall back to unscaled features if the saved scaler is incompatible.
+                pass
+
+        return matrix
+
+    def build_batch_sequences(self, feature_matrix: np.ndarray) -> np.ndarray:
+        """Repeat each row of a feature matrix into an (n, sequence_length, feature_count) tensor."""
+        return np.repeat(feature_matrix[:, np.newaxis, :], self.sequence_length, axis=1)
+
+    def create_sequences(self, features: np.ndarray, sequence_length: Optional[int] = None) -> np.ndarray:
+        """
+        Every run of sequence_length consecutive rows of a (n, feature_count) matrix,
+        as an (n - sequence_length + 1, sequence_length, feature_count) tensor.
+
+        The result is a strided read-only view of `features`, not a copy.
+        """
+        sequence_length = sequence_length or self.sequence_length
+        features = np.asarray(features)
+        if features.shape[0] < sequence_length:
+            return np.zeros((0, sequence_length, features.shape[1]), dtype=features.dtype)
+        return sliding_window_view(features, sequence_length, axis=0).transpose(0, 2, 1)
+
     def prepare_batch_sequences(self, transactions: List[Dict]) -> np.ndarray:
         """Convenience helper used by the batch prediction endpoint."""
         sequences = [self.build_sequence(self.build_feature_vector(txn)) for txn in transactions]
@@ -156,17 +256,19 @@ class FeatureEngineer:
             return "unknown"
         try:
             if isinstance(device_info, str):
-                info = json.loads(device_info)
+                info = orjson.loads(device_info)
             else:
                 info = device_info
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
+            return "unknown"
+        if not isinstance(info, dict):
             return "unknown"
         return (info.get("device_type") or info.get("type") or "unknown").lower()
 
     def _location_risk_score(self, location: Optional[str]) -> float:
         if not location:
             return 0.0
-        return float((hash(location.lower()) % 100) / 100)
+        return float((_stable_hash(location.lower()) % 100) / 100)
 
     def _ip_risk_score(self, ip_address: Optional[str]) -> float:
         if not ip_address:
@@ -180,18 +282,18 @@ class FeatureEngineer:
     def _card_risk_score(self, card_id: Optional[str]) -> float:
         if not card_id:
             return 0.0
-        return float((hash(card_id) % 100) / 100)
+        return float((_stable_hash(card_id) % 100) / 100)
 
     def _velocity_proxy(self, amount: float, card_id: Optional[str]) -> float:
         base = amount / 1000.0
         if card_id:
-            base += ((hash(card_id) % 5) / 10.0)
+            base += ((_stable_hash(card_id) % 5) / 10.0)
         return float(min(base, 1.0))
 
     def _merchant_velocity_proxy(self, merchant_name: Optional[str]) -> float:
         if not merchant_name:
             return 0.0
-        return float((hash(merchant_name.lower()) % 100) / 100)
+        return float((_stable_hash(merchant_name.lower()) % 100) / 100)
 
     def _amount_percentile_hint(self, amount: float) -> float:
         # Simple heuristic percentile using a sigmoid-like curve.
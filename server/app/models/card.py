@@ -1,12 +1,11 @@
-import uuid
 from datetime import datetime, date
-from sqlalchemy import Column, String, Boolean, DateTime, Date, Text, Enum, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Date, Text, Enum, ForeignKey, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
-from app.database import Base
+from app.database import Base, enum_values
 
 
 class CardType(str, enum.Enum):
@@ -17,10 +16,10 @@ class CardType(str, enum.Enum):
 class Card(Base):
     __tablename__ = "cards"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     card_number = Column(String(16), nullable=False)  # Encrypted in practice
-    card_type = Column(Enum(CardType), nullable=False)
+    card_type = Column(Enum(CardType, name="cardtype", values_callable=enum_values), nullable=False)
     card_brand = Column(String(50))  # Visa, Mastercard, etc.
     expiry_date = Column(Date, nullable=False)
     cvv = Column(String(3), nullable=False)  # Encrypted in practice
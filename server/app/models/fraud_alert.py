@@ -1,12 +1,11 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey, Enum, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
-from app.database import Base
+from app.database import Base, enum_values
 
 
 class AlertLevel(str, enum.Enum):
@@ -19,10 +18,13 @@ class AlertLevel(str, enum.Enum):
 class FraudAlert(Base):
     __tablename__ = "fraud_alerts"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"), nullable=False, index=True)
-    alert_level = Column(Enum(AlertLevel), nullable=False)
-    alert_message = Column(Text, nullable=False)
+    alert_level = Column(Enum(AlertLevel, name="alertlevel", values_callable=enum_values), nullable=False)
+    # Either a literal message, or NULL with the structured alert_context that
+    # `message` formats on read (keeps formatting off the prediction write path)
+    alert_message = Column(Text, nullable=True)
+    alert_context = Column(JSONB, nullable=True)
     is_resolved = Column(Boolean, default=False)
     resolved_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     resolved_at = Column(DateTime(timezone=True), nullable=True)
@@ -33,5 +35,21 @@ class FraudAlert(Base):
     transaction = relationship("Transaction", back_populates="fraud_alerts")
     resolver = relationship("User", foreign_keys=[resolved_by], back_populates="resolved_alerts")
     
+    __table_args__ = (
+        Index("ix_fraud_alerts_transaction_created", "transaction_id", "created_at"),
+    )
+    
+    @property
+    def message(self) -> str:
+        """Human-readable alert text."""
+        if self.alert_message is not None:
+            return self.alert_message
+        context = self.alert_context or {}
+        return (
+            f"Transaction of ${context.get('amount', 0):.2f} at {context.get('merchant')} "
+            f"flagged as {context.get('risk')} risk "
+            f"(score: {context.get('score', 0):.2%})"
+        )
+    
     def __repr__(self):
         return f"<FraudAlert(id={self.id}, level={self.alert_level}, resolved={self.is_resolved})>"
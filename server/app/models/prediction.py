@@ -1,12 +1,11 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Float, Integer, ForeignKey, Enum
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Float, Integer, ForeignKey, Enum, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
-from app.database import Base
+from app.database import Base, enum_values
 
 
 class PredictionFeedback(str, enum.Enum):
@@ -18,8 +17,10 @@ class PredictionFeedback(str, enum.Enum):
 class Prediction(Base):
     __tablename__ = "predictions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"), nullable=False, unique=True, index=True)
+    # Owner of the transaction's card, copied here so history pages don't join through cards
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     model_version = Column(String(50), nullable=False)
     fraud_probability = Column(Float, nullable=False)
     prediction_class = Column(Boolean, nullable=False)  # True if fraud, False if legitimate
@@ -27,7 +28,7 @@ class Prediction(Base):
     risk_level = Column(String(50), nullable=False, default="low")
     feature_importance = Column(JSONB)  # Store feature importance for explainability
     processing_time_ms = Column(Integer, nullable=False)
-    feedback = Column(Enum(PredictionFeedback), default=PredictionFeedback.UNKNOWN)
+    feedback = Column(Enum(PredictionFeedback, name="predictionfeedback", values_callable=enum_values), default=PredictionFeedback.UNKNOWN)
     reviewed_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     reviewed_at = Column(DateTime(timezone=True), nullable=True)
     feedback_notes = Column(Text, nullable=True)
@@ -37,5 +38,11 @@ class Prediction(Base):
     transaction = relationship("Transaction", back_populates="prediction")
     reviewer = relationship("User", foreign_keys=[reviewed_by], back_populates="reviewed_predictions")
     
+    __table_args__ = (
+        Index("ix_predictions_created_at_brin", "created_at", postgresql_using="brin"),
+        # Serves per-user history pages newest-first, keyed on (created_at, id)
+        Index("ix_predictions_user_created", "user_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Prediction(id={self.id}, fraud_probability={self.fraud_probability}, prediction={self.prediction_class})>"
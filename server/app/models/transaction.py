@@ -1,11 +1,13 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Float, DateTime, Boolean, ForeignKey, Enum, Text, DECIMAL, func
-from sqlalchemy.dialects.postgresql import UUID, INET, JSONB
+from typing import List
+from uuid import UUID as PyUUID
+from sqlalchemy import Column, String, Float, DateTime, Boolean, ForeignKey, Enum, Text, DECIMAL, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID, INET, JSONB, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
 
-from app.database import Base
+from app.database import Base, enum_values
 
 
 class TransactionType(PyEnum):
@@ -19,13 +21,13 @@ class TransactionType(PyEnum):
 class Transaction(Base):
     __tablename__ = "transactions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     card_id = Column(UUID(as_uuid=True), ForeignKey("cards.id"), nullable=False, index=True)
     amount = Column(DECIMAL(10, 2), nullable=False)
     merchant_name = Column(String(255))
     merchant_category = Column(String(100))
     transaction_date = Column(DateTime(timezone=True), nullable=False, index=True)
-    transaction_type = Column(Enum(TransactionType), nullable=False)
+    transaction_type = Column(Enum(TransactionType, name="transactiontype", values_callable=enum_values), nullable=False)
     location = Column(String(255))
     ip_address = Column(INET)
     device_info = Column(JSONB)
@@ -39,5 +41,51 @@ class Transaction(Base):
     prediction = relationship("Prediction", back_populates="transaction", uselist=False, cascade="all, delete-orphan")
     fraud_alerts = relationship("FraudAlert", back_populates="transaction", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Rows arrive roughly in date order, so a BRIN index lets date-window
+        # scans skip whole block ranges at a fraction of a B-tree's size.
+        Index("ix_transactions_transaction_date_brin", "transaction_date", postgresql_using="brin"),
+        # Analytics reach transactions through card_id and filter on a date
+        # window, served by the keyset index below; the partial indexes cover
+        # the fraud/location/category slices.
+        Index(
+            "ix_transactions_card_date_fraud", "card_id", "transaction_date",
+            postgresql_where=text("is_fraud"),
+        ),
+        Index(
+            "ix_transactions_card_location", "card_id", "location",
+            postgresql_where=text("location IS NOT NULL"),
+        ),
+        Index(
+            "ix_transactions_card_merchant_category", "card_id", "merchant_category",
+            postgresql_where=text("merchant_category IS NOT NULL"),
+        ),
+        # Keyset pagination of transaction lists (newest first)
+        Index(
+            "ix_transactions_card_date_id", "card_id",
+            text("transaction_date DESC"), text("id DESC"),
+        ),
+    )
+    
+    @classmethod
+    async def bulk_insert(
+        cls,
+        session: AsyncSession,
+        rows: List[dict],
+        chunk_size: int = 500,
+    ) -> List[PyUUID]:
+        """
+        Insert many transactions with one multi-row INSERT ... RETURNING per chunk.
+
+        Chunks keep each statement well under Postgres' bind-parameter limit.
+        Ids are generated server-side, so rows should not carry an ``id``.
+        """
+        ids: List[PyUUID] = []
+        for start in range(0, len(rows), chunk_size):
+            stmt = pg_insert(cls).values(rows[start:start + chunk_size]).returning(cls.id)
+            result = await session.execute(stmt)
+            ids.extend(row[0] for row in result)
+        return ids
+    
     def __repr__(self):
         return f"<Transaction(id={self.id}, amount={self.amount}, merchant={self.merchant_name})>"
@@ -1,28 +1,91 @@
-import json
+import asyncio
 import pickle
-from typing import Any, Optional, Union, List
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Union, List
+import msgpack
+import orjson
 import redis.asyncio as redis
+import zstandard as zstd
 from datetime import timedelta
 
 from app.config import settings
 
+# Level 1 keeps compression cheap on the request path while still shrinking
+# JSON-heavy prediction/analytics payloads several-fold.
+_CCTX = zstd.ZstdCompressor(level=1)
+_DCTX = zstd.ZstdDecompressor()
+# Every zstd frame starts with this magic number; JSON and text never do,
+# so get()/get_many() can tell packed values apart without extra metadata.
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+# Hash holding "<cache name>:lookups" / "<cache name>:misses" counters
+CACHE_STATS_KEY = "stats:cache"
+
+# Delete a lock only if it still holds our token (it may have expired and
+# been taken by another worker in the meantime).
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _encode(value: Any) -> Union[str, bytes]:
+    """Encode a value for Redis; strings/bytes pass through untouched."""
+    if isinstance(value, (str, bytes)):
+        return value
+    return orjson.dumps(value, default=str, option=_ORJSON_OPTIONS)
+
+
+def _pack(value: Any) -> bytes:
+    """msgpack-encode and zstd-compress a value."""
+    return _CCTX.compress(msgpack.packb(value, default=str, use_bin_type=True))
+
+
+def _decode(value: Optional[bytes]) -> Optional[Any]:
+    """Decode a raw Redis value: packed frames, JSON, or plain text."""
+    if value is None:
+        return None
+    if isinstance(value, bytes) and value[:4] == _ZSTD_MAGIC:
+        return msgpack.unpackb(_DCTX.decompress(value), raw=False)
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
 
 class RedisClient:
+    """
+    Process-wide Redis wrapper.
+
+    `connect()` is called once from the FastAPI lifespan; the methods below
+    assume the client exists instead of re-checking on every call.
+    """
+    
     def __init__(self):
         self.client: redis.Redis = None
+        self._connect_lock = asyncio.Lock()
     
     async def connect(self):
-        """Initialize Redis connection."""
-        self.client = redis.from_url(
-            settings.REDIS_URL,
-            password=settings.REDIS_PASSWORD,
-            decode_responses=True,
-        )
+        """Initialize Redis connection (idempotent, safe under concurrent callers)."""
+        async with self._connect_lock:
+            if self.client is not None:
+                return
+            self.client = redis.from_url(
+                settings.REDIS_URL,
+                password=settings.REDIS_PASSWORD,
+                decode_responses=False,
+                max_connections=settings.REDIS_POOL_MAX,
+            )
     
     async def disconnect(self):
         """Close Redis connection."""
         if self.client:
             await self.client.close()
+            self.client = None
     
     async def set(
         self, 
@@ -31,15 +94,11 @@ class RedisClient:
         expire: Optional[int] = None
     ) -> bool:
         """Set a value in Redis."""
-        if not self.client:
-            await self.connect()
-        
-        if isinstance(value, (dict, list)):
-            value = json.dumps(value)
-        elif not isinstance(value, str):
-            value = str(value)
-        
-        return await self.client.set(key, value, ex=expire)
+        return await self.client.set(key, _encode(value), ex=expire)
+
+    async def set_nx(self, key: str, value: Union[str, dict, Any], expire: Optional[int] = None) -> bool:
+        """Set a value only if the key does not exist yet; True if it was set."""
+        return bool(await self.client.set(key, _encode(value), ex=expire, nx=True))
 
     async def setex(
         self,
@@ -48,66 +107,222 @@ class RedisClient:
         value: Union[str, dict, Any],
     ) -> bool:
         """Set a value with TTL."""
-        if not self.client:
-            await self.connect()
-        
-        if isinstance(value, (dict, list)):
-            value = json.dumps(value)
-        elif not isinstance(value, str):
-            value = str(value)
-        
-        return await self.client.setex(key, seconds, value)
+        return await self.client.setex(key, seconds, _encode(value))
     
-    async def get(self, key: str) -> Optional[Any]:
-        """Get a value from Redis."""
-        if not self.client:
-            await self.connect()
+    async def get(self, key: str, track: Optional[str] = None) -> Optional[Any]:
+        """
+        Get a value from Redis.
+
+        When `track` names a cache, the lookup is counted under that name in
+        the `stats:cache` hash (see `get_cache_stats`).
+        """
+        if track is None:
+            return _decode(await self.client.get(key))
+        return (await self.get_many([key], track=[track]))[0]
+
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """Get a value exactly as stored (e.g. JSON bytes to send on unchanged)."""
+        return await self.client.get(key)
+
+    async def get_many(
+        self,
+        keys: List[str],
+        track: Optional[List[str]] = None,
+    ) -> List[Optional[Any]]:
+        """
+        Get several values with a single MGET; missing keys come back as None.
+
+        `track` optionally gives a cache name per key for hit/miss counting.
+        Lookups are counted in the same pipeline as the MGET, so only misses
+        (which go on to hit the database anyway) pay an extra round-trip.
+        """
+        if not keys:
+            return []
+        if track is None:
+            return [_decode(value) for value in await self.client.mget(keys)]
         
-        value = await self.client.get(key)
-        if value is None:
-            return None
+        pipe = self.client.pipeline(transaction=False)
+        pipe.mget(keys)
+        for name in track:
+            pipe.hincrby(CACHE_STATS_KEY, f"{name}:lookups", 1)
+        raw_values = (await pipe.execute())[0]
         
-        try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return value
+        values = [_decode(value) for value in raw_values]
+        missed = [name for name, value in zip(track, values) if value is None]
+        if missed:
+            pipe = self.client.pipeline(transaction=False)
+            for name in missed:
+                pipe.hincrby(CACHE_STATS_KEY, f"{name}:misses", 1)
+            await pipe.execute()
+        return values
+
+    async def get_cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit/miss counters per tracked cache name."""
+        raw = await self.client.hgetall(CACHE_STATS_KEY)
+        counters = {
+            (k.decode("utf-8") if isinstance(k, bytes) else k): int(v)
+            for k, v in raw.items()
+        }
+        stats = {}
+        for field, lookups in counters.items():
+            name, _, kind = field.rpartition(":")
+            if kind != "lookups":
+                continue
+            misses = counters.get(f"{name}:misses", 0)
+            stats[name] = {
+                "hits": lookups - misses,
+                "misses": misses,
+                "hit_ratio": (lookups - misses) / lookups if lookups else 0.0,
+            }
+        return stats
+
+    async def set_many(
+        self,
+        mapping: Dict[str, Any],
+        expire: Union[int, Dict[str, int], None] = None,
+        packed: bool = False,
+    ) -> bool:
+        """
+        Set several values in one pipelined round-trip.
+
+        `expire` is either one TTL for every key or a per-key mapping;
+        `packed` stores values like `set_packed` instead of as JSON.
+        """
+        if not mapping:
+            return True
+        encode = _pack if packed else _encode
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            ttl = expire.get(key) if isinstance(expire, dict) else expire
+            pipe.set(key, encode(value), ex=ttl)
+        return all(await pipe.execute())
+
+    async def set_packed(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
+        """Set a msgpack-encoded, zstd-compressed value (readable through `get` too)."""
+        return await self.client.set(key, _pack(value), ex=expire)
+
+    async def get_packed(self, key: str) -> Optional[Any]:
+        """Get a value stored with `set_packed`."""
+        raw = await self.client.get(key)
+        if raw is None:
+            return None
+        return msgpack.unpackb(_DCTX.decompress(raw), raw=False)
     
     async def delete(self, *keys: str) -> int:
         """Delete one or more keys from Redis."""
-        if not self.client:
-            await self.connect()
-        
         if not keys:
             return 0
         return await self.client.delete(*keys)
     
+    async def sadd(self, key: str, *members: str, expire: Optional[int] = None) -> int:
+        """Add members to a set, optionally (re)setting its TTL in the same round-trip."""
+        if not members:
+            return 0
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(key, *members)
+        if expire is not None:
+            pipe.expire(key, expire)
+        return (await pipe.execute())[0]
+
+    async def smembers(self, key: str) -> List[str]:
+        """Members of a set (empty if the set does not exist)."""
+        return [
+            member.decode("utf-8") if isinstance(member, bytes) else member
+            for member in await self.client.smembers(key)
+        ]
+    
     async def exists(self, key: str) -> bool:
         """Check if key exists in Redis."""
-        if not self.client:
-            await self.connect()
-        
         return await self.client.exists(key) > 0
 
+    async def scan_iter(self, pattern: str, count: int = 500) -> AsyncIterator[str]:
+        """Iterate keys matching a pattern with non-blocking SCAN cursors."""
+        async for key in self.client.scan_iter(match=pattern, count=count):
+            yield key.decode("utf-8") if isinstance(key, bytes) else key
+
     async def keys(self, pattern: str) -> List[str]:
-        """List keys matching a pattern."""
-        if not self.client:
-            await self.connect()
-        return await self.client.keys(pattern)
+        """List keys matching a pattern (via SCAN, never the blocking KEYS command)."""
+        return [key async for key in self.scan_iter(pattern)]
     
     async def expire(self, key: str, seconds: int) -> bool:
         """Set expiration for a key."""
-        if not self.client:
-            await self.connect()
-        
         return await self.client.expire(key, seconds)
     
     async def incr(self, key: str, amount: int = 1) -> int:
         """Increment a value."""
-        if not self.client:
-            await self.connect()
-        
         return await self.client.incrby(key, amount)
     
+    async def acquire_lock(self, name: str, ttl: int = 30) -> Optional[str]:
+        """Take `lock:<name>` with SET NX EX; returns the owner token, or None if held."""
+        token = uuid.uuid4().hex
+        acquired = await self.client.set(f"lock:{name}", token, nx=True, ex=ttl)
+        return token if acquired else None
+
+    async def release_lock(self, name: str, token: str) -> bool:
+        """Release `lock:<name>` if `token` still owns it."""
+        return bool(await self.client.eval(_RELEASE_LOCK_SCRIPT, 1, f"lock:{name}", token))
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int,
+        lock_ttl: int = 30,
+        poll_interval: float = 0.05,
+        poll_attempts: int = 40,
+        packed: bool = False,
+        track: Optional[str] = None,
+    ) -> Any:
+        """
+        Serve `key` from cache, letting only one caller rebuild it on a miss.
+
+        The caller that takes `lock:<key>` runs `compute` and stores the result
+        for `expire` seconds (like `set_packed` when `packed`, JSON otherwise).
+        Callers that lose the lock poll the cache and compute the value
+        themselves if the lock holder has not finished in time. `track` counts
+        the first lookup like `get`.
+        """
+        cached = await self.get(key, track=track)
+        if cached is not None:
+            return cached
+
+        token = await self.acquire_lock(key, lock_ttl)
+        if token is None:
+            for _ in range(poll_attempts):
+                await asyncio.sleep(poll_interval)
+                cached = await self.get(key)
+                if cached is not None:
+                    return cached
+
+        try:
+            value = await compute()
+            if packed:
+                await self.set_packed(key, value, expire=expire)
+            else:
+                await self.setex(key, expire, value)
+            return value
+        finally:
+            if token is not None:
+                await self.release_lock(key, token)
+
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message on a pub/sub channel."""
+        return await self.client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        """Yield messages published on a channel until cancelled."""
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                data = message["data"]
+                yield data.decode("utf-8") if isinstance(data, bytes) else data
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+    
     async def set_session(self, session_id: str, user_data: dict, expire_hours: int = 24):
         """Store user session."""
         expire_seconds = expire_hours * 3600
@@ -121,6 +336,24 @@ class RedisClient:
         """Delete user session."""
         return await self.delete(f"session:{session_id}")
     
+    async def delete_sessions(self, user_id: str, batch_size: int = 500) -> int:
+        """
+        Delete every session of a user: `session:<id>` plus any `session:<id>:*`.
+
+        Keys found by SCAN are removed with one multi-key DEL per batch, so the
+        purge costs one round-trip per batch rather than one per key.
+        """
+        batch = [f"session:{user_id}"]
+        deleted = 0
+        async for key in self.scan_iter(f"session:{user_id}:*", count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += await self.delete(*batch)
+                batch = []
+        if batch:
+            deleted += await self.delete(*batch)
+        return deleted
+    
     async def rate_limit_check(self, user_id: str, endpoint: str, limit: int = 100, window: int = 60) -> bool:
         """Check rate limit for user."""
         key = f"rate_limit:{user_id}:{endpoint}"
@@ -131,23 +364,39 @@ class RedisClient:
         
         return current <= limit
     
-    async def cache_prediction(self, transaction_hash: str, prediction_data: dict, expire_minutes: int = 5):
+    async def cache_prediction(self, transaction_hash: str, prediction_data: Any, expire_minutes: int = 5):
         """Cache model prediction."""
         expire_seconds = expire_minutes * 60
-        return await self.set(f"model_prediction:{transaction_hash}", prediction_data, expire_seconds)
+        return await self.set_packed(f"model_prediction:{transaction_hash}", prediction_data, expire_seconds)
     
-    async def get_cached_prediction(self, transaction_hash: str) -> Optional[dict]:
+    async def get_cached_prediction(self, transaction_hash: str) -> Optional[Any]:
         """Get cached model prediction."""
-        return await self.get(f"model_prediction:{transaction_hash}")
+        return await self.get_packed(f"model_prediction:{transaction_hash}")
+    
+    async def cache_predictions(self, predictions: Dict[str, Any], expire_minutes: int = 5):
+        """Cache several model predictions, keyed by transaction hash, in one round-trip."""
+        return await self.set_many(
+            {f"model_prediction:{transaction_hash}": data for transaction_hash, data in predictions.items()},
+            expire=expire_minutes * 60,
+            packed=True,
+        )
+    
+    async def get_cached_predictions(self, transaction_hashes: List[str]) -> List[Optional[Any]]:
+        """Get several cached model predictions with one MGET; misses come back as None."""
+        return await self.get_many([f"model_prediction:{transaction_hash}" for transaction_hash in transaction_hashes])
+    
+    async def delete_cached_predictions(self, transaction_hashes: List[str]) -> int:
+        """Delete cached model predictions."""
+        return await self.delete(*(f"model_prediction:{transaction_hash}" for transaction_hash in transaction_hashes))
     
     async def cache_analytics(self, date: str, metrics: dict, expire_minutes: int = 15):
         """Cache analytics data."""
         expire_seconds = expire_minutes * 60
-        return await self.set(f"analytics:dashboard:{date}", metrics, expire_seconds)
+        return await self.set_packed(f"analytics:dashboard:{date}", metrics, expire_seconds)
     
     async def get_cached_analytics(self, date: str) -> Optional[dict]:
         """Get cached analytics data."""
-        return await self.get(f"analytics:dashboard:{date}")
+        return await self.get_packed(f"analytics:dashboard:{date}")
 
 
 # Global Redis client instance
@@ -19,7 +19,7 @@ from app.schemas.prediction import (
     PredictionStatisticsResponse,
 )
 from app.schemas.analytics import (
-    DashboardMetrics, FraudTrend, FraudTrendsResponse, FraudPattern,
+    DashboardMetrics, DashboardOverview, FraudTrend, FraudTrendsResponse, FraudPattern,
     FraudPatternsResponse, GeographicFraudData, GeographicAnalysis,
     MerchantCategoryAnalysis, TimeSeriesData, TimeSeriesAnalysis,
     AnalyticsFilters, AlertSummary, ModelMetrics, PerformanceMetrics
@@ -47,7 +47,7 @@ __all__ = [
     "PredictionStatisticsResponse",
     
     # Analytics schemas
-    "DashboardMetrics", "FraudTrend", "FraudTrendsResponse", "FraudPattern",
+    "DashboardMetrics", "DashboardOverview", "FraudTrend", "FraudTrendsResponse", "FraudPattern",
     "FraudPatternsResponse", "GeographicFraudData", "GeographicAnalysis",
     "MerchantCategoryAnalysis", "TimeSeriesData", "TimeSeriesAnalysis",
     "AnalyticsFilters", "AlertSummary", "ModelMetrics", "PerformanceMetrics",
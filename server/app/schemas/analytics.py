@@ -6,10 +6,10 @@ from pydantic import BaseModel
 
 class DashboardMetrics(BaseModel):
     total_transactions: int
-    total_amount: Decimal
+    total_amount: float
     fraud_count: int
     fraud_rate: float
-    avg_transaction_amount: Decimal
+    avg_transaction_amount: float
     high_risk_alerts: int
     active_cards: int
     active_users: int
@@ -24,8 +24,8 @@ class FraudTrend(BaseModel):
     total_transactions: int
     fraud_transactions: int
     fraud_rate: float
-    total_amount: Decimal
-    fraud_amount: Decimal
+    total_amount: float
+    fraud_amount: float
 
 
 class FraudTrendsResponse(BaseModel):
@@ -56,7 +56,7 @@ class GeographicFraudData(BaseModel):
     transaction_count: int
     fraud_count: int
     fraud_rate: float
-    total_amount: Decimal
+    total_amount: float
     risk_score: float
 
 
@@ -72,10 +72,17 @@ class MerchantCategoryAnalysis(BaseModel):
     transaction_count: int
     fraud_count: int
     fraud_rate: float
-    avg_amount: Decimal
+    avg_amount: float
     risk_score: float
 
 
+class DashboardOverview(BaseModel):
+    dashboard: DashboardMetrics
+    trends: FraudTrendsResponse
+    geographic: GeographicAnalysis
+    merchant_categories: List[MerchantCategoryAnalysis]
+
+
 class TimeSeriesData(BaseModel):
     timestamp: datetime
     value: float
@@ -1,10 +1,18 @@
 from typing import Optional
 from datetime import date, datetime
 from pydantic import BaseModel, validator
+import re
 import uuid
 
 from app.models.card import CardType
 
+# Separators users commonly type inside card numbers
+_CARD_SEPARATORS = str.maketrans("", "", " -")
+_CARD_NUMBER_RE = re.compile(r"[0-9]{16}")
+_CVV_RE = re.compile(r"[0-9]{3}")
+# Luhn value of each digit when it sits in a doubled position
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
 
 class CardBase(BaseModel):
     card_number: str
@@ -19,21 +27,15 @@ class CardCreate(CardBase):
     @validator("card_number")
     def validate_card_number(cls, v):
         # Remove spaces and dashes
-        cleaned = v.replace(" ", "").replace("-", "")
+        cleaned = v.translate(_CARD_SEPARATORS)
         if len(cleaned) != 16:
             raise ValueError("Card number must be 16 digits")
-        if not cleaned.isdigit():
+        if not _CARD_NUMBER_RE.fullmatch(cleaned):
             raise ValueError("Card number must contain only digits")
         
-        # Luhn algorithm validation
-        total = 0
-        for i, digit in enumerate(reversed(cleaned)):
-            n = int(digit)
-            if i % 2 == 1:
-                n *= 2
-                if n > 9:
-                    n -= 9
-            total += n
+        # Luhn algorithm validation (16 digits: even indexes are doubled)
+        digits = [ord(c) - 48 for c in cleaned]
+        total = sum(_LUHN_DOUBLED[d] for d in digits[0::2]) + sum(digits[1::2])
         
         if total % 10 != 0:
             raise ValueError("Invalid card number (failed Luhn check)")
@@ -42,7 +44,7 @@ class CardCreate(CardBase):
     
     @validator("cvv")
     def validate_cvv(cls, v):
-        if len(v) != 3 or not v.isdigit():
+        if not _CVV_RE.fullmatch(v):
             raise ValueError("CVV must be 3 digits")
         return v
     
@@ -56,6 +56,7 @@ class PredictionHistory(BaseModel):
     limit: int
     offset: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class PredictionFeedbackRequest(BaseModel):
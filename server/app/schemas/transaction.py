@@ -89,6 +89,9 @@ class TransactionFilters(BaseModel):
     max_amount: Optional[Decimal] = None
     location: Optional[str] = None
     card_id: Optional[uuid.UUID] = None
+    # Keyset cursor: the (transaction_date, id) of the last row already seen
+    after_date: Optional[datetime] = None
+    after_id: Optional[uuid.UUID] = None
     
     class Config:
         use_enum_values = True
@@ -105,6 +108,7 @@ class TransactionListResponse(BaseModel):
     page: int
     size: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class BatchTransactionCreate(BaseModel):
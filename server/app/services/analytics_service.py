@@ -1,23 +1,285 @@
-from typing import Dict, List, Optional, Any
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
 from uuid import UUID
-from datetime import datetime, timedelta, date
-from decimal import Decimal
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, case
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, and_, case, Date, Float, text, true, bindparam
+from sqlalchemy.sql import table, column
 
+from app.database import AsyncSessionLocal
 from app.models.transaction import Transaction
 from app.models.prediction import Prediction
 from app.models.fraud_alert import FraudAlert, AlertLevel
 from app.models.card import Card
-from app.models.user import User
 from app.redis_client import redis_client
-import json
+
+
+# Per-user, per-day transaction rollup maintained by Postgres (see the
+# analytics_dashboard_daily migration and the startup schema guard). Not part
+# of Base.metadata on purpose.
+DASHBOARD_DAILY_VIEW = table(
+    "analytics_dashboard_daily",
+    column("user_id"),
+    column("day"),
+    column("total_transactions"),
+    column("fraud_count"),
+    column("total_amount"),
+    column("fraud_amount"),
+)
+
+
+def _build_daily_rollup():
+    # The view's rows grouped on the fly from the base tables, for databases
+    # where the materialized view does not exist (e.g. SQLite).
+    day = func.date(Transaction.transaction_date, type_=Date)
+    is_fraud = Transaction.is_fraud == True
+    return select(
+        Card.user_id.label('user_id'),
+        day.label('day'),
+        func.count(Transaction.id).label('total_transactions'),
+        func.sum(case((is_fraud, 1), else_=0)).label('fraud_count'),
+        func.sum(Transaction.amount).label('total_amount'),
+        func.sum(case((is_fraud, Transaction.amount), else_=0)).label('fraud_amount'),
+    ).join(
+        Card, Transaction.card_id == Card.id
+    ).group_by(Card.user_id, day).subquery('analytics_dashboard_daily')
+
+
+DASHBOARD_DAILY_ROLLUP = _build_daily_rollup()
+
+
+# Cache TTLs (seconds) by how quickly each block goes stale: the dashboard and
+# trends move with every new transaction, while location and merchant-category
+# breakdowns over a multi-day window barely shift within an hour.
+CACHE_TTLS = {
+    "dashboard": 300,
+    "trends": 600,
+    "geographic": 3600,
+    "merchant_categories": 3600,
+}
+
+# Single-flight settings for cache rebuilds: how long the rebuild lock lives
+# and how long other callers poll for the winner's result before computing
+# the block themselves.
+REBUILD_LOCK_TTL = 30
+REBUILD_POLL_INTERVAL = 0.05
+REBUILD_POLL_ATTEMPTS = 40
+
+
+# Analytics statements are built once at import time and only their bind
+# parameters (uid, start, start_day) change per call, so SQLAlchemy reuses the
+# compiled SQL from its statement cache instead of rebuilding the tree.
+def _build_dashboard_metrics_stmt(daily):
+    # Every dashboard aggregate is folded into one statement so the page
+    # costs a single round-trip: transaction totals come from the per-user
+    # daily rollup (`daily`: the materialized view or its base-table
+    # equivalent), alerts and cards are scalar subqueries and the prediction
+    # stats are cross-joined from their own CTE.
+    totals_cte = select(
+        func.sum(daily.c.total_transactions).label('total_transactions'),
+        func.sum(daily.c.total_amount).cast(Float).label('total_amount'),
+        func.sum(daily.c.fraud_count).label('fraud_count'),
+    ).where(
+        and_(
+            daily.c.user_id == bindparam('uid'),
+            daily.c.day >= bindparam('start_day')
+        )
+    ).cte('totals')
+    
+    # High risk alerts
+    alerts_count = select(func.count(FraudAlert.id)).join(
+        Transaction, FraudAlert.transaction_id == Transaction.id
+    ).join(
+        Card, Transaction.card_id == Card.id
+    ).where(
+        and_(
+            Card.user_id == bindparam('uid'),
+            FraudAlert.created_at >= bindparam('start'),
+            FraudAlert.alert_level.in_([AlertLevel.HIGH, AlertLevel.CRITICAL])
+        )
+    ).scalar_subquery()
+    
+    # Active cards
+    cards_count = select(func.count(Card.id)).where(
+        and_(Card.user_id == bindparam('uid'), Card.is_active == True)
+    ).scalar_subquery()
+    
+    # Model metrics (from predictions)
+    predictions_cte = select(
+        func.avg(Prediction.fraud_probability).label('avg_fraud_probability'),
+        func.avg(Prediction.processing_time_ms).label('avg_processing_time_ms'),
+        func.count(Prediction.id).label('total_predictions')
+    ).join(
+        Transaction, Prediction.transaction_id == Transaction.id
+    ).join(
+        Card, Transaction.card_id == Card.id
+    ).where(
+        and_(
+            Card.user_id == bindparam('uid'),
+            Prediction.created_at >= bindparam('start')
+        )
+    ).cte('prediction_stats')
+    
+    return select(
+        totals_cte.c.total_transactions,
+        totals_cte.c.total_amount,
+        totals_cte.c.fraud_count,
+        alerts_count.label('high_risk_alerts'),
+        cards_count.label('active_cards'),
+        predictions_cte.c.avg_fraud_probability,
+        predictions_cte.c.avg_processing_time_ms,
+        predictions_cte.c.total_predictions,
+    ).select_from(totals_cte.join(predictions_cte, true()))
+
+
+def _percentage(part, whole):
+    """SQL expression for part/whole as a percentage, 0 when whole is 0."""
+    return func.coalesce(part.cast(Float) * 100.0 / func.nullif(whole, 0), 0.0)
+
+
+def _build_fraud_trends_stmt(unit: str, daily):
+    # Trends roll the per-day buckets of the dashboard view (or its base-table
+    # equivalent) up to the requested period, so the scan is O(days) rather
+    # than O(transactions). Window sums over the grouped rows carry the
+    # summary totals on every row. Daily buckets group on the view's own day
+    # column, so the planner can walk the (user_id, day) unique index in
+    # order instead of hashing.
+    if unit == 'day':
+        period_date = daily.c.day
+    else:
+        period_date = func.date_trunc(unit, daily.c.day).cast(Date)
+    total_transactions = func.sum(daily.c.total_transactions)
+    fraud_transactions = func.sum(daily.c.fraud_count)
+    return select(
+        period_date.label('period_date'),
+        total_transactions.label('total_transactions'),
+        fraud_transactions.label('fraud_transactions'),
+        _percentage(fraud_transactions, total_transactions).label('fraud_rate'),
+        func.sum(daily.c.total_amount).cast(Float).label('total_amount'),
+        func.sum(daily.c.fraud_amount).cast(Float).label('fraud_amount'),
+        func.sum(total_transactions).over().label('grand_total_transactions'),
+        func.sum(fraud_transactions).over().label('grand_fraud_transactions')
+    ).where(
+        and_(
+            daily.c.user_id == bindparam('uid'),
+            daily.c.day >= bindparam('start_day')
+        )
+    ).group_by(period_date).order_by(period_date)
+
+
+def _user_transactions_select(*columns):
+    """Select over the user's transactions (via their cards) inside the date window."""
+    return select(*columns).join(
+        Card, Transaction.card_id == Card.id
+    ).where(
+        and_(
+            Card.user_id == bindparam('uid'),
+            Transaction.transaction_date >= bindparam('start')
+        )
+    )
+
+
+def _build_geographic_stmt():
+    transaction_count = func.count(Transaction.id)
+    fraud_count = func.sum(case((Transaction.is_fraud == True, 1), else_=0))
+    fraud_rate = _percentage(fraud_count, transaction_count)
+    return _user_transactions_select(
+        Transaction.location,
+        transaction_count.label('transaction_count'),
+        fraud_count.label('fraud_count'),
+        fraud_rate.label('fraud_rate'),
+        func.sum(Transaction.amount).cast(Float).label('total_amount'),
+        # Simple risk score based on fraud rate
+        func.least(100.0, fraud_rate * 2).label('risk_score')
+    ).where(
+        Transaction.location.isnot(None)
+    ).group_by(Transaction.location).order_by(transaction_count.desc())
+
+
+def _build_merchant_category_stmt():
+    transaction_count = func.count(Transaction.id)
+    fraud_count = func.sum(case((Transaction.is_fraud == True, 1), else_=0))
+    fraud_rate = _percentage(fraud_count, transaction_count)
+    return _user_transactions_select(
+        Transaction.merchant_category,
+        transaction_count.label('transaction_count'),
+        fraud_count.label('fraud_count'),
+        fraud_rate.label('fraud_rate'),
+        func.avg(Transaction.amount).cast(Float).label('avg_amount'),
+        # Risk score based on fraud rate and transaction volume
+        func.least(100.0, fraud_rate * 1.5 + transaction_count / 100.0).label('risk_score')
+    ).where(
+        Transaction.merchant_category.isnot(None)
+    ).group_by(Transaction.merchant_category).order_by(transaction_count.desc())
+
+
+DASHBOARD_METRICS_STMT = _build_dashboard_metrics_stmt(DASHBOARD_DAILY_VIEW)
+DASHBOARD_METRICS_FALLBACK_STMT = _build_dashboard_metrics_stmt(DASHBOARD_DAILY_ROLLUP)
+FRAUD_TRENDS_STMTS = {
+    "daily": _build_fraud_trends_stmt('day', DASHBOARD_DAILY_VIEW),
+    "weekly": _build_fraud_trends_stmt('week', DASHBOARD_DAILY_VIEW),
+    "monthly": _build_fraud_trends_stmt('month', DASHBOARD_DAILY_VIEW),
+}
+FRAUD_TRENDS_FALLBACK_STMTS = {
+    "daily": _build_fraud_trends_stmt('day', DASHBOARD_DAILY_ROLLUP),
+    "weekly": _build_fraud_trends_stmt('week', DASHBOARD_DAILY_ROLLUP),
+    "monthly": _build_fraud_trends_stmt('month', DASHBOARD_DAILY_ROLLUP),
+}
+GEOGRAPHIC_STMT = _build_geographic_stmt()
+MERCHANT_CATEGORY_STMT = _build_merchant_category_stmt()
 
 
 class AnalyticsService:
     """Business logic for analytics and dashboard metrics."""
     
+    # Sessions for blocks computed concurrently (see get_all_dashboard)
+    session_factory = AsyncSessionLocal
+    
+    # Set at startup once the schema guard has ensured the dashboard view;
+    # until then the rollups are grouped from the base tables.
+    use_daily_view = False
+    
+    async def _get_or_compute(
+        self,
+        cache_key: str,
+        block: str,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Serve a block from cache, letting only one caller rebuild it on a miss.
+        
+        Args:
+            cache_key: Redis key of the cached block
+            block: Block name used for the TTL table and hit/miss stats
+            compute: Coroutine factory that builds the block from the database
+            
+        Returns:
+            The cached or freshly computed block
+        """
+        return await redis_client.get_or_compute(
+            cache_key,
+            compute,
+            expire=CACHE_TTLS[block],
+            lock_ttl=REBUILD_LOCK_TTL,
+            poll_interval=REBUILD_POLL_INTERVAL,
+            poll_attempts=REBUILD_POLL_ATTEMPTS,
+            packed=True,
+            track=f"analytics:{block}",
+        )
+    
+    async def _compute_in_own_session(
+        self,
+        compute: Callable[[AsyncSession], Awaitable[Any]]
+    ) -> Any:
+        """Run a compute coroutine on a short-lived session of its own."""
+        async with self.session_factory() as session:
+            return await compute(session)
+    
+    async def refresh_dashboard_view(self, db: AsyncSession) -> None:
+        """Refresh the dashboard rollup without blocking concurrent readers."""
+        await db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY analytics_dashboard_daily"))
+        await db.commit()
+    
     async def get_dashboard_metrics(
         self,
         db: AsyncSession,
@@ -35,111 +297,65 @@ class AnalyticsService:
         Returns:
             Dictionary with dashboard metrics
         """
-        cache_key = f"dashboard_metrics:{user_id}:{days}"
-        cached = await redis_client.get(cache_key)
-        if cached:
-            return json.loads(cached) if isinstance(cached, str) else cached
-        
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Total transactions
-        total_query = select(func.count(Transaction.id)).join(
-            Card, Transaction.card_id == Card.id
-        ).where(and_(Card.user_id == user_id, Transaction.transaction_date >= start_date))
-        total_result = await db.execute(total_query)
-        total_transactions = total_result.scalar() or 0
-        
-        # Total amount
-        amount_query = select(func.sum(Transaction.amount)).join(
-            Card, Transaction.card_id == Card.id
-        ).where(and_(Card.user_id == user_id, Transaction.transaction_date >= start_date))
-        amount_result = await db.execute(amount_query)
-        total_amount = float(amount_result.scalar() or 0)
-        
-        # Fraud count
-        fraud_query = select(func.count(Transaction.id)).join(
-            Card, Transaction.card_id == Card.id
-        ).where(
-            and_(
-                Card.user_id == user_id,
-                Transaction.transaction_date >= start_date,
-                Transaction.is_fraud == True
-            )
-        )
-        fraud_result = await db.execute(fraud_query)
-        fraud_count = fraud_result.scalar() or 0
-        
-        # Average transaction amount
-        avg_query = select(func.avg(Transaction.amount)).join(
-            Card, Transaction.card_id == Card.id
-        ).where(and_(Card.user_id == user_id, Transaction.transaction_date >= start_date))
-        avg_result = await db.execute(avg_query)
-        avg_amount = float(avg_result.scalar() or 0)
-        
-        # High risk alerts
-        alerts_query = select(func.count(FraudAlert.id)).join(
-            Transaction, FraudAlert.transaction_id == Transaction.id
-        ).join(
-            Card, Transaction.card_id == Card.id
-        ).where(
-            and_(
-                Card.user_id == user_id,
-                FraudAlert.created_at >= start_date,
-                FraudAlert.alert_level.in_([AlertLevel.HIGH, AlertLevel.CRITICAL])
-            )
-        )
-        alerts_result = await db.execute(alerts_query)
-        high_risk_alerts = alerts_result.scalar() or 0
-        
-        # Active cards
-        cards_query = select(func.count(Card.id)).where(
-            and_(Card.user_id == user_id, Card.is_active == True)
+        return await self._get_or_compute(
+            f"dashboard_metrics:{user_id}:{days}",
+            "dashboard",
+            lambda: self._compute_dashboard_metrics(db, user_id, days)
         )
-        cards_result = await db.execute(cards_query)
-        active_cards = cards_result.scalar() or 0
-        
-        # Model metrics (from predictions)
-        predictions_query = select(
-            func.avg(Prediction.fraud_probability),
-            func.avg(Prediction.processing_time_ms),
-            func.count(Prediction.id)
-        ).join(
-            Transaction, Prediction.transaction_id == Transaction.id
-        ).join(
-            Card, Transaction.card_id == Card.id
-        ).where(
-            and_(
-                Card.user_id == user_id,
-                Prediction.created_at >= start_date
-            )
+    
+    async def _compute_dashboard_metrics(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        days: int
+    ) -> Dict[str, Any]:
+        """Compute dashboard metrics straight from the database."""
+        now = datetime.utcnow()
+        start_date = now - timedelta(days=days)
+        
+        stmt = DASHBOARD_METRICS_STMT if self.use_daily_view else DASHBOARD_METRICS_FALLBACK_STMT
+        result = await db.execute(
+            stmt,
+            {"uid": user_id, "start": start_date, "start_day": start_date.date()}
         )
-        pred_result = await db.execute(predictions_query)
-        pred_row = pred_result.first()
-        avg_fraud_prob = float(pred_row[0] or 0) if pred_row else 0.0
-        avg_pred_time = float(pred_row[1] or 0) if pred_row else 0.0
-        total_predictions = pred_row[2] or 0
+        (
+            total_transactions,
+            total_amount,
+            fraud_count,
+            high_risk_alerts,
+            active_cards,
+            avg_fraud_prob,
+            avg_pred_time,
+            total_predictions,
+        ) = result.one()
+        total_transactions = int(total_transactions or 0)
+        total_amount = float(total_amount or 0)
+        fraud_count = int(fraud_count or 0)
+        avg_amount = total_amount / total_transactions if total_transactions > 0 else 0.0
+        high_risk_alerts = high_risk_alerts or 0
+        active_cards = active_cards or 0
+        avg_fraud_prob = float(avg_fraud_prob or 0)
+        avg_pred_time = float(avg_pred_time or 0)
+        total_predictions = total_predictions or 0
         
         # Model accuracy (simplified - would need feedback data)
         model_accuracy = 0.95  # Placeholder - would calculate from feedback
         
         metrics = {
             "total_transactions": total_transactions,
-            "total_amount": Decimal(str(total_amount)),
+            "total_amount": total_amount,
             "fraud_count": fraud_count,
             "fraud_rate": (fraud_count / total_transactions * 100) if total_transactions > 0 else 0.0,
-            "avg_transaction_amount": Decimal(str(avg_amount)),
+            "avg_transaction_amount": avg_amount,
             "high_risk_alerts": high_risk_alerts,
             "active_cards": active_cards,
             "active_users": 1,  # Per-user dashboard
             "model_accuracy": model_accuracy,
             "avg_prediction_time_ms": avg_pred_time,
             "date_range_start": start_date.date(),
-            "date_range_end": datetime.utcnow().date()
+            "date_range_end": now.date()
         }
         
-        # Cache for 5 minutes
-        await redis_client.set(cache_key, json.dumps(metrics, default=str), expire=300)
-        
         return metrics
     
     async def get_fraud_trends(
@@ -152,6 +368,9 @@ class AnalyticsService:
         """
         Get fraud trends over time.
         
+        Counts come from the analytics_dashboard_daily view when it exists,
+        so they trail new transactions until its next refresh.
+        
         Args:
             db: Database session
             user_id: User ID
@@ -161,70 +380,48 @@ class AnalyticsService:
         Returns:
             Dictionary with trend data
         """
-        cache_key = f"fraud_trends:{user_id}:{days}:{period}"
-        cached = await redis_client.get(cache_key)
-        if cached:
-            return json.loads(cached) if isinstance(cached, str) else cached
-        
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Build date truncation based on period
-        if period == "daily":
-            date_trunc = func.date_trunc('day', Transaction.transaction_date)
-        elif period == "weekly":
-            date_trunc = func.date_trunc('week', Transaction.transaction_date)
-        elif period == "monthly":
-            date_trunc = func.date_trunc('month', Transaction.transaction_date)
-        else:
-            date_trunc = func.date_trunc('day', Transaction.transaction_date)
-        
-        # Query transactions grouped by period
-        trends_query = select(
-            date_trunc.label('period_date'),
-            func.count(Transaction.id).label('total_transactions'),
-            func.sum(case((Transaction.is_fraud == True, 1), else_=0)).label('fraud_transactions'),
-            func.sum(Transaction.amount).label('total_amount'),
-            func.sum(case((Transaction.is_fraud == True, Transaction.amount), else_=0)).label('fraud_amount')
-        ).join(
-            Card, Transaction.card_id == Card.id
-        ).where(
-            and_(
-                Card.user_id == user_id,
-                Transaction.transaction_date >= start_date
-            )
-        ).group_by(date_trunc).order_by(date_trunc)
+        return await self._get_or_compute(
+            f"fraud_trends:{user_id}:{days}:{period}",
+            "trends",
+            lambda: self._compute_fraud_trends(db, user_id, days, period)
+        )
+    
+    async def _compute_fraud_trends(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        days: int,
+        period: str
+    ) -> Dict[str, Any]:
+        """Compute fraud trends straight from the database."""
+        now = datetime.utcnow()
+        start_date = now - timedelta(days=days)
         
-        result = await db.execute(trends_query)
-        rows = result.all()
+        stmts = FRAUD_TRENDS_STMTS if self.use_daily_view else FRAUD_TRENDS_FALLBACK_STMTS
+        trends_query = stmts.get(period, stmts["daily"])
+        result = await db.execute(trends_query, {"uid": user_id, "start_day": start_date.date()})
         
         trends = []
-        for row in rows:
-            period_date = row.period_date.date() if hasattr(row.period_date, 'date') else row.period_date
-            if isinstance(period_date, str):
-                period_date = datetime.fromisoformat(period_date).date()
-            total_tx = row.total_transactions or 0
-            fraud_tx = int(row.fraud_transactions or 0)
-            total_amt = Decimal(str(row.total_amount or 0))
-            fraud_amt = Decimal(str(row.fraud_amount or 0))
-            
+        total_all = fraud_all = 0
+        for row in result:
+            # sum() over the view's bigint counts comes back as numeric
             trends.append({
-                "date": period_date,
-                "total_transactions": total_tx,
-                "fraud_transactions": fraud_tx,
-                "fraud_rate": (fraud_tx / total_tx * 100) if total_tx > 0 else 0.0,
-                "total_amount": total_amt,
-                "fraud_amount": fraud_amt
+                "date": row.period_date,
+                "total_transactions": int(row.total_transactions),
+                "fraud_transactions": int(row.fraud_transactions),
+                "fraud_rate": row.fraud_rate,
+                "total_amount": row.total_amount,
+                "fraud_amount": row.fraud_amount
             })
-        
-        # Summary statistics
-        total_all = sum(t["total_transactions"] for t in trends)
-        fraud_all = sum(t["fraud_transactions"] for t in trends)
+            # Summary statistics (window totals repeated on every row)
+            total_all = int(row.grand_total_transactions)
+            fraud_all = int(row.grand_fraud_transactions)
         
         response = {
             "trends": trends,
             "period": period,
             "start_date": start_date.date(),
-            "end_date": datetime.utcnow().date(),
+            "end_date": now.date(),
             "summary": {
                 "total_transactions": total_all,
                 "total_fraud": fraud_all,
@@ -232,9 +429,6 @@ class AnalyticsService:
             }
         }
         
-        # Cache for 10 minutes
-        await redis_client.set(cache_key, json.dumps(response, default=str), expire=600)
-        
         return response
     
     async def get_geographic_analysis(
@@ -244,66 +438,45 @@ class AnalyticsService:
         days: int = 30
     ) -> Dict[str, Any]:
         """Get fraud analysis by geographic location."""
-        cache_key = f"geo_analysis:{user_id}:{days}"
-        cached = await redis_client.get(cache_key)
-        if cached:
-            return json.loads(cached) if isinstance(cached, str) else cached
-        
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        geo_query = select(
-            Transaction.location,
-            func.count(Transaction.id).label('transaction_count'),
-            func.sum(case((Transaction.is_fraud == True, 1), else_=0)).label('fraud_count'),
-            func.sum(Transaction.amount).label('total_amount')
-        ).join(
-            Card, Transaction.card_id == Card.id
-        ).where(
-            and_(
-                Card.user_id == user_id,
-                Transaction.transaction_date >= start_date,
-                Transaction.location.isnot(None)
-            )
-        ).group_by(Transaction.location).order_by(func.count(Transaction.id).desc())
-        
-        result = await db.execute(geo_query)
-        rows = result.all()
-        
-        data = []
-        high_risk_locations = []
-        
-        for row in rows:
-            location = row.location or "Unknown"
-            tx_count = row.transaction_count or 0
-            fraud_count = int(row.fraud_count or 0)
-            total_amt = Decimal(str(row.total_amount or 0))
-            fraud_rate = (fraud_count / tx_count * 100) if tx_count > 0 else 0.0
-            
-            # Simple risk score based on fraud rate
-            risk_score = min(100.0, fraud_rate * 2)
-            
-            data.append({
-                "location": location,
-                "transaction_count": tx_count,
-                "fraud_count": fraud_count,
-                "fraud_rate": fraud_rate,
-                "total_amount": total_amt,
-                "risk_score": risk_score
-            })
-            
-            if fraud_rate > 10.0:  # High risk threshold
-                high_risk_locations.append(location)
+        return await self._get_or_compute(
+            f"geo_analysis:{user_id}:{days}",
+            "geographic",
+            lambda: self._compute_geographic_analysis(db, user_id, days)
+        )
+    
+    async def _compute_geographic_analysis(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        days: int
+    ) -> Dict[str, Any]:
+        """Compute geographic fraud analysis straight from the database."""
+        now = datetime.utcnow()
+        start_date = now - timedelta(days=days)
+        
+        result = await db.execute(GEOGRAPHIC_STMT, {"uid": user_id, "start": start_date})
+        
+        data = [
+            {
+                "location": row.location,
+                "transaction_count": row.transaction_count,
+                "fraud_count": row.fraud_count,
+                "fraud_rate": row.fraud_rate,
+                "total_amount": row.total_amount,
+                "risk_score": row.risk_score
+            }
+            for row in result
+        ]
+        # High risk threshold
+        high_risk_locations = [item["location"] for item in data if item["fraud_rate"] > 10.0]
         
         response = {
             "data": data,
             "total_locations": len(data),
             "high_risk_locations": high_risk_locations,
-            "analysis_date": datetime.utcnow().isoformat()
+            "analysis_date": now.isoformat()
         }
         
-        # Cache for 15 minutes
-        await redis_client.set(cache_key, json.dumps(response, default=str), expire=900)
-        
         return response
     
     async def get_merchant_category_analysis(
@@ -313,55 +486,100 @@ class AnalyticsService:
         days: int = 30
     ) -> List[Dict[str, Any]]:
         """Get fraud analysis by merchant category."""
-        cache_key = f"merchant_analysis:{user_id}:{days}"
-        cached = await redis_client.get(cache_key)
-        if cached:
-            return json.loads(cached) if isinstance(cached, str) else cached
-        
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        category_query = select(
-            Transaction.merchant_category,
-            func.count(Transaction.id).label('transaction_count'),
-            func.sum(case((Transaction.is_fraud == True, 1), else_=0)).label('fraud_count'),
-            func.avg(Transaction.amount).label('avg_amount')
-        ).join(
-            Card, Transaction.card_id == Card.id
-        ).where(
-            and_(
-                Card.user_id == user_id,
-                Transaction.transaction_date >= start_date,
-                Transaction.merchant_category.isnot(None)
-            )
-        ).group_by(Transaction.merchant_category).order_by(func.count(Transaction.id).desc())
+        return await self._get_or_compute(
+            f"merchant_analysis:{user_id}:{days}",
+            "merchant_categories",
+            lambda: self._compute_merchant_category_analysis(db, user_id, days)
+        )
+    
+    async def _compute_merchant_category_analysis(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        days: int
+    ) -> List[Dict[str, Any]]:
+        """Compute merchant category analysis straight from the database."""
+        now = datetime.utcnow()
+        start_date = now - timedelta(days=days)
+        
+        result = await db.execute(MERCHANT_CATEGORY_STMT, {"uid": user_id, "start": start_date})
+        
+        analysis = [
+            {
+                "category": row.merchant_category,
+                "transaction_count": row.transaction_count,
+                "fraud_count": row.fraud_count,
+                "fraud_rate": row.fraud_rate,
+                "avg_amount": row.avg_amount,
+                "risk_score": row.risk_score
+            }
+            for row in result
+        ]
         
-        result = await db.execute(category_query)
-        rows = result.all()
+        return analysis
+    
+    async def get_all_dashboard(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        days: int = 30,
+        period: str = "daily"
+    ) -> Dict[str, Any]:
+        """
+        Get every dashboard analytics block with one Redis read and one write.
         
-        analysis = []
-        for row in rows:
-            category = row.merchant_category or "Unknown"
-            tx_count = row.transaction_count or 0
-            fraud_count = int(row.fraud_count or 0)
-            avg_amt = Decimal(str(row.avg_amount or 0))
-            fraud_rate = (fraud_count / tx_count * 100) if tx_count > 0 else 0.0
-            
-            # Risk score based on fraud rate and transaction volume
-            risk_score = min(100.0, fraud_rate * 1.5 + (tx_count / 100))
+        Args:
+            db: Database session
+            user_id: User ID
+            days: Number of days to look back
+            period: Aggregation period for the fraud trends
             
-            analysis.append({
-                "category": category,
-                "transaction_count": tx_count,
-                "fraud_count": fraud_count,
-                "fraud_rate": fraud_rate,
-                "avg_amount": avg_amt,
-                "risk_score": risk_score
-            })
+        Returns:
+            Dictionary with dashboard, trends, geographic and merchant_categories
+        """
+        # (response field, cache key, compute coroutine factory taking a session)
+        blocks = [
+            ("dashboard", f"dashboard_metrics:{user_id}:{days}",
+             lambda session: self._compute_dashboard_metrics(session, user_id, days)),
+            ("trends", f"fraud_trends:{user_id}:{days}:{period}",
+             lambda session: self._compute_fraud_trends(session, user_id, days, period)),
+            ("geographic", f"geo_analysis:{user_id}:{days}",
+             lambda session: self._compute_geographic_analysis(session, user_id, days)),
+            ("merchant_categories", f"merchant_analysis:{user_id}:{days}",
+             lambda session: self._compute_merchant_category_analysis(session, user_id, days)),
+        ]
+        
+        cached_values = await redis_client.get_many(
+            [key for _, key, _ in blocks],
+            track=[f"analytics:{field}" for field, _, _ in blocks]
+        )
         
-        # Cache for 15 minutes
-        await redis_client.set(cache_key, json.dumps(analysis, default=str), expire=900)
+        response = {}
+        misses = []
+        for (field, key, compute), cached in zip(blocks, cached_values):
+            if cached is not None:
+                response[field] = cached
+            else:
+                misses.append((field, key, compute))
+        
+        if len(misses) == 1:
+            field, _, compute = misses[0]
+            response[field] = await compute(db)
+        elif misses:
+            # One session can only run one statement at a time, so each miss
+            # gets its own pooled session and the queries run concurrently
+            results = await asyncio.gather(
+                *(self._compute_in_own_session(compute) for _, _, compute in misses)
+            )
+            for (field, _, _), value in zip(misses, results):
+                response[field] = value
         
-        return analysis
+        to_cache = {key: response[field] for field, key, _ in misses}
+        expires = {key: CACHE_TTLS[field] for field, key, _ in misses}
+        if to_cache:
+            await redis_client.set_many(to_cache, expire=expires, packed=True)
+        
+        return response
 
 
 # Global analytics service instance
@@ -1,13 +1,18 @@
+import asyncio
+import logging
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
+from cachetools import TTLCache
+from sqlalchemy import or_, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException, status
-from sqlalchemy.exc import IntegrityError
 
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserChangePassword
 from app.core.security import (
-    get_password_hash, verify_password, create_access_token, 
+    get_password_hash_async, verify_password_async, create_access_token, 
     create_refresh_token, verify_token, generate_password_reset_token,
     verify_password_reset_token, create_email_verification_token,
     verify_email_verification_token
@@ -15,69 +20,92 @@ from app.core.security import (
 from app.redis_client import redis_client
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Per-process cache for the user lookup done on every authenticated request.
+# Entries are detached, read-only User rows; every mutation below drops the
+# entry locally and broadcasts the id so other workers drop theirs too.
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+USER_INVALIDATION_CHANNEL = "user:invalidate"
+_pending_publishes: set = set()
+
+
+def invalidate_cached_user(user_id: Any) -> None:
+    """Drop a cached user here and ask the other workers to do the same."""
+    user_id = str(user_id)
+    _user_cache.pop(user_id, None)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(redis_client.publish(USER_INVALIDATION_CHANNEL, user_id))
+    _pending_publishes.add(task)
+    task.add_done_callback(_pending_publishes.discard)
+
+
+async def listen_for_user_invalidations() -> None:
+    """Evict users invalidated by other workers (runs for the app lifetime)."""
+    while True:
+        try:
+            async for user_id in redis_client.subscribe(USER_INVALIDATION_CHANNEL):
+                _user_cache.pop(user_id, None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"User invalidation listener failed: {e}")
+            # Without the feed, cached users may be stale on this worker
+            _user_cache.clear()
+            await asyncio.sleep(1)
+
 
 class AuthService:
     """Authentication service."""
     
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> User:
+    async def create_user(db: Session, user_data: UserCreate) -> User:
         """Create a new user."""
-        # Check if user already exists
-        existing_user = db.query(User).filter(
-            (User.email == user_data.email) | (User.username == user_data.username)
-        ).first()
-        
-        if existing_user:
-            if existing_user.email == user_data.email:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Email already registered"
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Username already taken"
-                )
-        
         # Hash password
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         
-        # Create user
-        db_user = User(
+        # Insert and let the unique email/username constraints reject
+        # duplicates atomically instead of pre-checking with a SELECT
+        stmt = pg_insert(User).values(
             email=user_data.email,
             username=user_data.username,
             hashed_password=hashed_password,
             full_name=user_data.full_name,
             is_active=user_data.is_active,
             is_verified=False  # Require email verification
-        )
+        ).on_conflict_do_nothing().returning(User)
+        db_user = db.scalars(stmt).first()
         
-        try:
-            db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
-            return db_user
-        except IntegrityError:
+        if db_user is None:
+            email_taken = db.query(User.id).filter(User.email == user_data.email).first() is not None
             db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Error creating user"
+                detail="Email already registered" if email_taken else "Username already taken"
             )
+        
+        db.commit()
+        return db_user
     
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
         """Authenticate user with email and password."""
+        # Full row on purpose: a successful login serializes the whole user,
+        # so a column projection here would only add a second query.
         user = db.query(User).filter(User.email == email).first()
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             return None
         return user
     
     @staticmethod
     async def login_user(db: Session, email: str, password: str) -> Dict[str, Any]:
         """Login user and return tokens."""
-        user = AuthService.authenticate_user(db, email, password)
+        user = await AuthService.authenticate_user(db, email, password)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -90,9 +118,19 @@ class AuthService:
                 detail="Inactive user"
             )
         
-        # Update last login
-        user.last_login = datetime.utcnow()
+        # Update last login in one UPDATE ... RETURNING, and detach the user
+        # first so the commit does not expire it and force a reload SELECT.
+        last_login = db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(last_login=func.now())
+            .returning(User.last_login)
+            .execution_options(synchronize_session=False)
+        ).scalar_one()
+        db.expunge(user)
         db.commit()
+        set_committed_value(user, "last_login", last_login)
+        invalidate_cached_user(user.id)
         
         # Create tokens
         access_token = create_access_token(subject=str(user.id))
@@ -158,18 +196,26 @@ class AuthService:
                 detail="User not found"
             )
         
-        # Check for conflicts
-        if user_data.email and user_data.email != user.email:
-            existing = db.query(User).filter(User.email == user_data.email).first()
-            if existing:
+        # Check for conflicts (email and username in one lookup)
+        email_changed = bool(user_data.email) and user_data.email != user.email
+        username_changed = bool(user_data.username) and user_data.username != user.username
+        
+        if email_changed or username_changed:
+            conflict_filters = []
+            if email_changed:
+                conflict_filters.append(User.email == user_data.email)
+            if username_changed:
+                conflict_filters.append(User.username == user_data.username)
+            
+            conflicts = db.query(User.id, User.email, User.username).filter(
+                or_(*conflict_filters), User.id != user.id
+            ).all()
+            if email_changed and any(c.email == user_data.email for c in conflicts):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Email already registered"
                 )
-        
-        if user_data.username and user_data.username != user.username:
-            existing = db.query(User).filter(User.username == user_data.username).first()
-            if existing:
+            if conflicts:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Username already taken"
@@ -182,11 +228,12 @@ class AuthService:
         
         user.updated_at = datetime.utcnow()
         db.commit()
+        invalidate_cached_user(user_id)
         db.refresh(user)
         return user
     
     @staticmethod
-    def change_password(db: Session, user_id: str, password_data: UserChangePassword) -> bool:
+    async def change_password(db: Session, user_id: str, password_data: UserChangePassword) -> bool:
         """Change user password."""
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
@@ -196,18 +243,20 @@ class AuthService:
             )
         
         # Verify current password
-        if not verify_password(password_data.current_password, user.hashed_password):
+        if not await verify_password_async(password_data.current_password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Incorrect current password"
             )
         
         # Update password
-        user.hashed_password = get_password_hash(password_data.new_password)
+        user.hashed_password = await get_password_hash_async(password_data.new_password)
         user.updated_at = datetime.utcnow()
         db.commit()
+        invalidate_cached_user(user_id)
         
         # Invalidate all sessions (force re-login)
+        await redis_client.delete_sessions(str(user_id))
         return True
     
     @staticmethod
@@ -216,7 +265,7 @@ class AuthService:
         return generate_password_reset_token(email)
     
     @staticmethod
-    def reset_password(db: Session, token: str, new_password: str) -> bool:
+    async def reset_password(db: Session, token: str, new_password: str) -> bool:
         """Reset password using token."""
         email = verify_password_reset_token(token)
         if not email:
@@ -232,10 +281,14 @@ class AuthService:
                 detail="User not found"
             )
         
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = await get_password_hash_async(new_password)
         user.updated_at = datetime.utcnow()
+        user_id = user.id
         db.commit()
+        invalidate_cached_user(user_id)
         
+        # Invalidate all sessions (force re-login)
+        await redis_client.delete_sessions(str(user_id))
         return True
     
     @staticmethod
@@ -262,27 +315,42 @@ class AuthService:
         
         user.is_verified = True
         user.updated_at = datetime.utcnow()
+        user_id = user.id
         db.commit()
+        invalidate_cached_user(user_id)
         
         return True
     
     @staticmethod
     def get_user_by_id(db: Session, user_id: str) -> Optional[User]:
-        """Get user by ID."""
-        return db.query(User).filter(User.id == user_id).first()
+        """Get user by ID (cached briefly; the returned row is detached and read-only)."""
+        user = _user_cache.get(str(user_id))
+        if user is not None:
+            return user
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            # Detach so later commits in this session cannot expire the cached copy
+            db.expunge(user)
+            _user_cache[str(user_id)] = user
+        return user
     
     @staticmethod
     def get_user_by_email(db: Session, email: str) -> Optional[User]:
         """Get user by email."""
         return db.query(User).filter(User.email == email).first()
     
+    @staticmethod
+    def email_exists(db: Session, email: str) -> bool:
+        """Check whether an email is registered without loading the user row."""
+        return db.query(User.id).filter(User.email == email).first() is not None
+    
     @staticmethod
     def get_user_by_username(db: Session, username: str) -> Optional[User]:
         """Get user by username."""
         return db.query(User).filter(User.username == username).first()
     
     @staticmethod
-    def deactivate_user(db: Session, user_id: str) -> bool:
+    async def deactivate_user(db: Session, user_id: str) -> bool:
         """Deactivate user account."""
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
@@ -294,6 +362,8 @@ class AuthService:
         user.is_active = False
         user.updated_at = datetime.utcnow()
         db.commit()
+        invalidate_cached_user(user_id)
         
         # Remove all sessions
+        await redis_client.delete_sessions(str(user_id))
         return True
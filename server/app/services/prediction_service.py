@@ -1,16 +1,46 @@
+import asyncio
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, insert, update, and_, case, func, tuple_, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import contains_eager
 
+from app.config import settings
 from app.models.transaction import Transaction
 from app.models.prediction import Prediction, PredictionFeedback
 from app.models.fraud_alert import FraudAlert, AlertLevel
 from app.models.card import Card
-from app.models.user import User
 from app.ml.inference import prediction_engine, PredictionResult, RiskLevel
 
+# Risk levels that raise a FraudAlert
+_HIGH_RISK = frozenset((RiskLevel.HIGH, RiskLevel.CRITICAL))
+
+# Lookup statements are built once with bind parameters so each call only
+# binds values and reuses the cached compilation. The authorization join
+# already reads the card row, so it also populates Transaction.card and later
+# access doesn't lazy-load it.
+TRANSACTION_WITH_AUTH_STMT = select(Transaction).join(
+    Card, Transaction.card_id == Card.id
+).options(
+    contains_eager(Transaction.card)
+).where(
+    and_(Transaction.id == bindparam('tid'), Card.user_id == bindparam('uid'))
+)
+TRANSACTIONS_WITH_AUTH_STMT = select(Transaction).join(
+    Card, Transaction.card_id == Card.id
+).options(
+    contains_eager(Transaction.card)
+).where(
+    and_(Transaction.id.in_(bindparam('tids', expanding=True)), Card.user_id == bindparam('uid'))
+)
+PREDICTION_BY_TRANSACTION_STMT = select(Prediction).where(
+    Prediction.transaction_id == bindparam('tid')
+)
+
 
 class PredictionService:
     """Business logic for fraud predictions and database integration."""
@@ -33,43 +63,63 @@ class PredictionService:
             user_id: User ID making the request
             
         Returns:
-            Tuple of (PredictionResult, Prediction record, optional FraudAlert)
+            Tuple of (PredictionResult, Prediction record, optional FraudAlert).
+            On a cache hit the record is a transient Prediction carrying only
+            id and transaction_id, since a cached result's prediction_id is
+            the id of its persisted row.
         """
         # 1. Fetch transaction from database with authorization
         transaction = await self._get_transaction_with_auth(db, transaction_id, user_id)
         if not transaction:
             raise ValueError("Transaction not found or access denied")
         
-        # 2. Check Redis cache (5 min TTL)
+        # 2. Check Redis cache (5 min TTL); a hit needs no further database work
         cached_result = await self.engine._check_cache(str(transaction_id))
         if cached_result:
-            # Load existing prediction from database
-            existing_prediction = await self._get_prediction_by_transaction(db, transaction_id)
-            if existing_prediction:
-                return cached_result, existing_prediction, None
+            existing_prediction = Prediction(
+                id=uuid.UUID(cached_result.prediction_id),
+                transaction_id=transaction_id,
+            )
+            return cached_result, existing_prediction, None
         
         # 3. Run ML model prediction
         transaction_data = self._transaction_to_dict(transaction)
-        prediction_result = await self.engine.predict_single(transaction_data)
-        
-        # 4. Save Prediction record
-        prediction_record = await self._save_prediction(db, transaction_id, prediction_result)
-        
-        # 5. Update Transaction.is_fraud & fraud_score
-        await self._update_transaction_fraud_flags(db, transaction_id, prediction_result)
-        
-        # 6. Create FraudAlert if high/critical risk
-        fraud_alert = None
-        if prediction_result.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]:
-            fraud_alert = await self._create_fraud_alert(
-                db, transaction, prediction_result, user_id
+        prediction_result = await self.engine.predict_single(transaction_data, use_cache=False)
+        
+        cache_task = None
+        try:
+            # 4. Save Prediction record; a re-predicted transaction keeps its
+            # row's id, which the result now carries
+            prediction_record = await self._save_prediction(
+                db, transaction_id, user_id, prediction_result
             )
+            
+            # 5. Cache result under the persisted id; the Redis write runs
+            # alongside the remaining database work and is awaited after commit
+            cache_task = asyncio.create_task(
+                self.engine._cache_result(str(transaction_id), prediction_result)
+            )
+            
+            # 6. Update Transaction.is_fraud & fraud_score
+            await self._update_transaction_fraud_flags(db, transaction_id, prediction_result)
+            
+            # 7. Create FraudAlert if high/critical risk
+            fraud_alert = None
+            if prediction_result.risk_level in _HIGH_RISK:
+                fraud_alert = await self._create_fraud_alert(
+                    db, transaction, prediction_result, user_id
+                )
+            
+            # Commit all changes
+            await db.commit()
+        except Exception:
+            # Cache hits are trusted to have a row, so don't leave one behind
+            if cache_task is not None:
+                await cache_task
+                await self.engine._evict_cache([str(transaction_id)])
+            raise
         
-        # 7. Cache result
-        await self.engine._cache_result(str(transaction_id), prediction_result)
-        
-        # Commit all changes
-        await db.commit()
+        await cache_task
         
         return prediction_result, prediction_record, fraud_alert
     
@@ -81,7 +131,8 @@ class PredictionService:
         offset: int = 0,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        risk_level: Optional[str] = None
+        risk_level: Optional[str] = None,
+        cursor: Optional[Tuple[datetime, uuid.UUID]] = None
     ) -> Tuple[List[Prediction], int]:
         """
         Get prediction history for a user with filtering.
@@ -90,22 +141,17 @@ class PredictionService:
             db: Database session
             user_id: User ID
             limit: Number of records to return
-            offset: Offset for pagination
+            offset: Offset for pagination (ignored when a cursor is given)
             start_date: Filter start date
             end_date: Filter end date
             risk_level: Filter by risk level
+            cursor: (created_at, id) of the last prediction on the previous page
             
         Returns:
             Tuple of (predictions list, total count)
         """
-        # Build base query with authorization (explicit join paths to avoid ambiguity)
-        base_query = (
-            select(Prediction)
-            .join(Transaction, Prediction.transaction_id == Transaction.id)
-            .join(Card, Transaction.card_id == Card.id)
-            .join(User, Card.user_id == User.id)
-            .where(User.id == user_id)
-        )
+        # Predictions carry their owner's user_id, so authorization needs no joins
+        base_query = select(Prediction).where(Prediction.user_id == user_id)
         
         # Apply filters
         if start_date:
@@ -120,13 +166,33 @@ class PredictionService:
         count_result = await db.execute(count_query)
         total_count = count_result.scalar() or 0
         
-        # Get paginated results
-        query = base_query.order_by(Prediction.created_at.desc()).offset(offset).limit(limit)
+        # Get paginated results; a cursor continues below the previous page on
+        # the (user_id, created_at, id) index instead of sorting past an offset
+        query = base_query.order_by(Prediction.created_at.desc(), Prediction.id.desc())
+        if cursor:
+            query = query.where(tuple_(Prediction.created_at, Prediction.id) < tuple_(*cursor))
+        else:
+            query = query.offset(offset)
+        query = query.limit(limit)
         result = await db.execute(query)
         predictions = result.scalars().all()
         
         return list(predictions), total_count
     
+    async def get_prediction(
+        self,
+        db: AsyncSession,
+        prediction_id: uuid.UUID,
+        user_id: uuid.UUID
+    ) -> Optional[Prediction]:
+        """Get one of the user's predictions, or None if it is not theirs or does not exist."""
+        result = await db.execute(
+            select(Prediction).where(
+                and_(Prediction.id == prediction_id, Prediction.user_id == user_id)
+            )
+        )
+        return result.scalar_one_or_none()
+    
     async def update_prediction_feedback(
         self,
         db: AsyncSession,
@@ -148,31 +214,35 @@ class PredictionService:
         Returns:
             Updated prediction record or None if not found
         """
-        # Get prediction with authorization
-        query = select(Prediction).join(Transaction).join(Card).join(User).where(
-            and_(Prediction.id == prediction_id, User.id == user_id)
-        )
-        result = await db.execute(query)
-        prediction = result.scalar_one_or_none()
-        
-        if not prediction:
-            return None
-        
         # Update feedback
+        values = {}
         if is_correct_fraud is not None:
-            prediction.feedback = (
+            values["feedback"] = (
                 PredictionFeedback.CORRECT
                 if is_correct_fraud
                 else PredictionFeedback.INCORRECT
             )
         if feedback_notes is not None:
-            prediction.feedback_notes = feedback_notes
-        if is_correct_fraud is not None or feedback_notes is not None:
-            prediction.reviewed_by = user_id
-            prediction.reviewed_at = datetime.utcnow()
+            values["feedback_notes"] = feedback_notes
+        
+        # Authorize on the prediction's own user_id; with something to write, the
+        # UPDATE ... RETURNING both applies the change and hands back the row
+        if values:
+            query = (
+                update(Prediction)
+                .where(and_(Prediction.id == prediction_id, Prediction.user_id == user_id))
+                .values(**values, reviewed_by=user_id, reviewed_at=func.now())
+                .returning(Prediction)
+            )
+        else:
+            query = select(Prediction).where(
+                and_(Prediction.id == prediction_id, Prediction.user_id == user_id)
+            )
+        result = await db.execute(query, execution_options={"populate_existing": True})
+        prediction = result.scalar_one_or_none()
         
-        await db.commit()
-        await db.refresh(prediction)
+        if values:
+            await db.commit()
         
         return prediction
     
@@ -191,50 +261,84 @@ class PredictionService:
             user_id: User ID for authorization
             
         Returns:
-            List of prediction results tuples
+            List of prediction results tuples, one per distinct authorized
+            transaction, in request order
         """
-        results = []
+        # De-duplicate while keeping request order
+        unique_ids = list(dict.fromkeys(transaction_ids))
+        if not unique_ids:
+            return []
         
-        # Process in batches to avoid overwhelming the system
-        batch_size = 50
-        for i in range(0, len(transaction_ids), batch_size):
-            batch_ids = transaction_ids[i:i + batch_size]
-            
-            # Get transactions with authorization
-            transactions = await self._get_transactions_with_auth(db, batch_ids, user_id)
-            
-            # Prepare transaction data for batch prediction
-            transactions_data = [self._transaction_to_dict(t) for t in transactions]
-            prediction_results = await self.engine.predict_batch(transactions_data)
-            
-            # Process each prediction result
-            for j, (transaction, pred_result) in enumerate(zip(transactions, prediction_results)):
-                try:
-                    # Save prediction record
-                    prediction_record = await self._save_prediction(db, transaction.id, pred_result)
-                    
-                    # Update transaction
-                    await self._update_transaction_fraud_flags(db, transaction.id, pred_result)
-                    
-                    # Create alert if needed
-                    fraud_alert = None
-                    if pred_result.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]:
-                        fraud_alert = await self._create_fraud_alert(
-                            db, transaction, pred_result, user_id
-                        )
-                    
-                    # Cache result
-                    await self.engine._cache_result(str(transaction.id), pred_result)
-                    
-                    results.append((pred_result, prediction_record, fraud_alert, transaction.id))
-                    
-                except Exception as e:
-                    # Log error but continue processing other transactions
-                    print(f"Error processing prediction for transaction {transaction.id}: {e}")
-                    results.append((pred_result, None, None, transaction.id))
+        results = []
+        predicted_ids: List[str] = []
+        
+        # Get transactions with authorization
+        found = {t.id: t for t in await self._get_transactions_with_auth(db, unique_ids, user_id)}
+        transactions = [found[tid] for tid in unique_ids if tid in found]
+        
+        # Write in database-sized batches; the engine splits each one further
+        # into model-sized batches (PREDICT_ML_BATCH)
+        batch_size = settings.PREDICT_DB_BATCH
+        batches = [transactions[i:i + batch_size] for i in range(0, len(transactions), batch_size)]
+        
+        def start_inference(batch: List[Transaction]) -> asyncio.Task:
+            # Prepare transaction data for batch prediction; the engine serves
+            # cache hits and caches fresh results itself, one round-trip each
+            transactions_columns = self._transactions_to_columns(batch)
+            predicted_ids.extend(transactions_columns["id"])
+            return asyncio.create_task(self.engine.predict_batch(transactions_columns))
+        
+        # Inference for the next batch runs (in Redis and the model thread) while
+        # the current batch is written; the session itself is only used serially
+        pending = start_inference(batches[0]) if batches else None
+        try:
+            for k, batch in enumerate(batches):
+                prediction_results = await pending
+                pending = start_inference(batches[k + 1]) if k + 1 < len(batches) else None
+                
+                # Write the whole batch with one statement per table
+                cached_ids = [pred_result.prediction_id for pred_result in prediction_results]
+                prediction_records = await self._save_predictions(
+                    db, [t.id for t in batch], user_id, prediction_results
+                )
+                # The engine cached fresh results before they were saved; re-cache
+                # those that now point at a re-predicted transaction's existing row
+                repointed = {
+                    str(transaction.id): pred_result
+                    for transaction, pred_result, cached_id in zip(batch, prediction_results, cached_ids)
+                    if pred_result.prediction_id != cached_id
+                }
+                if repointed:
+                    await self.engine._cache_results(repointed)
+                await self._update_transactions_fraud_flags(db, batch, prediction_results)
+                
+                # Create alerts where needed
+                high_risk = [
+                    (transaction, pred_result)
+                    for transaction, pred_result in zip(batch, prediction_results)
+                    if pred_result.risk_level in _HIGH_RISK
+                ]
+                fraud_alerts = await self._create_fraud_alerts(
+                    db,
+                    [transaction for transaction, _ in high_risk],
+                    [pred_result for _, pred_result in high_risk],
+                )
+                
+                for transaction, pred_result in zip(batch, prediction_results):
+                    results.append((
+                        pred_result,
+                        prediction_records.get(transaction.id),
+                        fraud_alerts.get(transaction.id),
+                        transaction.id,
+                    ))
             
-            # Commit batch
             await db.commit()
+        except Exception:
+            if pending is not None:
+                pending.cancel()
+            # Cache hits are trusted to have a row, so drop what this call cached
+            await self.engine._evict_cache(predicted_ids)
+            raise
         
         return results
     
@@ -255,32 +359,39 @@ class PredictionService:
         Returns:
             Dictionary with statistics
         """
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Get predictions for the period
-        query = select(Prediction).join(Transaction).join(Card).join(User).where(
-            and_(
-                User.id == user_id,
-                Prediction.created_at >= start_date
+        now = datetime.utcnow()
+        start_date = now - timedelta(days=days)
+        
+        # Aggregate per risk level in the database; the handful of groups is
+        # all that crosses the wire, and the totals are summed from them
+        risk_level = func.coalesce(Prediction.risk_level, "unknown")
+        query = (
+            select(
+                risk_level.label("risk_level"),
+                func.count(Prediction.id).label("total"),
+                func.count(Prediction.id).filter(Prediction.prediction_class.is_(True)).label("fraud"),
+                func.coalesce(func.sum(Prediction.confidence_score), 0.0).label("confidence_sum"),
+            )
+            .where(
+                and_(
+                    Prediction.user_id == user_id,
+                    Prediction.created_at >= start_date
+                )
             )
+            .group_by(risk_level)
         )
         result = await db.execute(query)
-        predictions = result.scalars().all()
+        rows = result.all()
         
         # Calculate statistics
-        total_predictions = len(predictions)
-        fraud_predictions = sum(1 for p in predictions if p.prediction_class is True)
-        high_risk_predictions = sum(1 for p in predictions if p.risk_level in ['high', 'critical'])
-        
-        # Risk level breakdown
-        risk_counts = {}
-        for p in predictions:
-            key = p.risk_level or "unknown"
-            risk_counts[key] = risk_counts.get(key, 0) + 1
+        risk_counts = {row.risk_level: row.total for row in rows}
+        total_predictions = sum(risk_counts.values())
+        fraud_predictions = sum(row.fraud for row in rows)
+        high_risk_predictions = risk_counts.get('high', 0) + risk_counts.get('critical', 0)
         
         # Average confidence
         avg_confidence = (
-            sum(p.confidence_score or 0 for p in predictions) / total_predictions
+            sum(row.confidence_sum for row in rows) / total_predictions
             if total_predictions > 0
             else 0
         )
@@ -295,7 +406,7 @@ class PredictionService:
             "risk_level_breakdown": risk_counts,
             "average_confidence": avg_confidence,
             "start_date": start_date,
-            "end_date": datetime.utcnow()
+            "end_date": now
         }
     
     # Private helper methods
@@ -307,10 +418,9 @@ class PredictionService:
         user_id: uuid.UUID
     ) -> Optional[Transaction]:
         """Get transaction with authorization check."""
-        query = select(Transaction).join(Card).join(User).where(
-            and_(Transaction.id == transaction_id, User.id == user_id)
+        result = await db.execute(
+            TRANSACTION_WITH_AUTH_STMT, {"tid": transaction_id, "uid": user_id}
         )
-        result = await db.execute(query)
         return result.scalar_one_or_none()
     
     async def _get_transactions_with_auth(
@@ -320,26 +430,58 @@ class PredictionService:
         user_id: uuid.UUID
     ) -> List[Transaction]:
         """Get multiple transactions with authorization check."""
-        query = select(Transaction).join(Card).join(User).where(
-            and_(Transaction.id.in_(transaction_ids), User.id == user_id)
+        result = await db.execute(
+            TRANSACTIONS_WITH_AUTH_STMT, {"tids": list(transaction_ids), "uid": user_id}
         )
-        result = await db.execute(query)
         return list(result.scalars().all())
     
     def _transaction_to_dict(self, transaction: Transaction) -> Dict:
         """Convert transaction to dictionary for ML model."""
-        txn_type = getattr(transaction.transaction_type, "value", None)
+        transaction_type = transaction.transaction_type
+        transaction_date = transaction.transaction_date or datetime.utcnow()
+        ip_address = transaction.ip_address
         return {
-            "id": str(getattr(transaction, "id", "")),
-            "card_id": str(getattr(transaction, "card_id", "")),
-            "amount": float(getattr(transaction, "amount", 0.0) or 0.0),
-            "merchant_name": getattr(transaction, "merchant_name", None) or "Unknown",
-            "merchant_category": getattr(transaction, "merchant_category", None) or "unknown",
-            "transaction_date": (getattr(transaction, "transaction_date", None) or datetime.utcnow()).isoformat(),
-            "transaction_type": txn_type or (getattr(transaction, "transaction_type", None) or "unknown"),
-            "location": getattr(transaction, "location", None) or "unknown",
-            "ip_address": str(getattr(transaction, "ip_address", None)) if getattr(transaction, "ip_address", None) else None,
-            "device_info": getattr(transaction, "device_info", None),
+            "id": str(transaction.id),
+            "card_id": str(transaction.card_id),
+            "amount": float(transaction.amount or 0.0),
+            "merchant_name": transaction.merchant_name or "Unknown",
+            "merchant_category": transaction.merchant_category or "unknown",
+            "transaction_date": transaction_date.isoformat(),
+            "transaction_type": getattr(transaction_type, "value", transaction_type) or "unknown",
+            "location": transaction.location or "unknown",
+            "ip_address": str(ip_address) if ip_address else None,
+            "device_info": transaction.device_info,
+        }
+    
+    def _transactions_to_columns(self, transactions: List[Transaction]) -> Dict[str, np.ndarray]:
+        """Convert transactions to column arrays for batch ML inference."""
+        n = len(transactions)
+        now = datetime.utcnow()
+        
+        def objects(values) -> np.ndarray:
+            # Assign into a preallocated array so values such as JSON dicts stay
+            # one element per row rather than being unpacked into extra dimensions
+            column = np.empty(n, dtype=object)
+            column[:] = list(values)
+            return column
+        
+        return {
+            "id": objects(str(t.id) for t in transactions),
+            "card_id": objects(str(t.card_id) for t in transactions),
+            "amount": np.fromiter((float(t.amount or 0.0) for t in transactions), dtype=np.float32, count=n),
+            "merchant_name": objects(t.merchant_name for t in transactions),
+            "merchant_category": objects(t.merchant_category for t in transactions),
+            # Wall-clock time as stored; datetime64 carries no timezone
+            "transaction_date": np.array(
+                [(t.transaction_date or now).replace(tzinfo=None) for t in transactions],
+                dtype="datetime64[us]",
+            ),
+            "transaction_type": objects(
+                getattr(t.transaction_type, "value", t.transaction_type) for t in transactions
+            ),
+            "location": objects(t.location for t in transactions),
+            "ip_address": objects(str(t.ip_address) if t.ip_address else None for t in transactions),
+            "device_info": objects(t.device_info for t in transactions),
         }
     
     async def _get_prediction_by_transaction(
@@ -348,34 +490,91 @@ class PredictionService:
         transaction_id: uuid.UUID
     ) -> Optional[Prediction]:
         """Get existing prediction by transaction ID."""
-        query = select(Prediction).where(Prediction.transaction_id == transaction_id)
-        result = await db.execute(query)
+        result = await db.execute(PREDICTION_BY_TRANSACTION_STMT, {"tid": transaction_id})
         return result.scalar_one_or_none()
     
+    def _prediction_values(
+        self,
+        transaction_id: uuid.UUID,
+        user_id: uuid.UUID,
+        prediction_result: PredictionResult
+    ) -> Dict:
+        """Column values for a prediction row."""
+        return {
+            # The row shares the result's id so cached results can name their row
+            "id": uuid.UUID(prediction_result.prediction_id),
+            "transaction_id": transaction_id,
+            "user_id": user_id,
+            "model_version": prediction_result.model_version,
+            "fraud_probability": prediction_result.fraud_probability,
+            "prediction_class": prediction_result.is_fraud,
+            "confidence_score": prediction_result.confidence_score,
+            "risk_level": prediction_result.risk_level.value,
+            "processing_time_ms": int(prediction_result.processing_time_ms),
+            "feature_importance": prediction_result.feature_importance,
+        }
+    
     async def _save_prediction(
         self,
         db: AsyncSession,
         transaction_id: uuid.UUID,
+        user_id: uuid.UUID,
         prediction_result: PredictionResult
     ) -> Prediction:
         """Save prediction record to database."""
-        prediction = Prediction(
-            id=uuid.uuid4(),
-            transaction_id=transaction_id,
-            model_version=prediction_result.model_version,
-            fraud_probability=prediction_result.fraud_probability,
-            prediction_class=prediction_result.is_fraud,
-            confidence_score=prediction_result.confidence_score,
-            risk_level=prediction_result.risk_level.value,
-            processing_time_ms=int(prediction_result.processing_time_ms),
-            feature_importance=prediction_result.feature_importance,
-        )
-        
-        db.add(prediction)
-        await db.flush()
-        await db.refresh(prediction)
+        records = await self._save_predictions(db, [transaction_id], user_id, [prediction_result])
+        return records[transaction_id]
+    
+    async def _save_predictions(
+        self,
+        db: AsyncSession,
+        transaction_ids: List[uuid.UUID],
+        user_id: uuid.UUID,
+        prediction_results: List[PredictionResult]
+    ) -> Dict[uuid.UUID, Prediction]:
+        """
+        Save prediction records in one INSERT ... RETURNING, keyed by transaction ID.
         
-        return prediction
+        Each result's prediction_id is updated to the id of the row it was
+        saved to. Results that already name their stored row (cache hits) are
+        not rewritten and have no entry in the returned dict.
+        """
+        values = [
+            self._prediction_values(transaction_id, user_id, pred_result)
+            for transaction_id, pred_result in zip(transaction_ids, prediction_results)
+        ]
+        stmt = pg_insert(Prediction).values(values)
+        # Re-predicting a transaction replaces its previous prediction in place
+        # instead of failing on the unique transaction_id constraint: the row
+        # keeps its primary key, and the review state and created_at start over
+        # with the new model output.
+        replaced = {
+            column: stmt.excluded[column]
+            for column in (
+                "model_version", "fraud_probability", "prediction_class",
+                "confidence_score", "risk_level", "processing_time_ms",
+                "feature_importance",
+            )
+        }
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Prediction.transaction_id],
+            set_={
+                **replaced,
+                "feedback": PredictionFeedback.UNKNOWN,
+                "feedback_notes": None,
+                "reviewed_by": None,
+                "reviewed_at": None,
+                "created_at": func.now(),
+            },
+            where=Prediction.id != stmt.excluded.id,
+        ).returning(Prediction)
+        result = await db.execute(stmt, execution_options={"populate_existing": True})
+        records = {prediction.transaction_id: prediction for prediction in result.scalars().all()}
+        for transaction_id, pred_result in zip(transaction_ids, prediction_results):
+            record = records.get(transaction_id)
+            if record is not None:
+                pred_result.prediction_id = str(record.id)
+        return records
     
     async def _update_transaction_fraud_flags(
         self,
@@ -384,45 +583,95 @@ class PredictionService:
         prediction_result: PredictionResult
     ):
         """Update transaction with fraud prediction results."""
-        query = select(Transaction).where(Transaction.id == transaction_id)
-        result = await db.execute(query)
-        transaction = result.scalar_one_or_none()
-        
-        if transaction:
-            transaction.is_fraud = prediction_result.is_fraud
-            transaction.fraud_score = prediction_result.fraud_probability
-            transaction.updated_at = datetime.utcnow()
+        stmt = (
+            update(Transaction)
+            .where(Transaction.id == transaction_id)
+            .values(
+                is_fraud=prediction_result.is_fraud,
+                fraud_score=prediction_result.fraud_probability,
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(stmt)
     
-    async def _create_fraud_alert(
+    async def _update_transactions_fraud_flags(
         self,
         db: AsyncSession,
+        transactions: List[Transaction],
+        prediction_results: List[PredictionResult]
+    ):
+        """Update a batch of transactions with their fraud prediction results in one statement."""
+        fraud_flags = {}
+        fraud_scores = {}
+        for transaction, pred_result in zip(transactions, prediction_results):
+            fraud_flags[transaction.id] = pred_result.is_fraud
+            fraud_scores[transaction.id] = pred_result.fraud_probability
+        
+        stmt = (
+            update(Transaction)
+            .where(Transaction.id.in_(list(fraud_flags)))
+            .values(
+                is_fraud=case(fraud_flags, value=Transaction.id),
+                fraud_score=case(fraud_scores, value=Transaction.id),
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(stmt)
+    
+    def _alert_values(
+        self,
         transaction: Transaction,
-        prediction_result: PredictionResult,
-        user_id: uuid.UUID
-    ) -> FraudAlert:
-        """Create fraud alert for high-risk transactions."""
+        prediction_result: PredictionResult
+    ) -> Dict:
+        """Column values for a fraud alert row."""
         severity = (
             AlertLevel.CRITICAL
             if prediction_result.risk_level == RiskLevel.CRITICAL
             else AlertLevel.HIGH
         )
-        
-        alert = FraudAlert(
-            id=uuid.uuid4(),
-            transaction_id=transaction.id,
-            alert_level=severity,
-            alert_message=(
-                f"Transaction of ${transaction.amount} at {transaction.merchant_name} "
-                f"flagged as {prediction_result.risk_level.value} risk "
-                f"(score: {prediction_result.fraud_probability:.2%})"
-            ),
-        )
-        
-        db.add(alert)
-        await db.flush()
-        await db.refresh(alert)
-        
-        return alert
+        return {
+            "id": uuid.uuid4(),
+            "transaction_id": transaction.id,
+            "alert_level": severity,
+            # Formatted lazily by FraudAlert.message
+            "alert_context": {
+                "amount": float(transaction.amount),
+                "merchant": transaction.merchant_name,
+                "risk": prediction_result.risk_level.value,
+                "score": prediction_result.fraud_probability,
+            },
+        }
+    
+    async def _create_fraud_alert(
+        self,
+        db: AsyncSession,
+        transaction: Transaction,
+        prediction_result: PredictionResult,
+        user_id: uuid.UUID
+    ) -> FraudAlert:
+        """Create fraud alert for high-risk transactions."""
+        alerts = await self._create_fraud_alerts(db, [transaction], [prediction_result])
+        return alerts[transaction.id]
+    
+    async def _create_fraud_alerts(
+        self,
+        db: AsyncSession,
+        transactions: List[Transaction],
+        prediction_results: List[PredictionResult]
+    ) -> Dict[uuid.UUID, FraudAlert]:
+        """Create fraud alerts in one INSERT ... RETURNING, keyed by transaction ID."""
+        values = [
+            self._alert_values(transaction, pred_result)
+            for transaction, pred_result in zip(transactions, prediction_results)
+        ]
+        if not values:
+            return {}
+        
+        stmt = insert(FraudAlert).values(values).returning(FraudAlert)
+        result = await db.execute(stmt)
+        return {alert.transaction_id: alert for alert in result.scalars().all()}
 
 
 # Global prediction service instance
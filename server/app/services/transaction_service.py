@@ -1,28 +1,167 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+import csv
+import io
+import hashlib
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-import random
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_, or_, desc, func, select
+from sqlalchemy import and_, or_, desc, func, select, insert, update, bindparam, tuple_
 from fastapi import HTTPException, status
+import numpy as np
+import orjson
 import pandas as pd
+from redis.exceptions import RedisError
+from cachetools import TTLCache
 
+from app.database import AsyncSessionLocal
 from app.models.transaction import Transaction, TransactionType
 from app.models.card import Card, CardType
 from app.schemas.transaction import (
+    BatchTransactionCreate,
     TransactionCreate,
     TransactionUpdate,
     TransactionFilters,
-    TransactionResponse,
 )
 from app.redis_client import redis_client
-import json
+from app.utils.pagination import encode_cursor
+
+
+# Single-flight rebuilds: lock TTL and how long other callers wait for the result
+CACHE_LOCK_TTL = 10
+CACHE_POLL_INTERVAL = 0.05
+CACHE_POLL_ATTEMPTS = 10
+
+# Seconds within which the same card/amount/merchant is treated as a duplicate
+DUPLICATE_WINDOW = 60
+
+# Transaction types, built once rather than per seeded/imported row
+_TX_TYPES = tuple(TransactionType)
+_TX_TYPE_VALUES = frozenset(t.value for t in _TX_TYPES)
+_DEFAULT_TX_TYPE = _TX_TYPES[0]
+
+# Device OS reported on seeded demo transactions
+DEMO_DEVICE_OS = ("iOS", "Android", "Windows")
+
+# Export columns, in select order, and rows fetched per streamed partition
+EXPORT_COLUMNS = [
+    "Transaction ID", "Date", "Amount", "Merchant", "Category",
+    "Type", "Location", "Fraud", "Fraud Score",
+]
+EXPORT_PARTITION_SIZE = 1000
+
+# Card owner/blocked flag checked on every create and read. Redis holds it for
+# CARD_META_TTL seconds; each worker keeps a short-lived copy on top so hot
+# cards skip Redis too. The API never changes a card's owner or blocked flag,
+# so a card blocked outside it is picked up once both copies expire.
+CARD_META_TTL = 300
+CARD_META_L1_TTL = 30
+_card_meta_cache: TTLCache = TTLCache(maxsize=10_000, ttl=CARD_META_L1_TTL)
+
+
+def _cache_index_key(user_id: UUID) -> str:
+    """Redis set listing a user's cached transaction pages."""
+    return f"user_cache_index:{user_id}"
+
+
+# Filter clauses with their values left as bound parameters, so every request
+# with the same set of filters produces an identical statement and SQLAlchemy's
+# compiled-statement cache hits.
+_FILTER_CLAUSES = {
+    "start_date": Transaction.transaction_date >= bindparam("start_date"),
+    "end_date": Transaction.transaction_date <= bindparam("end_date"),
+    "min_amount": Transaction.amount >= bindparam("min_amount"),
+    "max_amount": Transaction.amount <= bindparam("max_amount"),
+    "is_fraud": Transaction.is_fraud == bindparam("is_fraud"),
+    "merchant_category": Transaction.merchant_category == bindparam("merchant_category"),
+    "card_id": Transaction.card_id == bindparam("card_id"),
+}
+
+
+@lru_cache(maxsize=None)
+def _filter_clauses(shape: Tuple[str, ...]) -> tuple:
+    """WHERE clauses for one combination ("shape") of set filters."""
+    return (Card.user_id == bindparam("user_id"), *(_FILTER_CLAUSES[name] for name in shape))
+
+
+def _build_filters(user_id: UUID, filters: TransactionFilters) -> Tuple[tuple, Dict[str, Any]]:
+    """WHERE clauses for the list/export queries plus the parameters to execute them with."""
+    params = {"user_id": user_id}
+    for name in _FILTER_CLAUSES:
+        value = getattr(filters, name, None)
+        # is_fraud=False is a real filter; the others are skipped when empty
+        is_set = value is not None if name == "is_fraud" else bool(value)
+        if is_set:
+            params[name] = value
+    shape = tuple(name for name in _FILTER_CLAUSES if name in params)
+    return _filter_clauses(shape), params
+
+
+# Rows strictly after the keyset cursor in (transaction_date, id) DESC order
+_AFTER_CURSOR = tuple_(Transaction.transaction_date, Transaction.id) < tuple_(
+    bindparam("after_date"), bindparam("after_id")
+)
+
+
+def _filters_digest(filters: TransactionFilters) -> str:
+    """Digest of the set filters that is stable across processes (unlike hash())."""
+    filter_repr = orjson.dumps(
+        filters.model_dump(mode="json", exclude_none=True), option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.blake2b(filter_repr, digest_size=12).hexdigest()
+
+
+def _transactions_cache_key(user_id: UUID, filters: TransactionFilters, skip: int, limit: int) -> str:
+    """Cache key of one transaction page; the digest is the same in every worker."""
+    return f"transactions_v3:{user_id}:{skip}:{limit}:{_filters_digest(filters)}"
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _transaction_payload(t: Transaction) -> Dict[str, Any]:
+    """
+    JSON-ready dict with the same fields as ``TransactionResponse.model_dump(mode="json")``.
+
+    Rows come from our own database, so they are converted directly instead of
+    being re-validated through pydantic.
+    """
+    return {
+        "amount": str(t.amount),
+        "merchant_name": t.merchant_name,
+        "merchant_category": t.merchant_category,
+        "transaction_type": getattr(t.transaction_type, "value", t.transaction_type),
+        "location": t.location,
+        "ip_address": str(t.ip_address) if t.ip_address is not None else None,
+        "device_info": t.device_info,
+        "id": str(t.id),
+        "card_id": str(t.card_id),
+        "transaction_date": _isoformat(t.transaction_date),
+        "is_fraud": t.is_fraud,
+        "fraud_score": t.fraud_score,
+        "created_at": _isoformat(t.created_at),
+        "updated_at": _isoformat(t.updated_at),
+    }
+
+
+def _export_frame(rows: List[tuple]) -> pd.DataFrame:
+    """DataFrame for export_transactions from streamed (EXPORT_COLUMNS-ordered) rows."""
+    df = pd.DataFrame.from_records(rows, columns=EXPORT_COLUMNS)
+    df["Transaction ID"] = df["Transaction ID"].astype(str)
+    df["Type"] = df["Type"].map(lambda t: getattr(t, "value", t))
+    df["Fraud"] = df["Fraud"].map({True: "Yes"}).fillna("No")
+    return df
 
 
 class TransactionService:
     """Business logic for transaction operations"""
     
+    # Sessions for queries run alongside self.db (see _load_transactions)
+    session_factory = AsyncSessionLocal
+    
     def __init__(self, db: AsyncSession):
         self.db = db
     
@@ -33,52 +172,113 @@ class TransactionService:
     ) -> Transaction:
         """Create a new transaction and trigger fraud detection"""
         
-        # Verify card ownership
-        card_stmt = select(Card).where(
-            Card.id == transaction_data.card_id,
-            Card.user_id == user_id,
-        )
-        card_result = await self.db.execute(card_stmt)
-        card = card_result.scalar_one_or_none()
+        # Verify card ownership (served from cache for recently used cards)
+        card = await self._card_meta(transaction_data.card_id)
         
-        if not card:
+        if card["user_id"] != str(user_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Card not found or unauthorized"
             )
         
-        if card.is_blocked:
+        if card["is_blocked"]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Card is blocked"
             )
         
         # Check for duplicate transactions (within 1 minute)
-        duplicate_stmt = select(Transaction).where(
-            Transaction.card_id == transaction_data.card_id,
-            Transaction.amount == transaction_data.amount,
-            Transaction.merchant_name == transaction_data.merchant_name,
-            Transaction.created_at > datetime.utcnow() - timedelta(minutes=1),
-        )
-        duplicate_result = await self.db.execute(duplicate_stmt.limit(1))
-        duplicate = duplicate_result.scalar_one_or_none()
+        fingerprint_key = await self._claim_transaction_fingerprint(transaction_data)
+        
+        # Create transaction; RETURNING brings back the server defaults without a refresh
+        try:
+            stmt = insert(Transaction).values(**transaction_data.dict()).returning(Transaction)
+            transaction = (await self.db.execute(stmt)).scalar_one()
+            await self.db.commit()
+        except Exception:
+            # Let a retry of the failed create through the duplicate check
+            if fingerprint_key is not None:
+                await redis_client.delete(fingerprint_key)
+            raise
+        
+        # Invalidate cache
+        await self._invalidate_transaction_cache(user_id)
+        
+        return transaction
+    
+    async def _claim_transaction_fingerprint(self, transaction_data: TransactionCreate) -> Optional[str]:
+        """
+        Reject a transaction repeated on the same card within DUPLICATE_WINDOW seconds.
+        
+        The (card, amount, merchant) fingerprint is claimed with SET NX in Redis;
+        the database is only queried when Redis is unreachable. Returns the
+        claimed key, or None if the database fallback was used.
+        """
+        fingerprint = hashlib.blake2b(
+            f"{transaction_data.card_id}:{transaction_data.amount:.2f}:{transaction_data.merchant_name}".encode(),
+            digest_size=16,
+        ).hexdigest()
+        fingerprint_key = f"txn_dup:{fingerprint}"
+        
+        try:
+            claimed = await redis_client.set_nx(fingerprint_key, "1", expire=DUPLICATE_WINDOW)
+        except RedisError:
+            duplicate_stmt = select(Transaction.id).where(
+                Transaction.card_id == transaction_data.card_id,
+                Transaction.amount == transaction_data.amount,
+                Transaction.merchant_name == transaction_data.merchant_name,
+                Transaction.created_at > datetime.utcnow() - timedelta(seconds=DUPLICATE_WINDOW),
+            )
+            claimed = await self.db.scalar(duplicate_stmt.limit(1)) is None
+            fingerprint_key = None
         
-        if duplicate:
+        if not claimed:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Duplicate transaction detected"
             )
+        return fingerprint_key
+    
+    async def create_transactions_batch(
+        self,
+        batch: BatchTransactionCreate,
+        user_id: UUID
+    ) -> List[UUID]:
+        """Create many transactions in bulk after a single card-ownership check"""
+        
+        card_ids = {t.card_id for t in batch.transactions}
+        card_stmt = select(Card.id, Card.is_blocked).where(
+            Card.id.in_(card_ids),
+            Card.user_id == user_id,
+        )
+        card_result = await self.db.execute(card_stmt)
+        cards = {row.id: row.is_blocked for row in card_result.all()}
+        
+        if len(cards) != len(card_ids):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Card not found or unauthorized"
+            )
+        
+        if any(cards.values()):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Card is blocked"
+            )
+        
+        rows = []
+        for t in batch.transactions:
+            row = t.dict()
+            if row.get("ip_address") is not None:
+                row["ip_address"] = str(row["ip_address"])
+            rows.append(row)
         
-        # Create transaction
-        transaction = Transaction(**transaction_data.dict())
-        self.db.add(transaction)
+        transaction_ids = await Transaction.bulk_insert(self.db, rows)
         await self.db.commit()
-        await self.db.refresh(transaction)
         
-        # Invalidate cache
         await self._invalidate_transaction_cache(user_id)
         
-        return transaction
+        return transaction_ids
     
     async def get_transaction(
         self, 
@@ -87,13 +287,10 @@ class TransactionService:
     ) -> Transaction:
         """Get single transaction with authorization check"""
         
-        transaction_stmt = (
-            select(Transaction)
-            .join(Card)
-            .where(Transaction.id == transaction_id, Card.user_id == user_id)
-        )
-        result = await self.db.execute(transaction_stmt)
-        transaction = result.scalar_one_or_none()
+        # Primary-key lookup, then an ownership check that is usually served from cache
+        transaction = await self.db.get(Transaction, transaction_id)
+        if transaction is not None and (await self._card_meta(transaction.card_id))["user_id"] != str(user_id):
+            transaction = None
         
         if not transaction:
             raise HTTPException(
@@ -112,63 +309,92 @@ class TransactionService:
     ) -> Dict[str, Any]:
         """Get paginated and filtered transactions"""
         
-        # Try cache first (v2 key to invalidate any old cached payloads)
-        cache_key = f"transactions_v2:{user_id}:{skip}:{limit}:{hash(str(filters))}"
-        cached_data = await redis_client.get(cache_key)
-
-        # Cached value may already be a dict (if set by older code) or a JSON string.
-        if cached_data:
-            if isinstance(cached_data, (str, bytes)):
-                return json.loads(cached_data)
-            return cached_data
-        
-        filters_clause = [Card.user_id == user_id]
-        
-        if filters.start_date:
-            filters_clause.append(Transaction.transaction_date >= filters.start_date)
-        if filters.end_date:
-            filters_clause.append(Transaction.transaction_date <= filters.end_date)
-        if filters.min_amount:
-            filters_clause.append(Transaction.amount >= filters.min_amount)
-        if filters.max_amount:
-            filters_clause.append(Transaction.amount <= filters.max_amount)
-        if filters.is_fraud is not None:
-            filters_clause.append(Transaction.is_fraud == filters.is_fraud)
-        if filters.merchant_category:
-            filters_clause.append(Transaction.merchant_category == filters.merchant_category)
-        card_id = getattr(filters, "card_id", None)
-        if card_id:
-            filters_clause.append(Transaction.card_id == card_id)
-        
-        base_stmt = (
-            select(Transaction)
-            .join(Card)
-            .where(*filters_clause)
-            .order_by(desc(Transaction.transaction_date))
-            .offset(skip)
-            .limit(limit)
+        # Try cache first; the Redis client decodes cached JSON (orjson) on read
+        cache_key = _transactions_cache_key(user_id, filters, skip, limit)
+        return await self._cached_or_single_flight(
+            cache_key, 300, lambda: self._load_transactions(user_id, cache_key, filters, skip, limit)
         )
-        result = await self.db.execute(base_stmt)
-        orm_transactions = result.scalars().all()
+
+    async def get_transactions_json(
+        self,
+        user_id: UUID,
+        filters: TransactionFilters,
+        skip: int = 0,
+        limit: int = 100
+    ) -> bytes:
+        """get_transactions as JSON bytes; cache hits are returned without decoding."""
+        cached = await redis_client.get_raw(_transactions_cache_key(user_id, filters, skip, limit))
+        if cached is not None:
+            return cached
+        return orjson.dumps(await self.get_transactions(user_id, filters, skip=skip, limit=limit))
+
+    async def _load_transactions(
+        self,
+        user_id: UUID,
+        cache_key: str,
+        filters: TransactionFilters,
+        skip: int,
+        limit: int
+    ) -> Dict[str, Any]:
+        """Query one page of transactions for get_transactions."""
+        filters_clause, params = _build_filters(user_id, filters)
         
         count_stmt = (
             select(func.count(Transaction.id))
             .join(Card)
             .where(*filters_clause)
         )
-        total_result = await self.db.execute(count_stmt)
-        total = total_result.scalar() or 0
+        # A cursor seeks straight to the next page; OFFSET is kept for old clients
+        keyset = filters.after_date is not None and filters.after_id is not None
+        if keyset:
+            page_stmt = (
+                select(Transaction)
+                .join(Card)
+                .where(*filters_clause, _AFTER_CURSOR)
+                .order_by(desc(Transaction.transaction_date), desc(Transaction.id))
+                .limit(limit)
+            )
+            page_params = {**params, "after_date": filters.after_date, "after_id": filters.after_id}
+            # The cursor narrows the page but not the total, so the count stays a
+            # separate query. An AsyncSession runs one statement at a time, so it
+            # goes to a session (and pooled connection) of its own and overlaps.
+            result, total = await asyncio.gather(
+                self.db.execute(page_stmt, page_params),
+                self._scalar_in_own_session(count_stmt, params),
+            )
+            orm_transactions = result.scalars().all()
+        else:
+            # count(*) OVER () returns the total with every row of the page
+            page_stmt = (
+                select(Transaction, func.count().over().label("total"))
+                .join(Card)
+                .where(*filters_clause)
+                .order_by(desc(Transaction.transaction_date), desc(Transaction.id))
+                .offset(skip)
+                .limit(limit)
+            )
+            rows = (await self.db.execute(page_stmt, params)).all()
+            orm_transactions = [row[0] for row in rows]
+            if rows:
+                total = rows[0].total
+            elif skip:
+                # Past the last page there is no row to carry the total
+                total = await self.db.scalar(count_stmt, params)
+            else:
+                total = 0
+        total = total or 0
 
-        # Convert ORM objects to plain dicts via Pydantic so they are JSON-serializable
-        transactions = [
-            TransactionResponse.model_validate(t).model_dump(mode="json")
-            for t in orm_transactions
-        ]
+        # Convert ORM objects to plain JSON-serializable dicts
+        transactions = [_transaction_payload(t) for t in orm_transactions]
 
         # Shape result to match TransactionListResponse schema
         page = (skip // limit) + 1 if limit > 0 else 1
         size = limit
-        has_more = skip + len(transactions) < total
+        if keyset:
+            has_more = len(transactions) == limit
+        else:
+            has_more = skip + len(transactions) < total
+        last = orm_transactions[-1] if has_more and orm_transactions else None
 
         result_payload = {
             "transactions": transactions,
@@ -176,14 +402,11 @@ class TransactionService:
             "page": page,
             "size": size,
             "has_more": has_more,
+            "next_cursor": encode_cursor(last.transaction_date, last.id) if last is not None else None,
         }
 
-        # Cache for 5 minutes as proper JSON
-        await redis_client.setex(
-            cache_key,
-            300,
-            json.dumps(result_payload)
-        )
+        # The per-user index lets invalidation find cached pages without a scan
+        await redis_client.sadd(_cache_index_key(user_id), cache_key, expire=300)
         
         return result_payload
     
@@ -198,65 +421,39 @@ class TransactionService:
         transaction = await self.get_transaction(transaction_id, user_id)
         
         # Only allow updating specific fields
-        for field, value in update_data.dict(exclude_unset=True).items():
-            setattr(transaction, field, value)
-        
+        values = update_data.dict(exclude_unset=True)
+        if not values:
+            return transaction
+        
+        # RETURNING reloads updated_at (set by the database) in the same round-trip
+        stmt = (
+            update(Transaction)
+            .where(Transaction.id == transaction.id)
+            .values(**values)
+            .returning(Transaction)
+        )
+        result = await self.db.execute(stmt, execution_options={"populate_existing": True})
+        transaction = result.scalar_one()
         await self.db.commit()
-        await self.db.refresh(transaction)
         
         return transaction
     
     async def get_statistics(self, user_id: UUID) -> Dict[str, Any]:
         """Get transaction statistics"""
         
-        cache_key = f"transaction_stats:{user_id}"
-        cached = await redis_client.get(cache_key)
-        
-        if cached:
-            return json.loads(cached)
-        
-        # Total transactions
-        total_stmt = (
-            select(func.count(Transaction.id))
-            .join(Card)
-            .where(Card.user_id == user_id)
-        )
-        res = await self.db.execute(total_stmt)
-        total_transactions = res.scalar() or 0
-        
-        # Total amount
-        amount_stmt = (
-            select(func.sum(Transaction.amount))
-            .join(Card)
-            .where(Card.user_id == user_id)
-        )
-        res = await self.db.execute(amount_stmt)
-        total_amount = res.scalar() or 0
-        
-        # Fraud statistics
-        fraud_stmt = (
-            select(func.count(Transaction.id))
-            .join(Card)
-            .where(Card.user_id == user_id, Transaction.is_fraud.is_(True))
-        )
-        res = await self.db.execute(fraud_stmt)
-        fraud_count = res.scalar() or 0
-        
-        # Average transaction amount
-        avg_stmt = (
-            select(func.avg(Transaction.amount))
-            .join(Card)
-            .where(Card.user_id == user_id)
+        return await self._cached_or_single_flight(
+            f"transaction_stats:{user_id}", 600, lambda: self._compute_statistics(user_id)
         )
-        res = await self.db.execute(avg_stmt)
-        avg_amount = res.scalar() or 0
-        
-        # Transactions by category
+
+    async def _compute_statistics(self, user_id: UUID) -> Dict[str, Any]:
+        """Aggregate transaction statistics for get_statistics."""
+        # One grouped query; the overall totals are sums over the categories
         categories_stmt = (
             select(
                 Transaction.merchant_category,
                 func.count(Transaction.id).label("count"),
                 func.sum(Transaction.amount).label("total"),
+                func.count(Transaction.id).filter(Transaction.is_fraud.is_(True)).label("fraud_count"),
             )
             .join(Card)
             .where(Card.user_id == user_id)
@@ -265,6 +462,11 @@ class TransactionService:
         res = await self.db.execute(categories_stmt)
         categories = res.all()
         
+        total_transactions = sum(cat.count for cat in categories)
+        total_amount = sum((cat.total or 0 for cat in categories), Decimal("0"))
+        fraud_count = sum(cat.fraud_count for cat in categories)
+        avg_amount = total_amount / total_transactions if total_transactions > 0 else 0
+        
         stats = {
             "total_transactions": total_transactions,
             "total_amount": float(total_amount),
@@ -273,42 +475,20 @@ class TransactionService:
             "average_amount": float(avg_amount),
             "categories": [
                 {
-                    "category": cat[0],
-                    "count": cat[1],
-                    "total": float(cat[2])
+                    "category": cat.merchant_category,
+                    "count": cat.count,
+                    "total": float(cat.total)
                 }
                 for cat in categories
             ]
         }
         
-        # Cache for 10 minutes
-        await redis_client.setex(cache_key, 600, json.dumps(stats))
-        
         return stats
 
     async def seed_demo(self, user_id: UUID, count: int = 25) -> Dict[str, Any]:
         """Create a demo card (if missing) and seed random transactions for the user."""
         # Ensure the user has at least one card
-        card_stmt = select(Card).where(Card.user_id == user_id).limit(1)
-        res = await self.db.execute(card_stmt)
-        card = res.scalar_one_or_none()
-
-        if not card:
-            # Create a simple demo card
-            card = Card(
-                user_id=user_id,
-                card_number="4111111111111111",
-                card_type=CardType.CREDIT,
-                card_brand="Visa",
-                expiry_date=datetime.utcnow().date().replace(year=datetime.utcnow().year + 3),
-                cvv="123",
-                billing_address="Demo Street, Demo City",
-                is_blocked=False,
-                is_active=True,
-            )
-            self.db.add(card)
-            await self.db.commit()
-            await self.db.refresh(card)
+        card = await self._get_or_create_card(user_id, "Demo Street, Demo City")
 
         merchants = [
             ("Flipkart", "ecommerce"),
@@ -337,35 +517,64 @@ class TransactionService:
             "Kochi, IN",
         ]
 
-        created = 0
-        for _ in range(max(1, count)):
-            m_name, m_cat = random.choice(merchants)
-            # Amounts in INR (rupees). Range ~₹100 to ₹50,000 with paise
-            amount = Decimal(random.randint(100, 50000)) + (Decimal(random.randint(0, 99)) / Decimal(100))
-            when = datetime.utcnow() - timedelta(days=random.randint(0, 30), hours=random.randint(0, 23), minutes=random.randint(0, 59))
-            is_fraud = random.random() < 0.15
-            fraud_score = round(random.uniform(0.0, 0.99), 2)
-
-            txn = Transaction(
-                card_id=card.id,
-                amount=amount,
-                merchant_name=m_name,
-                merchant_category=m_cat,
-                transaction_type=random.choice(list(TransactionType)),
-                location=random.choice(locations),
-                ip_address="192.168.1.%d" % random.randint(2, 254),
-                device_info={"os": random.choice(["iOS", "Android", "Windows"])},
-                transaction_date=when,
-                is_fraud=is_fraud,
-                fraud_score=float(fraud_score),
+        # Draw every random column at once instead of ~10 random.* calls per row
+        count = max(1, count)
+        rng = np.random.default_rng()
+        merchant_idx = rng.integers(0, len(merchants), size=count)
+        location_idx = rng.integers(0, len(locations), size=count)
+        type_idx = rng.integers(0, len(_TX_TYPES), size=count)
+        os_idx = rng.integers(0, len(DEMO_DEVICE_OS), size=count)
+        # Amounts in INR (rupees). Range ~₹100 to ₹50,000 with paise
+        paise = rng.integers(100, 50001, size=count) * 100 + rng.integers(0, 100, size=count)
+        # Up to 30 days, 23 hours and 59 minutes in the past
+        age_minutes = (
+            rng.integers(0, 31, size=count) * 1440
+            + rng.integers(0, 24, size=count) * 60
+            + rng.integers(0, 60, size=count)
+        )
+        is_fraud = rng.random(size=count) < 0.15
+        fraud_score = (rng.random(size=count) * 0.99).round(2)
+        ip_suffix = rng.integers(2, 255, size=count)
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "card_id": card.id,
+                "amount": Decimal(p).scaleb(-2),
+                "merchant_name": merchants[m][0],
+                "merchant_category": merchants[m][1],
+                "transaction_type": _TX_TYPES[t],
+                "location": locations[loc],
+                "ip_address": f"192.168.1.{ip}",
+                "device_info": {"os": DEMO_DEVICE_OS[o]},
+                "transaction_date": now - timedelta(minutes=minutes),
+                "is_fraud": fraud,
+                "fraud_score": score,
+            }
+            for m, loc, t, o, p, minutes, fraud, score, ip in zip(
+                merchant_idx.tolist(),
+                location_idx.tolist(),
+                type_idx.tolist(),
+                os_idx.tolist(),
+                paise.tolist(),
+                age_minutes.tolist(),
+                is_fraud.tolist(),
+                fraud_score.tolist(),
+                ip_suffix.tolist(),
             )
-            self.db.add(txn)
-            created += 1
+        ]
 
+        # Multi-row INSERT instead of one INSERT per ORM object
+        transaction_ids = await Transaction.bulk_insert(self.db, rows)
         await self.db.commit()
         # Invalidate caches
         await self._invalidate_transaction_cache(user_id)
-        return {"created": created, "card_id": str(card.id)}
+        return {
+            "created": len(transaction_ids),
+            "skipped": skipped,
+            "errors": errors,
+            "card_id": str(card.id),
+        }
 
     async def import_csv(self, user_id: UUID, csv_bytes: bytes) -> Dict[str, Any]:
         """Import transactions from a CSV file for the given user.
@@ -376,88 +585,101 @@ class TransactionService:
         - transaction_type (optional; defaults to 'purchase')
         - location (optional)
         - ip_address (optional)
-        - transaction_date (optional; ISO or parseable by pandas, defaults now)
+        - transaction_date (optional; ISO 8601, defaults to now)
+        
+        Rows whose amount cannot be parsed are counted as errors, rows with a
+        zero or negative amount as skipped; neither is imported.
         """
         # Ensure a card exists
-        card_stmt = select(Card).where(Card.user_id == user_id).limit(1)
-        res = await self.db.execute(card_stmt)
-        card = res.scalar_one_or_none()
-        if not card:
-            card = Card(
-                user_id=user_id,
-                card_number="4111111111111111",
-                card_type=CardType.CREDIT,
-                card_brand="Visa",
-                expiry_date=datetime.utcnow().date().replace(year=datetime.utcnow().year + 3),
-                cvv="123",
-                billing_address="Imported",
-                is_blocked=False,
-                is_active=True,
-            )
-            self.db.add(card)
-            await self.db.commit()
-            await self.db.refresh(card)
+        card = await self._get_or_create_card(user_id, "Imported")
 
         # Read CSV (normalize common issues like unquoted commas in location fields)
+        text = csv_bytes.decode("utf-8", errors="ignore")
+        # Normalize patterns like "Mumbai, IN" to "Mumbai IN" to avoid delimiter splits
+        text = text.replace(", IN", " IN")
+        # Plain csv keeps cells as text, so amounts go straight to Decimal
         try:
-            import io
-            text = csv_bytes.decode("utf-8", errors="ignore")
-            # Normalize patterns like "Mumbai, IN" to "Mumbai IN" to avoid delimiter splits
-            text = text.replace(", IN", " IN")
-            df = pd.read_csv(io.StringIO(text))
-        except Exception:
+            reader = csv.DictReader(io.StringIO(text))
+            if reader.fieldnames is None:
+                raise csv.Error("missing header")
+            reader.fieldnames = [str(f).strip().lower() for f in reader.fieldnames]
+            records = list(reader)
+        except csv.Error:
             raise HTTPException(status_code=400, detail="Invalid CSV file")
 
-        # Normalize columns
-        df.columns = [str(c).strip().lower() for c in df.columns]
-        created = 0
+        def cell(record: Dict[str, Optional[str]], name: str) -> Optional[str]:
+            # Empty (and missing) cells become None
+            value = record.get(name)
+            value = value.strip() if value else None
+            return value or None
 
-        def to_decimal(v) -> Decimal:
-            if pd.isna(v):
-                return Decimal("0")
+        def to_decimal(v: Optional[str]) -> Optional[Decimal]:
             try:
-                return Decimal(str(v)).quantize(Decimal("0.01"))
+                return Decimal(v).quantize(Decimal("0.01"))
             except Exception:
-                return Decimal("0")
+                return None
+
+        def to_datetime(v: Optional[str]) -> datetime:
+            # Unparseable or missing dates fall back to now; naive ones are UTC
+            try:
+                when = datetime.fromisoformat(v)
+            except (TypeError, ValueError):
+                return now
+            return when if when.tzinfo is not None else when.replace(tzinfo=timezone.utc)
 
-        for _, row in df.iterrows():
-            amount = to_decimal(row.get("amount"))
+        now = datetime.now(timezone.utc)
+        rows = []
+        skipped = errors = 0
+        for record in records:
+            amount = to_decimal(cell(record, "amount"))
+            if amount is None:
+                errors += 1
+                continue
             if amount <= 0:
+                skipped += 1
                 continue
-            m_name = row.get("merchant_name") if not pd.isna(row.get("merchant_name")) else None
-            m_cat = row.get("merchant_category") if not pd.isna(row.get("merchant_category")) else None
-            tx_type_raw = (row.get("transaction_type") or "purchase").lower()
-            try:
-                tx_type = TransactionType(tx_type_raw) if tx_type_raw in [e.value for e in TransactionType] else list(TransactionType)[0]
-            except Exception:
-                tx_type = list(TransactionType)[0]
-            location = row.get("location") if not pd.isna(row.get("location")) else None
-            ip = row.get("ip_address") if not pd.isna(row.get("ip_address")) else None
-            when_val = row.get("transaction_date")
-            try:
-                when = pd.to_datetime(when_val).to_pydatetime() if when_val is not None and not pd.isna(when_val) else datetime.utcnow()
-            except Exception:
-                when = datetime.utcnow()
-
-            txn = Transaction(
-                card_id=card.id,
-                amount=amount,
-                merchant_name=m_name,
-                merchant_category=m_cat,
-                transaction_type=tx_type,
-                location=location,
-                ip_address=str(ip) if ip else None,
-                device_info=None,
-                transaction_date=when,
-                is_fraud=None,
-                fraud_score=None,
-            )
-            self.db.add(txn)
-            created += 1
+            tx_type_raw = (cell(record, "transaction_type") or "purchase").lower()
+            tx_type = TransactionType(tx_type_raw) if tx_type_raw in _TX_TYPE_VALUES else _DEFAULT_TX_TYPE
+            rows.append({
+                "card_id": card.id,
+                "amount": amount,
+                "merchant_name": cell(record, "merchant_name"),
+                "merchant_category": cell(record, "merchant_category"),
+                "transaction_type": tx_type,
+                "location": cell(record, "location"),
+                "ip_address": cell(record, "ip_address"),
+                "device_info": None,
+                "transaction_date": to_datetime(cell(record, "transaction_date")),
+                "is_fraud": None,
+                "fraud_score": None,
+            })
 
+        # Multi-row INSERT instead of one INSERT per ORM object
+        transaction_ids = await Transaction.bulk_insert(self.db, rows)
         await self.db.commit()
         await self._invalidate_transaction_cache(user_id)
-        return {"created": created, "card_id": str(card.id)}
+        return {"created": len(transaction_ids), "card_id": str(card.id)}
+    
+    async def _get_or_create_card(self, user_id: UUID, billing_address: str) -> Card:
+        """Return the user's first card, inserting a demo card if they have none."""
+        card_stmt = select(Card).where(Card.user_id == user_id).limit(1)
+        card = (await self.db.execute(card_stmt)).scalar_one_or_none()
+        if card:
+            return card
+        
+        today = datetime.utcnow().date()
+        stmt = insert(Card).values(
+            user_id=user_id,
+            card_number="4111111111111111",
+            card_type=CardType.CREDIT,
+            card_brand="Visa",
+            expiry_date=today.replace(year=today.year + 3),
+            cvv="123",
+            billing_address=billing_address,
+            is_blocked=False,
+            is_active=True,
+        ).returning(Card)
+        return (await self.db.execute(stmt)).scalar_one()
     
     async def export_transactions(
         self,
@@ -466,52 +688,92 @@ class TransactionService:
     ) -> pd.DataFrame:
         """Export transactions to DataFrame for CSV/Excel"""
         
-        stmt_filters = [Card.user_id == user_id]
-        if filters.start_date:
-            stmt_filters.append(Transaction.transaction_date >= filters.start_date)
-        if filters.end_date:
-            stmt_filters.append(Transaction.transaction_date <= filters.end_date)
-        if filters.min_amount:
-            stmt_filters.append(Transaction.amount >= filters.min_amount)
-        if filters.max_amount:
-            stmt_filters.append(Transaction.amount <= filters.max_amount)
-        if filters.is_fraud is not None:
-            stmt_filters.append(Transaction.is_fraud == filters.is_fraud)
-        if filters.merchant_category:
-            stmt_filters.append(Transaction.merchant_category == filters.merchant_category)
-        card_id = getattr(filters, "card_id", None)
-        if card_id:
-            stmt_filters.append(Transaction.card_id == card_id)
-        
-        stmt = select(Transaction).join(Card).where(*stmt_filters)
-        res = await self.db.execute(stmt)
-        transactions = res.scalars().all()
-        
-        # Convert to DataFrame
-        data = [{
-            "Transaction ID": str(t.id),
-            "Date": t.transaction_date,
-            "Amount": t.amount,
-            "Merchant": t.merchant_name,
-            "Category": t.merchant_category,
-            "Type": t.transaction_type.value if hasattr(t.transaction_type, "value") else t.transaction_type,
-            "Location": t.location,
-            "Fraud": "Yes" if t.is_fraud else "No",
-            "Fraud Score": t.fraud_score
-        } for t in transactions]
-        
-        return pd.DataFrame(data)
+        stmt_filters, params = _build_filters(user_id, filters)
+        
+        # Plain column rows streamed from a server-side cursor: no ORM objects,
+        # no identity map, and one DataFrame built from the tuples at the end
+        stmt = (
+            select(
+                Transaction.id,
+                Transaction.transaction_date,
+                Transaction.amount,
+                Transaction.merchant_name,
+                Transaction.merchant_category,
+                Transaction.transaction_type,
+                Transaction.location,
+                Transaction.is_fraud,
+                Transaction.fraud_score,
+            )
+            .join(Card)
+            .where(*stmt_filters)
+        )
+        rows = []
+        result = await self.db.stream(stmt, params)
+        async for partition in result.partitions(EXPORT_PARTITION_SIZE):
+            rows.extend(partition)
+        
+        # Building a large frame is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(_export_frame, rows)
+    
+    async def _card_meta(self, card_id: UUID) -> Dict[str, Any]:
+        """
+        Owner id (None for unknown cards) and blocked flag of a card.
+
+        Looked up in the per-process cache, then Redis (card_meta:<card_id>),
+        then the database; unknown cards are cached too. Redis errors only
+        skip the shared cache, so lookups keep working while it is down.
+        """
+        key = str(card_id)
+        meta = _card_meta_cache.get(key)
+        if meta is not None:
+            return meta
+        
+        try:
+            meta = await redis_client.get(f"card_meta:{key}")
+        except RedisError:
+            meta = None
+        if meta is None:
+            result = await self.db.execute(select(Card.user_id, Card.is_blocked).where(Card.id == card_id))
+            row = result.one_or_none()
+            meta = {
+                "user_id": str(row.user_id) if row is not None else None,
+                "is_blocked": bool(row.is_blocked) if row is not None else False,
+            }
+            try:
+                await redis_client.setex(f"card_meta:{key}", CARD_META_TTL, meta)
+            except RedisError:
+                pass
+        _card_meta_cache[key] = meta
+        return meta
+    
+    async def _scalar_in_own_session(self, stmt, params: Dict[str, Any]) -> Any:
+        """Run a scalar query on a short-lived session of its own."""
+        async with self.session_factory() as session:
+            return await session.scalar(stmt, params)
+    
+    async def _cached_or_single_flight(
+        self,
+        cache_key: str,
+        ttl: int,
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Serve a value from cache, letting only one caller rebuild it on a miss.
+
+        Callers that lose the lock poll the cache briefly and fall back to
+        loading it themselves if the winner has not finished in time.
+        """
+        return await redis_client.get_or_compute(
+            cache_key,
+            loader,
+            expire=ttl,
+            lock_ttl=CACHE_LOCK_TTL,
+            poll_interval=CACHE_POLL_INTERVAL,
+            poll_attempts=CACHE_POLL_ATTEMPTS,
+        )
     
     async def _invalidate_transaction_cache(self, user_id: UUID):
         """Clear transaction-related cache"""
-        # Legacy v1 keys
-        patterns = [
-            f"transactions:{user_id}:*",
-            f"transactions_v2:{user_id}:*",
-        ]
-        for pattern in patterns:
-            keys = await redis_client.keys(pattern)
-            if keys:
-                await redis_client.delete(*keys)
-
-        await redis_client.delete(f"transaction_stats:{user_id}")
+        index_key = _cache_index_key(user_id)
+        cached_pages = await redis_client.smembers(index_key)
+        await redis_client.delete(*cached_pages, index_key, f"transaction_stats:{user_id}")
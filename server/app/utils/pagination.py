@@ -0,0 +1,23 @@
+"""Opaque keyset cursors shared by the paginated list endpoints."""
+
+import base64
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    """Cursor for the row after which the next page starts, in (timestamp, id) order."""
+    raw = f"{sort_value.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(value: str) -> Tuple[datetime, UUID]:
+    """Inverse of encode_cursor; a malformed cursor is a 400."""
+    try:
+        sort_value, row_id = base64.urlsafe_b64decode(value.encode()).decode().split("|")
+        return datetime.fromisoformat(sort_value), UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
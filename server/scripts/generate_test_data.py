@@ -9,244 +9,531 @@ Usage:
 import os
 import sys
 import argparse
+import gzip
+import zlib
+from collections import Counter, deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
-import uuid
+
+try:
+    import orjson
+except ImportError:  # script can run outside the app's environment
+    orjson = None
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# Rows generated (and written) per chunk by default
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def uuid4_batch(n: int) -> np.ndarray:
+    """n random (version 4) UUID strings from a single os.urandom call."""
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    # All 32-char hex strings come from one buffer; the output array is sized up front
+    hex_all = raw.tobytes().hex()
+    ids = np.empty(n, dtype=object)
+    for i in range(n):
+        h = hex_all[32 * i:32 * (i + 1)]
+        ids[i] = f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return ids
+
+
+def ip_address_strings(prefix: str, third: np.ndarray, fourth: np.ndarray) -> np.ndarray:
+    """'<prefix><third>.<fourth>' per row, formatted with numpy.char."""
+    ips = np.char.add(prefix, third.astype(str))
+    ips = np.char.add(ips, '.')
+    return np.char.add(ips, fourth.astype(str)).astype(object)
+
+
+def csv_column(series: pd.Series) -> np.ndarray:
+    """A column formatted as CSV field strings (dates as DATE_FORMAT, quoted where needed)."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime(DATE_FORMAT).to_numpy(dtype=object)
+    values = series.astype(str)
+    if series.dtype == object:
+        needs_quotes = values.str.contains('[",\n]', regex=True)
+        if needs_quotes.any():
+            quoted = '"' + values.str.replace('"', '""', regex=False) + '"'
+            values = values.where(~needs_quotes, quoted)
+    return values.to_numpy(dtype=object)
+
+
+def open_output(path: str):
+    """Open a CSV output path for writing; a .gz path is written with gzip level 1."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', compresslevel=1, newline='')
+    return open(path, 'w', newline='')
+
+
+def write_csv(df: pd.DataFrame, f, header: bool = True, chunk_rows: int = 100_000):
+    """
+    Write a DataFrame as CSV to an open text file (same layout as df.to_csv(f, index=False)).
+
+    Each column is formatted once as a string array and rows are joined in
+    chunks, skipping to_csv's per-cell formatting. Pass header=False when
+    appending further chunks of the same table.
+    """
+    columns = [csv_column(df[column]) for column in df.columns]
+    if header:
+        f.write(','.join(df.columns) + '\n')
+    for start in range(0, len(df), chunk_rows):
+        rows = zip(*(column[start:start + chunk_rows] for column in columns))
+        f.write('\n'.join(map(','.join, rows)) + '\n')
+
+
+def output_format(path: str) -> str:
+    """'parquet' for a .parquet path, otherwise 'csv'."""
+    return 'parquet' if path.endswith('.parquet') else 'csv'
+
+
+def summary_path_for(output_path: str) -> str:
+    """<output without .csv/.csv.gz/.parquet>_summary.json"""
+    base = output_path
+    for suffix in ('.gz', '.csv', '.parquet'):
+        base = base.removesuffix(suffix)
+    return base + '_summary.json'
+
+
+@contextmanager
+def chunk_writer(path: str, fmt: str = 'csv') -> Iterator[Callable[[pd.DataFrame], None]]:
+    """
+    Yield a write(df) callable that appends one chunk to path.
+
+    CSV goes through write_csv with the header taken from the first chunk.
+    Parquet (pyarrow, snappy) keeps dates as timestamps and the low-cardinality
+    columns as dictionaries; each chunk becomes one row group.
+    """
+    if fmt == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        writer = None
+
+        def write(df: pd.DataFrame):
+            nonlocal writer
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='snappy')
+            writer.write_table(table)
+
+        try:
+            yield write
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open_output(path) as f:
+            written = False
+
+            def write(df: pd.DataFrame):
+                nonlocal written
+                write_csv(df, f, header=not written)
+                written = True
+
+            yield write
+
+
+def write_summary(summary: dict, path: str):
+    """Write the summary as indented JSON, with orjson when it is installed."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2, default=lambda value: value.item())
+
+
+class RunningSummary:
+    """
+    Summary statistics accumulated chunk by chunk.
+
+    The amount mean and variance are merged per chunk with the parallel form
+    of Welford's algorithm, so no chunk has to be kept after it is written.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.fraud = 0
+        self.amount_mean = 0.0
+        self.amount_m2 = 0.0
+        self.amount_min = float('inf')
+        self.amount_max = float('-inf')
+        self.date_min: Optional[pd.Timestamp] = None
+        self.date_max: Optional[pd.Timestamp] = None
+        self.cards = set()
+        self.merchants = set()
+        self.merchant_categories = Counter()
+        self.transaction_types = Counter()
+
+    def update(self, df: pd.DataFrame):
+        n = len(df)
+        if n == 0:
+            return
+        amounts = df['amount'].to_numpy(dtype=float)
+        chunk_mean = amounts.mean()
+        chunk_m2 = float(((amounts - chunk_mean) ** 2).sum())
+        delta = chunk_mean - self.amount_mean
+        total = self.count + n
+        self.amount_mean += delta * n / total
+        self.amount_m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.fraud += int(df['is_fraud'].sum())
+        self.amount_min = min(self.amount_min, float(amounts.min()))
+        self.amount_max = max(self.amount_max, float(amounts.max()))
+
+        dates = df['transaction_date']
+        if self.date_min is None or dates.min() < self.date_min:
+            self.date_min = dates.min()
+        if self.date_max is None or dates.max() > self.date_max:
+            self.date_max = dates.max()
+
+        self.cards.update(df['card_id'].unique())
+        self.merchants.update(df['merchant_name'].unique())
+        self.merchant_categories.update(df['merchant_category'].value_counts().to_dict())
+        self.transaction_types.update(df['transaction_type'].value_counts().to_dict())
+
+    def to_dict(self) -> dict:
+        std = (self.amount_m2 / (self.count - 1)) ** 0.5 if self.count > 1 else float('nan')
+        return {
+            'total_samples': self.count,
+            'fraud_samples': self.fraud,
+            'normal_samples': self.count - self.fraud,
+            'fraud_ratio': self.fraud / self.count if self.count else float('nan'),
+            'date_range': {
+                'start': self.date_min.strftime(DATE_FORMAT) if self.date_min is not None else None,
+                'end': self.date_max.strftime(DATE_FORMAT) if self.date_max is not None else None
+            },
+            'amount_stats': {
+                'mean': self.amount_mean,
+                'std': std,
+                'min': self.amount_min,
+                'max': self.amount_max
+            },
+            'unique_cards': len(self.cards),
+            'unique_merchants': len(self.merchants),
+            'merchant_categories': {k: int(v) for k, v in self.merchant_categories.most_common()},
+            'transaction_types': {k: int(v) for k, v in self.transaction_types.most_common()}
+        }
+
 class SyntheticDataGenerator:
     """Generate realistic synthetic transaction data for testing."""
     
-    def __init__(self, num_samples: int = 10000, fraud_ratio: float = 0.05):
+    def __init__(self, num_samples: int = 10000, fraud_ratio: float = 0.05, workers: Optional[int] = None):
         self.num_samples = num_samples
         self.fraud_ratio = fraud_ratio
         self.num_fraud = int(num_samples * fraud_ratio)
         self.num_normal = num_samples - self.num_fraud
+        self.workers = workers or os.cpu_count() or 1
         
-        # Set random seed for reproducibility
-        np.random.seed(42)
+        # Seeded PCG64 generator for reproducibility; the per-chunk streams in
+        # generate_data are spawned from the same seed sequence
+        self.seed_seq = np.random.SeedSequence(42)
+        self.rng = np.random.default_rng(self.seed_seq)
         
         # Data parameters
-        self.card_ids = [str(uuid.uuid4()) for _ in range(1000)]  # 1000 unique cards
+        self.card_ids = uuid4_batch(1000).tolist()  # 1000 unique cards
+        # How busy each card is; drawn once so a card keeps its activity level
+        card_weights = self.rng.exponential(scale=1.0, size=len(self.card_ids))
+        self.card_weights = card_weights / card_weights.sum()
         self.merchant_categories = [
             'retail', 'restaurant', 'gas', 'grocery', 'entertainment',
             'travel', 'healthcare', 'education', 'utilities', 'online',
             'electronics', 'clothing', 'home_improvement', 'sports', 'pharmacy'
         ]
+        # Typical spending share per category (normal transactions); the
+        # categories not listed get 0.01 before normalising
+        category_probs = {
+            'retail': 0.25, 'restaurant': 0.15, 'gas': 0.12, 'grocery': 0.18,
+            'entertainment': 0.08, 'travel': 0.05, 'healthcare': 0.04, 'education': 0.02,
+            'utilities': 0.03, 'online': 0.08
+        }
+        self.merchant_cat_p = np.array([category_probs.get(cat, 0.01) for cat in self.merchant_categories])
+        self.merchant_cat_p /= self.merchant_cat_p.sum()
+        # Title-cased category per index, for merchant names like "Retail_0042"
+        self.category_titles = np.array([cat.title() for cat in self.merchant_categories])
         self.transaction_types = ['purchase', 'refund', 'cash_advance', 'payment']
+        # Transaction type shares (mostly purchases, even more so for fraud)
+        self.normal_type_p = np.array([0.85, 0.08, 0.04, 0.03])
+        self.fraud_type_p = np.array([0.95, 0.02, 0.02, 0.01])
         self.locations = [f"City_{i}" for i in range(50)]
         
+        # Hour-of-day shares: normal transactions peak in business hours,
+        # fraud at unusual hours
+        normal_hour_weights = np.array([
+            0.02, 0.01, 0.01, 0.01, 0.02, 0.03, 0.05, 0.08, 0.09, 0.08, 0.07, 0.06,
+            0.07, 0.06, 0.06, 0.06, 0.07, 0.08, 0.09, 0.08, 0.07, 0.05, 0.03, 0.02
+        ])
+        fraud_hour_weights = np.array([
+            0.05, 0.06, 0.07, 0.08, 0.06, 0.04, 0.03, 0.02, 0.02, 0.02, 0.02, 0.02,
+            0.02, 0.02, 0.02, 0.02, 0.03, 0.04, 0.05, 0.06, 0.07, 0.08, 0.07, 0.06
+        ])
+        self.normal_hour_p = normal_hour_weights / normal_hour_weights.sum()
+        self.fraud_hour_p = fraud_hour_weights / fraud_hour_weights.sum()
+        # Every device_info JSON string the generators emit, encoded once; rows
+        # draw an index into this pool instead of encoding JSON per row.
+        # Normal: mobiles/tablets split evenly over ios/android, desktops over
+        # the desktop OSes. Fraud: 40% a suspicious bot, otherwise a mobile
+        # (70%) or desktop (30%) on ios/android/windows.
+        normal_devices = {
+            ('mobile', 'ios'): 0.3, ('mobile', 'android'): 0.3,
+            ('desktop', 'windows'): 0.1, ('desktop', 'macos'): 0.1, ('desktop', 'linux'): 0.1,
+            ('tablet', 'ios'): 0.05, ('tablet', 'android'): 0.05
+        }
+        fraud_devices = {
+            (device_type, device_os): 0.6 * type_p / 3
+            for device_type, type_p in (('mobile', 0.7), ('desktop', 0.3))
+            for device_os in ('ios', 'android', 'windows')
+        }
+        device_pairs = list(dict.fromkeys([*normal_devices, *fraud_devices]))
+        suspicious_device = {'device_type': 'unknown', 'os': 'unknown', 'user_agent': 'suspicious_bot'}
+        self.device_info_pool = np.array(
+            [json.dumps({'device_type': device_type, 'os': device_os}) for device_type, device_os in device_pairs]
+            + [json.dumps(suspicious_device)],
+            dtype=object
+        )
+        self.normal_device_p = np.array([normal_devices.get(pair, 0.0) for pair in device_pairs] + [0.0])
+        self.fraud_device_p = np.array([fraud_devices.get(pair, 0.0) for pair in device_pairs] + [0.4])
+        
+        # Third IP octet per location, so a location's IPs share a subnet.
+        # crc32 rather than hash(), which is salted per interpreter and would
+        # give every run (and spawned worker) different subnets
+        self.location_ip_octet = np.array(
+            [zlib.crc32(location.encode()) % 255 + 1 for location in self.locations], dtype=np.int32
+        )
+        
+        # One 90-day window shared by the normal and fraud generators
+        self.start_date = pd.Timestamp(datetime.now() - timedelta(days=90))
+        
         # Amount distributions (USD)
         self.normal_amount_mean = 85.0
         self.normal_amount_std = 45.0
         self.fraud_amount_mean = 250.0
         self.fraud_amount_std = 180.0
         
-    def generate_normal_transactions(self) -> pd.DataFrame:
-        """Generate normal (non-fraudulent) transactions."""
-        print(f"Generating {self.num_normal} normal transactions...")
-        
-        transactions = []
-        start_date = datetime.now() - timedelta(days=90)
-        
-        for i in range(self.num_normal):
-            # Generate realistic datetime (more transactions during business hours)
-            hour = np.random.choice(
-                np.arange(24), 
-                p=[0.02, 0.01, 0.01, 0.01, 0.02, 0.03, 0.05, 0.08, 0.09, 0.08, 0.07, 0.06,
-                   0.07, 0.06, 0.06, 0.06, 0.07, 0.08, 0.09, 0.08, 0.07, 0.05, 0.03, 0.02]
-            )
-            
-            # Random date within last 90 days
-            days_ago = np.random.exponential(scale=30)  # More recent transactions
-            days_ago = min(days_ago, 90)
-            transaction_date = start_date + timedelta(days=days_ago, hours=hour, 
-                                                     minutes=np.random.randint(0, 60))
-            
-            # Generate amount (log-normal distribution for realistic amounts)
-            amount = np.random.lognormal(
-                mean=np.log(self.normal_amount_mean), 
-                sigma=self.normal_amount_std / self.normal_amount_mean
-            )
-            amount = max(0.01, min(amount, 1000))  # Clamp between $0.01 and $1000
-            
-            # Select card (some cards have more transactions)
-            card_weights = np.random.exponential(scale=1.0, size=len(self.card_ids))
-            card_weights = card_weights / card_weights.sum()
-            card_id = np.random.choice(self.card_ids, p=card_weights)
-            
-            # Merchant category (weighted by typical spending patterns)
-            category_probs = {
-                'retail': 0.25, 'restaurant': 0.15, 'gas': 0.12, 'grocery': 0.18,
-                'entertainment': 0.08, 'travel': 0.05, 'healthcare': 0.04, 'education': 0.02,
-                'utilities': 0.03, 'online': 0.08
-            }
-            merchant_category = np.random.choice(
-                self.merchant_categories, 
-                p=[category_probs.get(cat, 0.01) for cat in self.merchant_categories]
-            )
-            
-            # Transaction type (mostly purchases)
-            transaction_type = np.random.choice(
-                self.transaction_types, 
-                p=[0.85, 0.08, 0.04, 0.03]
-            )
-            
-            # Generate merchant name
-            merchant_name = f"{merchant_category.title()}_{np.random.randint(1, 1000):04d}"
-            
-            # Location (same as merchant category city)
-            location = np.random.choice(self.locations)
-            
-            # IP address (geographically consistent with location)
-            ip_address = f"192.168.{hash(location) % 255 + 1}.{np.random.randint(1, 255)}"
-            
-            # Device info
-            device_types = ['mobile', 'desktop', 'tablet']
-            device_type = np.random.choice(device_types, p=[0.6, 0.3, 0.1])
-            os_choices = {
-                'mobile': ['ios', 'android'],
-                'desktop': ['windows', 'macos', 'linux'],
-                'tablet': ['ios', 'android']
-            }
-            device_info = json.dumps({
-                'device_type': device_type,
-                'os': np.random.choice(os_choices[device_type])
-            })
-            
-            transactions.append({
-                'id': str(uuid.uuid4()),
-                'card_id': card_id,
-                'amount': round(amount, 2),
-                'merchant_name': merchant_name,
-                'merchant_category': merchant_category,
-                'transaction_date': transaction_date.isoformat(),
-                'transaction_type': transaction_type,
-                'location': location,
-                'ip_address': ip_address,
-                'device_info': device_info,
-                'is_fraud': False,
-                'fraud_score': np.random.uniform(0.0, 0.3),  # Low fraud scores for normal transactions
-                'created_at': transaction_date.isoformat(),
-                'updated_at': transaction_date.isoformat()
-            })
-        
-        return pd.DataFrame(transactions)
+    def merchant_names(self, category_idx: np.ndarray, numbers: np.ndarray) -> np.ndarray:
+        """'<Category>_<number:04d>' per row, built with numpy.char."""
+        names = np.char.add(self.category_titles[category_idx], '_')
+        return np.char.add(names, np.char.zfill(numbers.astype(str), 4)).astype(object)
     
-    def generate_fraudulent_transactions(self) -> pd.DataFrame:
-        """Generate fraudulent transactions with realistic patterns."""
-        print(f"Generating {self.num_fraud} fraudulent transactions...")
-        
-        transactions = []
-        start_date = datetime.now() - timedelta(days=90)
-        
-        for i in range(self.num_fraud):
-            # Fraudulent transactions often occur at unusual hours
-            hour = np.random.choice(
-                np.arange(24), 
-                p=[0.05, 0.06, 0.07, 0.08, 0.06, 0.04, 0.03, 0.02, 0.02, 0.02, 0.02, 0.02,
-                   0.02, 0.02, 0.02, 0.02, 0.03, 0.04, 0.05, 0.06, 0.07, 0.08, 0.07, 0.06]
-            )
-            
-            # More recent transactions (fraud is often time-sensitive)
-            days_ago = np.random.exponential(scale=7)  # More concentrated in recent days
-            days_ago = min(days_ago, 90)
-            transaction_date = start_date + timedelta(days=days_ago, hours=hour, 
-                                                     minutes=np.random.randint(0, 60))
-            
-            # Higher amounts for fraud
-            amount = np.random.lognormal(
-                mean=np.log(self.fraud_amount_mean), 
-                sigma=self.fraud_amount_std / self.fraud_amount_mean
-            )
-            amount = max(10.0, min(amount, 2000))  # Clamp between $10 and $2000
-            
-            # Random card (fraud can target any card)
-            card_id = np.random.choice(self.card_ids)
-            
-            # Fraud patterns in merchant categories
-            fraud_categories = ['online', 'electronics', 'clothing', 'travel', 'entertainment']
-            if np.random.random() < 0.7:  # 70% chance of high-risk category
-                merchant_category = np.random.choice(fraud_categories)
-            else:
-                merchant_category = np.random.choice(self.merchant_categories)
-            
-            # Transaction type (mostly purchases for fraud)
-            transaction_type = np.random.choice(
-                self.transaction_types, 
-                p=[0.95, 0.02, 0.02, 0.01]
-            )
-            
-            # Generate merchant name
-            merchant_name = f"{merchant_category.title()}_{np.random.randint(1, 500):04d}"
-            
-            # Location (often different from card's usual locations)
-            location = np.random.choice(self.locations)
-            
-            # IP address (often suspicious - different geolocation)
-            ip_address = f"10.0.{np.random.randint(1, 255)}.{np.random.randint(1, 255)}"
-            
-            # Device info (often suspicious or unusual)
-            if np.random.random() < 0.4:  # 40% chance of suspicious device
-                device_info = json.dumps({
-                    'device_type': 'unknown',
-                    'os': 'unknown',
-                    'user_agent': 'suspicious_bot'
-                })
-            else:
-                device_type = np.random.choice(['mobile', 'desktop'], p=[0.7, 0.3])
-                device_info = json.dumps({
-                    'device_type': device_type,
-                    'os': np.random.choice(['ios', 'android', 'windows'])
-                })
-            
-            # High fraud scores
-            fraud_score = np.random.uniform(0.6, 0.98)
-            
-            transactions.append({
-                'id': str(uuid.uuid4()),
-                'card_id': card_id,
-                'amount': round(amount, 2),
-                'merchant_name': merchant_name,
-                'merchant_category': merchant_category,
-                'transaction_date': transaction_date.isoformat(),
-                'transaction_type': transaction_type,
-                'location': location,
-                'ip_address': ip_address,
-                'device_info': device_info,
-                'is_fraud': True,
-                'fraud_score': fraud_score,
-                'created_at': transaction_date.isoformat(),
-                'updated_at': transaction_date.isoformat()
-            })
-        
-        return pd.DataFrame(transactions)
+    def generate_normal_transactions(self, n: Optional[int] = None, seed=None) -> pd.DataFrame:
+        """Generate normal (non-fraudulent) transactions (n defaults to num_normal)."""
+        n = self.num_normal if n is None else n
+        rng = np.random.default_rng(seed)
+        
+        # Every column is drawn for all rows at once rather than row by row.
+        # Realistic datetime (more transactions during business hours)
+        hours = rng.choice(24, size=n, p=self.normal_hour_p)
+        
+        # Random date within last 90 days, skewed towards recent ones
+        days_ago = np.minimum(rng.exponential(scale=30, size=n), 90)
+        minutes = rng.integers(0, 60, size=n)
+        transaction_dates = (
+            self.start_date
+            + pd.to_timedelta(days_ago, unit='D')
+            + pd.to_timedelta(hours, unit='h')
+            + pd.to_timedelta(minutes, unit='m')
+        )
+        dates = transaction_dates.values  # datetime64[ns]; formatted once in save_data
+        
+        # Log-normal amounts, clamped between $0.01 and $1000
+        amounts = np.clip(
+            rng.lognormal(
+                mean=np.log(self.normal_amount_mean),
+                sigma=self.normal_amount_std / self.normal_amount_mean,
+                size=n
+            ),
+            0.01, 1000
+        ).round(2)
+        
+        # Select card (some cards have more transactions)
+        card_idx = rng.choice(len(self.card_ids), size=n, p=self.card_weights)
+        
+        # Merchant category (weighted by typical spending patterns)
+        category_idx = rng.choice(len(self.merchant_categories), size=n, p=self.merchant_cat_p)
+        
+        # Transaction type (mostly purchases)
+        type_idx = rng.choice(len(self.transaction_types), size=n, p=self.normal_type_p)
+        
+        # Merchant name
+        merchant_numbers = rng.integers(1, 1000, size=n)
+        merchant_names = self.merchant_names(category_idx, merchant_numbers)
+        
+        # Location and an IP address consistent with it
+        location_idx = rng.integers(0, len(self.locations), size=n)
+        ip_addresses = ip_address_strings(
+            '192.168.', self.location_ip_octet[location_idx], rng.integers(1, 255, size=n)
+        )
+        
+        # Device info: mobiles and tablets run ios/android, desktops a desktop OS
+        device_info = self.device_info_pool[
+            rng.choice(len(self.device_info_pool), size=n, p=self.normal_device_p)
+        ]
+        
+        return pd.DataFrame({
+            'id': uuid4_batch(n),
+            'card_id': pd.Categorical.from_codes(card_idx, categories=self.card_ids),
+            'amount': amounts,
+            'merchant_name': merchant_names,
+            'merchant_category': pd.Categorical.from_codes(category_idx, categories=self.merchant_categories),
+            'transaction_date': dates,
+            'transaction_type': pd.Categorical.from_codes(type_idx, categories=self.transaction_types),
+            'location': pd.Categorical.from_codes(location_idx, categories=self.locations),
+            'ip_address': ip_addresses,
+            'device_info': device_info,
+            'is_fraud': np.zeros(n, dtype=bool),
+            'fraud_score': rng.uniform(0.0, 0.3, size=n),  # Low fraud scores for normal transactions
+            'created_at': dates,
+            'updated_at': dates
+        })
     
-    def generate_data(self) -> pd.DataFrame:
-        """Generate complete synthetic dataset."""
-        print(f"Generating {self.num_samples} synthetic transactions...")
-        print(f"Fraud ratio: {self.fraud_ratio:.2%}")
+    def generate_fraudulent_transactions(self, n: Optional[int] = None, seed=None) -> pd.DataFrame:
+        """Generate fraudulent transactions with realistic patterns (n defaults to num_fraud)."""
+        n = self.num_fraud if n is None else n
+        rng = np.random.default_rng(seed)
+        
+        # Fraudulent transactions often occur at unusual hours
+        hours = rng.choice(24, size=n, p=self.fraud_hour_p)
+        
+        # More recent transactions (fraud is often time-sensitive)
+        days_ago = np.minimum(rng.exponential(scale=7, size=n), 90)
+        minutes = rng.integers(0, 60, size=n)
+        transaction_dates = (
+            self.start_date
+            + pd.to_timedelta(days_ago, unit='D')
+            + pd.to_timedelta(hours, unit='h')
+            + pd.to_timedelta(minutes, unit='m')
+        )
+        dates = transaction_dates.values  # datetime64[ns]; formatted once in save_data
+        
+        # Higher amounts for fraud, clamped between $10 and $2000
+        amounts = np.clip(
+            rng.lognormal(
+                mean=np.log(self.fraud_amount_mean),
+                sigma=self.fraud_amount_std / self.fraud_amount_mean,
+                size=n
+            ),
+            10.0, 2000
+        ).round(2)
         
-        # Generate normal and fraudulent transactions
-        normal_df = self.generate_normal_transactions()
-        fraud_df = self.generate_fraudulent_transactions()
+        # Random card (fraud can target any card)
+        card_idx = rng.integers(0, len(self.card_ids), size=n)
         
-        # Combine and shuffle
-        combined_df = pd.concat([normal_df, fraud_df], ignore_index=True)
-        combined_df = combined_df.sample(frac=1, random_state=42).reset_index(drop=True)
+        # 70% of fraud lands in a high-risk merchant category
+        fraud_categories = ['online', 'electronics', 'clothing', 'travel', 'entertainment']
+        fraud_category_idx = np.array([self.merchant_categories.index(cat) for cat in fraud_categories])
+        category_idx = np.where(
+            rng.random(size=n) < 0.7,
+            rng.choice(fraud_category_idx, size=n),
+            rng.integers(0, len(self.merchant_categories), size=n)
+        )
         
-        # Sort by transaction date for realistic sequence
-        combined_df['transaction_date'] = pd.to_datetime(combined_df['transaction_date'])
-        combined_df = combined_df.sort_values('transaction_date').reset_index(drop=True)
+        # Transaction type (mostly purchases for fraud)
+        type_idx = rng.choice(len(self.transaction_types), size=n, p=self.fraud_type_p)
         
-        # Convert dates back to string format
-        combined_df['transaction_date'] = combined_df['transaction_date'].dt.isoformat()
+        # Merchant name
+        merchant_numbers = rng.integers(1, 500, size=n)
+        merchant_names = self.merchant_names(category_idx, merchant_numbers)
+        
+        # Location (often different from card's usual locations)
+        location_idx = rng.integers(0, len(self.locations), size=n)
+        
+        # IP address (often suspicious - different geolocation)
+        ip_addresses = ip_address_strings(
+            '10.0.', rng.integers(1, 255, size=n), rng.integers(1, 255, size=n)
+        )
+        
+        # Device info (40% suspicious, the rest an ordinary-looking device)
+        device_info = self.device_info_pool[
+            rng.choice(len(self.device_info_pool), size=n, p=self.fraud_device_p)
+        ]
+        
+        return pd.DataFrame({
+            'id': uuid4_batch(n),
+            'card_id': pd.Categorical.from_codes(card_idx, categories=self.card_ids),
+            'amount': amounts,
+            'merchant_name': merchant_names,
+            'merchant_category': pd.Categorical.from_codes(category_idx, categories=self.merchant_categories),
+            'transaction_date': dates,
+            'transaction_type': pd.Categorical.from_codes(type_idx, categories=self.transaction_types),
+            'location': pd.Categorical.from_codes(location_idx, categories=self.locations),
+            'ip_address': ip_addresses,
+            'device_info': device_info,
+            'is_fraud': np.ones(n, dtype=bool),
+            'fraud_score': rng.uniform(0.6, 0.98, size=n),  # High fraud scores
+            'created_at': dates,
+            'updated_at': dates
+        })
+    
+    def chunk_plan(self, chunk_size: int) -> List[Tuple[int, int]]:
+        """(normal, fraud) row counts for each chunk of at most chunk_size rows, fraud spread evenly."""
+        bounds = list(range(0, self.num_samples, chunk_size)) + [self.num_samples]
+        fraud_bounds = [self.num_fraud * bound // max(self.num_samples, 1) for bound in bounds]
+        plan = []
+        for i in range(len(bounds) - 1):
+            n_fraud = fraud_bounds[i + 1] - fraud_bounds[i]
+            plan.append((bounds[i + 1] - bounds[i] - n_fraud, n_fraud))
+        return plan or [(0, 0)]
+    
+    def generate_chunk(self, n_normal: int, n_fraud: int, seed: np.random.SeedSequence) -> pd.DataFrame:
+        """One chunk of normal and fraudulent transactions, sorted by date."""
+        normal_seed, fraud_seed = seed.spawn(2)
+        normal_df = self.generate_normal_transactions(n_normal, normal_seed)
+        fraud_df = self.generate_fraudulent_transactions(n_fraud, fraud_seed)
+        
+        # Combine (both halves share the same categories, so the
+        # low-cardinality columns stay categorical) and sort by transaction
+        # date for realistic sequence, on the int64 view of the datetime64
+        # column. Dates are continuous, so the sort alone interleaves normal
+        # and fraud rows; a shuffle first would only add a full copy.
+        combined_df = pd.concat([normal_df, fraud_df], ignore_index=True, copy=False)
+        order = np.argsort(combined_df['transaction_date'].values.view('i8'))
+        return combined_df.take(order).reset_index(drop=True)
+    
+    def generate_chunks(self, chunk_size: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Yield the dataset as DataFrames of at most chunk_size rows.
+        
+        Each chunk has its own random stream spawned from the seed sequence
+        and is sorted by date on its own. Chunks are generated on a process
+        pool with at most `workers` in flight, so memory stays proportional
+        to chunk_size rather than num_samples.
+        """
+        print(f"Generating {self.num_samples} synthetic transactions...")
+        print(f"Fraud ratio: {self.fraud_ratio:.2%}")
+        
+        plan = self.chunk_plan(max(chunk_size, 1))
+        seeds = self.seed_seq.spawn(len(plan))
+        if len(plan) == 1 or self.workers == 1:
+            for (n_normal, n_fraud), seed in zip(plan, seeds):
+                yield self.generate_chunk(n_normal, n_fraud, seed)
+            return
+        
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(plan))) as executor:
+            pending = deque()
+            for (n_normal, n_fraud), seed in zip(plan, seeds):
+                pending.append(executor.submit(self.generate_chunk, n_normal, n_fraud, seed))
+                if len(pending) >= self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    def generate_data(self) -> pd.DataFrame:
+        """Generate complete synthetic dataset in memory (one chunk, fully sorted by date)."""
+        combined_df = pd.concat(self.generate_chunks(self.num_samples), ignore_index=True)
         
         print(f"Generated dataset shape: {combined_df.shape}")
         print(f"Actual fraud ratio: {combined_df['is_fraud'].mean():.2%}")
@@ -254,43 +541,36 @@ class SyntheticDataGenerator:
         
         return combined_df
     
-    def save_data(self, df: pd.DataFrame, output_path: str):
-        """Save generated data to CSV file."""
-        print(f"Saving data to {output_path}...")
+    def save_data(self, df: pd.DataFrame, output_path: str, fmt: Optional[str] = None):
+        """Save generated data to a CSV or Parquet file."""
+        return self.save_chunks([df], output_path, fmt)
+    
+    def save_chunks(self, chunks: Iterable[pd.DataFrame], output_path: str, fmt: Optional[str] = None):
+        """
+        Write chunks to one file as they arrive and save the summary statistics.
+        
+        fmt is 'csv' or 'parquet'; by default it follows the output extension.
+        """
+        fmt = fmt or output_format(output_path)
+        print(f"Saving data to {output_path} ({fmt})...")
         
         # Create output directory if it doesn't exist
         output_dir = Path(output_path).parent
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Save to CSV
-        df.to_csv(output_path, index=False)
-        
-        # Generate summary statistics
-        summary = {
-            'total_samples': len(df),
-            'fraud_samples': df['is_fraud'].sum(),
-            'normal_samples': len(df) - df['is_fraud'].sum(),
-            'fraud_ratio': df['is_fraud'].mean(),
-            'date_range': {
-                'start': df['transaction_date'].min(),
-                'end': df['transaction_date'].max()
-            },
-            'amount_stats': {
-                'mean': df['amount'].mean(),
-                'std': df['amount'].std(),
-                'min': df['amount'].min(),
-                'max': df['amount'].max()
-            },
-            'unique_cards': df['card_id'].nunique(),
-            'unique_merchants': df['merchant_name'].nunique(),
-            'merchant_categories': df['merchant_category'].value_counts().to_dict(),
-            'transaction_types': df['transaction_type'].value_counts().to_dict()
-        }
+        # Aggregates are updated per chunk so no chunk is kept after it has
+        # been written
+        stats = RunningSummary()
+        with chunk_writer(output_path, fmt) as write:
+            for chunk in chunks:
+                write(chunk)
+                stats.update(chunk)
+                print(f"  wrote {stats.count} of {self.num_samples} rows")
+        summary = stats.to_dict()
         
         # Save summary
-        summary_path = output_path.replace('.csv', '_summary.json')
-        with open(summary_path, 'w') as f:
-            json.dump(summary, f, indent=2)
+        summary_path = summary_path_for(output_path)
+        write_summary(summary, summary_path)
         
         print(f"Data saved successfully!")
         print(f"Summary statistics saved to: {summary_path}")
@@ -301,11 +581,19 @@ class SyntheticDataGenerator:
 def main():
     parser = argparse.ArgumentParser(description='Generate synthetic transaction data for testing')
     parser.add_argument('--output', default='data/synthetic_transactions.csv', 
-                       help='Output CSV file path')
+                       help='Output file path (.csv, .csv.gz or .parquet)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None,
+                       help='Output format (default: from the --output extension, csv otherwise); '
+                            'parquet needs pyarrow')
     parser.add_argument('--samples', type=int, default=10000, 
                        help='Number of samples to generate')
     parser.add_argument('--fraud-ratio', type=float, default=0.05, 
                        help='Ratio of fraudulent transactions (0.0-1.0)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes for generation (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_ROWS,
+                       help='Rows generated and written per chunk; rows are sorted by date '
+                            'within each chunk (default: %(default)s)')
     
     args = parser.parse_args()
     
@@ -314,16 +602,23 @@ def main():
         print("Error: Number of samples must be positive")
         sys.exit(1)
     
+    if args.chunk_size <= 0:
+        print("Error: Chunk size must be positive")
+        sys.exit(1)
+    
     if not 0 <= args.fraud_ratio <= 1:
         print("Error: Fraud ratio must be between 0.0 and 1.0")
         sys.exit(1)
     
+    # --format parquet with the default (or any .csv) output path writes a .parquet file
+    if args.format == 'parquet' and args.output.endswith('.csv'):
+        args.output = args.output[:-len('.csv')] + '.parquet'
+    
     # Generate data
-    generator = SyntheticDataGenerator(args.samples, args.fraud_ratio)
+    generator = SyntheticDataGenerator(args.samples, args.fraud_ratio, workers=args.workers)
     
     try:
-        df = generator.generate_data()
-        summary = generator.save_data(df, args.output)
+        summary = generator.save_chunks(generator.generate_chunks(args.chunk_size), args.output, args.format)
         
         print("\nData generation completed successfully!")
         print(f"Output file: {args.output}")
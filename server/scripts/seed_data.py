@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from uuid import uuid4
 
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 
 # Ensure we can import the app package when executing as a script
@@ -55,39 +56,33 @@ def create_sample_cards(session: Session, user: User) -> list[Card]:
     if cards:
         return cards
 
-    sample_cards = [
-        Card(
+    today = datetime.utcnow().date()
+    rows = [
+        dict(
             user_id=user.id,
             card_number="4111111111111111",
             card_type=CardType.CREDIT,
             card_brand="Visa",
-            expiry_date=datetime.utcnow().date().replace(year=datetime.utcnow().year + 3),
+            expiry_date=today.replace(year=today.year + 3),
             cvv="123",
             billing_address="123 Fraud St, Secure City, SC 90210",
         ),
-        Card(
+        dict(
             user_id=user.id,
             card_number="5500000000000004",
             card_type=CardType.DEBIT,
             card_brand="Mastercard",
-            expiry_date=datetime.utcnow().date().replace(year=datetime.utcnow().year + 2),
+            expiry_date=today.replace(year=today.year + 2),
             cvv="456",
             billing_address="456 Trust Ave, Safe Town, ST 10001",
         ),
     ]
-    session.add_all(sample_cards)
-    session.flush()
-    return sample_cards
-
+    return list(session.scalars(insert(Card).returning(Card), rows))
 
-def create_sample_transactions(session: Session, card: Card) -> list[Transaction]:
-    existing = session.query(Transaction).filter(Transaction.card_id == card.id).limit(3).all()
-    if existing:
-        return existing
 
-    now = datetime.utcnow()
-    txns = [
-        Transaction(
+def sample_transaction_rows(card: Card, now: datetime) -> list[dict]:
+    return [
+        dict(
             card_id=card.id,
             amount=Decimal("125.45"),
             merchant_name="Retail_0421",
@@ -100,7 +95,7 @@ def create_sample_transactions(session: Session, card: Card) -> list[Transaction
             is_fraud=False,
             fraud_score=0.12,
         ),
-        Transaction(
+        dict(
             card_id=card.id,
             amount=Decimal("899.99"),
             merchant_name="Electronics_0784",
@@ -114,38 +109,83 @@ def create_sample_transactions(session: Session, card: Card) -> list[Transaction
             fraud_score=0.91,
         ),
     ]
-    session.add_all(txns)
-    session.flush()
-    return txns
 
 
-def attach_prediction_and_alert(session: Session, transaction: Transaction) -> None:
-    if not transaction.is_fraud:
-        return
+def create_sample_transactions(session: Session, cards: list[Card]) -> list[Transaction]:
+    """Seed two transactions on every card that has none; reuse up to 3 existing ones otherwise."""
+    card_ids = [card.id for card in cards]
+    position = (
+        func.row_number()
+        .over(partition_by=Transaction.card_id, order_by=Transaction.transaction_date)
+        .label("position")
+    )
+    first_rows = (
+        select(Transaction.id, position)
+        .where(Transaction.card_id.in_(card_ids))
+        .subquery()
+    )
+    existing = list(session.scalars(
+        select(Transaction)
+        .join(first_rows, Transaction.id == first_rows.c.id)
+        .where(first_rows.c.position <= 3)
+    ))
+
+    seeded_cards = {txn.card_id for txn in existing}
+    now = datetime.utcnow()
+    rows = [
+        row
+        for card in cards
+        if card.id not in seeded_cards
+        for row in sample_transaction_rows(card, now)
+    ]
+    if not rows:
+        return existing
+    # One multi-row INSERT ... RETURNING for every card
+    return existing + list(session.scalars(insert(Transaction).returning(Transaction), rows))
 
-    prediction = session.query(Prediction).filter(Prediction.transaction_id == transaction.id).one_or_none()
-    if not prediction:
-        prediction = Prediction(
-            transaction_id=transaction.id,
+
+def attach_predictions_and_alerts(session: Session, user: User, transactions: list[Transaction]) -> None:
+    fraud_ids = [txn.id for txn in transactions if txn.is_fraud]
+    if not fraud_ids:
+        return
+    scores = {txn.id: txn.fraud_score for txn in transactions}
+
+    predicted = set(session.scalars(
+        select(Prediction.transaction_id).where(Prediction.transaction_id.in_(fraud_ids))
+    ))
+    prediction_rows = [
+        dict(
+            transaction_id=txn_id,
+            user_id=user.id,
             model_version="v1.0.0",
-            fraud_probability=transaction.fraud_score or 0.5,
+            fraud_probability=scores[txn_id] or 0.5,
             prediction_class=True,
             confidence_score=0.88,
             feature_importance={"amount": 0.45, "merchant_category": 0.22},
             processing_time_ms=37,
             feedback=PredictionFeedback.UNKNOWN,
         )
-        session.add(prediction)
-
-    alert = session.query(FraudAlert).filter(FraudAlert.transaction_id == transaction.id).one_or_none()
-    if not alert:
-        alert = FraudAlert(
-            transaction_id=transaction.id,
+        for txn_id in fraud_ids
+        if txn_id not in predicted
+    ]
+    if prediction_rows:
+        session.execute(insert(Prediction), prediction_rows)
+
+    alerted = set(session.scalars(
+        select(FraudAlert.transaction_id).where(FraudAlert.transaction_id.in_(fraud_ids))
+    ))
+    alert_rows = [
+        dict(
+            transaction_id=txn_id,
             alert_level=AlertLevel.HIGH,
             alert_message="Large electronics purchase flagged as high risk.",
             is_resolved=False,
         )
-        session.add(alert)
+        for txn_id in fraud_ids
+        if txn_id not in alerted
+    ]
+    if alert_rows:
+        session.execute(insert(FraudAlert), alert_rows)
 
 
 def seed() -> None:
@@ -153,10 +193,8 @@ def seed() -> None:
     try:
         admin = get_or_create_admin(session)
         cards = create_sample_cards(session, admin)
-        for card in cards:
-            transactions = create_sample_transactions(session, card)
-            for txn in transactions:
-                attach_prediction_and_alert(session, txn)
+        transactions = create_sample_transactions(session, cards)
+        attach_predictions_and_alerts(session, admin, transactions)
         session.commit()
         print("✅ Database seed completed. Admin credentials: admin@fraudwatch.ai / ChangeMe123!")
     except Exception as exc:  # pragma: no cover
@@ -9,7 +9,7 @@ Usage:
 
 import os
 import sys
-import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import psycopg2
 import redis
 from pathlib import Path
@@ -36,6 +36,8 @@ class LocalEnvironmentSetup:
             'user': 'fraud_user',
             'password': 'fraud_pass'
         }
+        # Matches DATABASE_POOL_SIZE in the generated .env
+        self.db_warmup_connections = 5
         
         # Redis configuration
         self.redis_config = {
@@ -51,7 +53,12 @@ class LocalEnvironmentSetup:
         env_content = f"""
 # Local Development Environment Variables
 DATABASE_URL=postgresql://{self.db_config['user']}:{self.db_config['password']}@{self.db_config['host']}:{self.db_config['port']}/{self.db_config['database']}
+DATABASE_POOL_SIZE=5
+DATABASE_MAX_OVERFLOW=15
+DATABASE_POOL_RECYCLE=1800
+DATABASE_CONNECT_TIMEOUT=5
 REDIS_URL=redis://{self.redis_config['host']}:{self.redis_config['port']}/{self.redis_config['db']}
+REDIS_POOL_MAX=50
 
 # Application Settings
 DEBUG=true
@@ -88,6 +95,7 @@ UPLOAD_DIR=./uploads
             f.write(env_content)
         
         print(f"✅ .env file created: {self.env_file}")
+        return True
     
     def setup_database(self):
         """Setup PostgreSQL database."""
@@ -129,6 +137,11 @@ UPLOAD_DIR=./uploads
             test_conn.close()
             print("✅ Database connection test successful")
             
+            # Warm up: open as many connections as the app's base pool at once
+            with ThreadPoolExecutor(max_workers=self.db_warmup_connections) as executor:
+                list(executor.map(lambda _: self._ping_database(), range(self.db_warmup_connections)))
+            print(f"✅ Database warmup with {self.db_warmup_connections} concurrent connections")
+            
         except psycopg2.OperationalError as e:
             print(f"❌ Database connection failed: {e}")
             print("Please ensure PostgreSQL is running and accessible")
@@ -136,21 +149,34 @@ UPLOAD_DIR=./uploads
         
         return True
     
+    def _ping_database(self):
+        """Open a connection to the app database and run SELECT 1."""
+        conn = psycopg2.connect(**self.db_config, connect_timeout=5)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        finally:
+            conn.close()
+    
     def setup_redis(self):
         """Setup Redis connection."""
         print("Setting up Redis...")
         
         try:
-            r = redis.Redis(**self.redis_config)
-            r.ping()
-            print("✅ Redis connection successful")
+            pool = redis.ConnectionPool(**self.redis_config, max_connections=50)
+            r = redis.Redis(connection_pool=pool)
             
-            # Test basic operations
-            r.set('test_key', 'test_value', ex=10)
-            value = r.get('test_key')
+            # Connection and basic operations in a single round trip
+            pipe = r.pipeline(transaction=False)
+            pipe.ping()
+            pipe.set('test_key', 'test_value', ex=10)
+            pipe.get('test_key')
+            pipe.delete('test_key')
+            _, _, value, _ = pipe.execute()
+            print("✅ Redis connection successful")
             if value == b'test_value':
                 print("✅ Redis operations working correctly")
-                r.delete('test_key')
+            pool.disconnect()
             
         except redis.ConnectionError as e:
             print(f"❌ Redis connection failed: {e}")
@@ -172,6 +198,7 @@ UPLOAD_DIR=./uploads
         for directory in directories:
             directory.mkdir(parents=True, exist_ok=True)
             print(f"✅ Created directory: {directory}")
+        return True
     
     def create_dummy_model(self):
         """Create a dummy ML model for testing."""
@@ -181,55 +208,23 @@ UPLOAD_DIR=./uploads
             # Change to server directory
             os.chdir(self.server_dir)
             
-            # Create dummy model script
-            dummy_script = self.server_dir / "scripts" / "create_dummy_model.py"
-            dummy_script.parent.mkdir(parents=True, exist_ok=True)
+            # TensorFlow is imported here, once, rather than in a child interpreter
+            from app.ml.model import FraudDetectionLSTM
             
-            with open(dummy_script, 'w') as f:
-                f.write("""
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-import tensorflow as tf
-import numpy as np
-from app.ml.model import FraudDetectionModel
-
-def create_dummy_model():
-    print("Creating dummy LSTM model...")
-    
-    # Create model instance
-    model = FraudDetectionModel()
-    
-    # Build model with dummy input shape
-    input_shape = (10, 20)  # sequence_length=10, features=20
-    model.build_model(input_shape)
-    
-    # Save model
-    model_path = "ml_models/lstm_fraud_model.h5"
-    model.save_model(model_path)
-    
-    print(f"✅ Dummy model saved to: {model_path}")
-    
-    # Test loading
-    test_model = FraudDetectionModel()
-    test_model.load_model(model_path)
-    print("✅ Model loading test successful")
-
-if __name__ == "__main__":
-    create_dummy_model()
-""")
+            # Build model with dummy input shape
+            model = FraudDetectionLSTM()
+            input_shape = (10, 20)  # sequence_length=10, features=20
+            model.build_model(input_shape)
             
-            # Run dummy model creation
-            result = subprocess.run([sys.executable, str(dummy_script)], 
-                                  capture_output=True, text=True)
+            # Save model
+            model_path = "ml_models/lstm_fraud_model.h5"
+            model.save_model(model_path)
+            print(f"✅ Dummy model saved to: {model_path}")
             
-            if result.returncode == 0:
-                print("✅ Dummy model created successfully")
-                print(result.stdout)
-            else:
-                print(f"❌ Failed to create dummy model: {result.stderr}")
-                return False
+            # Test loading
+            FraudDetectionLSTM(model_path)
+            print("✅ Model loading test successful")
+            print("✅ Dummy model created successfully")
                 
         except Exception as e:
             print(f"❌ Error creating dummy model: {e}")
@@ -245,19 +240,13 @@ if __name__ == "__main__":
             os.chdir(self.server_dir)
             
             # Run Alembic migrations
-            result = subprocess.run([
-                sys.executable, "-m", "alembic", "upgrade", "head"
-            ], capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print("✅ Database migrations completed successfully")
-                print(result.stdout)
-            else:
-                print(f"❌ Migration failed: {result.stderr}")
-                return False
+            from alembic import command
+            from alembic.config import Config
+            command.upgrade(Config(str(self.server_dir / "alembic.ini")), "head")
+            print("✅ Database migrations completed successfully")
                 
         except Exception as e:
-            print(f"❌ Error running migrations: {e}")
+            print(f"❌ Migration failed: {e}")
             return False
         
         return True
@@ -270,47 +259,30 @@ if __name__ == "__main__":
             os.chdir(self.server_dir)
             
             # Test imports
-            test_script = """
-import sys
-sys.path.append('.')
-
-try:
-    from app.main import app
-    from app.database import engine
-    from app.ml.inference import PredictionEngine
-    print("✅ All imports successful")
-    
-    # Test database connection
-    import asyncio
-    async def test_db():
-        async with engine.begin() as conn:
-            await conn.execute("SELECT 1")
-        print("✅ Database connection test successful")
-    
-    asyncio.run(test_db())
-    
-    # Test model loading
-    engine = PredictionEngine()
-    print("✅ PredictionEngine loaded successfully")
-    
-except Exception as e:
-    print(f"❌ Backend test failed: {e}")
-    sys.exit(1)
-"""
+            import asyncio
+            from sqlalchemy import text
+            from app.main import app  # noqa: F401
+            from app.database import async_engine
+            from app.ml.inference import PredictionEngine
+            print("✅ All imports successful")
+            
+            # Test database connection
+            async def test_db():
+                async with async_engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                await async_engine.dispose()
             
-            result = subprocess.run([sys.executable, "-c", test_script], 
-                                  capture_output=True, text=True)
+            asyncio.run(test_db())
+            print("✅ Database connection test successful")
             
-            if result.returncode == 0:
-                print("✅ Backend startup test successful")
-                print(result.stdout)
-                return True
-            else:
-                print(f"❌ Backend startup test failed: {result.stderr}")
-                return False
+            # Test model loading
+            PredictionEngine()
+            print("✅ PredictionEngine loaded successfully")
+            print("✅ Backend startup test successful")
+            return True
                 
         except Exception as e:
-            print(f"❌ Error testing backend: {e}")
+            print(f"❌ Backend startup test failed: {e}")
             return False
     
     def generate_test_data(self):
@@ -320,24 +292,13 @@ except Exception as e:
         try:
             os.chdir(self.server_dir)
             
-            # Run data generation script
-            script_path = "scripts/generate_test_data.py"
+            # Run data generation in this interpreter
+            from scripts.generate_test_data import SyntheticDataGenerator
             output_path = "data/synthetic_transactions.csv"
-            
-            result = subprocess.run([
-                sys.executable, script_path,
-                "--output", output_path,
-                "--samples", "1000",
-                "--fraud-ratio", "0.05"
-            ], capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print("✅ Test data generated successfully")
-                print(result.stdout)
-                return True
-            else:
-                print(f"❌ Test data generation failed: {result.stderr}")
-                return False
+            generator = SyntheticDataGenerator(1000, 0.05)
+            generator.save_data(generator.generate_data(), output_path)
+            print("✅ Test data generated successfully")
+            return True
                 
         except Exception as e:
             print(f"❌ Error generating test data: {e}")
@@ -348,27 +309,30 @@ except Exception as e:
         print("🚀 Starting local environment setup...")
         print(f"Project root: {self.project_root}")
         
-        steps = [
-            ("Create .env file", self.create_env_file),
-            ("Setup database", self.setup_database),
-            ("Setup Redis", self.setup_redis),
-            ("Create directories", self.create_directories),
-            ("Create dummy model", self.create_dummy_model),
-            ("Run migrations", self.run_database_migrations),
-            ("Test backend", self.test_backend_startup),
-            ("Generate test data", self.generate_test_data),
+        # Steps in one stage are independent of each other and run in parallel;
+        # each stage starts once the previous one has finished
+        stages = [
+            [("Create .env file", self.create_env_file), ("Create directories", self.create_directories)],
+            [("Setup database", self.setup_database), ("Setup Redis", self.setup_redis)],
+            [("Run migrations", self.run_database_migrations)],
+            [("Create dummy model", self.create_dummy_model), ("Generate test data", self.generate_test_data)],
+            [("Test backend", self.test_backend_startup)],
         ]
         
         failed_steps = []
         
-        for step_name, step_func in steps:
-            print(f"\n📋 {step_name}...")
-            try:
-                if not step_func():
-                    failed_steps.append(step_name)
-            except Exception as e:
-                print(f"❌ {step_name} failed with exception: {e}")
-                failed_steps.append(step_name)
+        for stage in stages:
+            print(f"\n📋 {' + '.join(step_name for step_name, _ in stage)}...")
+            with ThreadPoolExecutor(max_workers=len(stage)) as executor:
+                futures = {executor.submit(step_func): step_name for step_name, step_func in stage}
+                for future in as_completed(futures):
+                    step_name = futures[future]
+                    try:
+                        if not future.result():
+                            failed_steps.append(step_name)
+                    except Exception as e:
+                        print(f"❌ {step_name} failed with exception: {e}")
+                        failed_steps.append(step_name)
         
         print("\n" + "="*50)
         print("🎯 SETUP SUMMARY")
@@ -12,24 +12,91 @@ import sys
 import argparse
 import pandas as pd
 import numpy as np
+import orjson
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Tuple, Dict, Any
+import hashlib
+import inspect
 import json
 import pickle
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+try:
+    import pyarrow  # noqa: F401  (multi-threaded CSV parsing when installed)
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
 import tensorflow as tf
-from sklearn.model_selection import train_test_split
+from joblib import Memory, dump
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, roc_curve
+from sklearn.metrics import (
+    accuracy_score, classification_report, confusion_matrix,
+    precision_recall_fscore_support, roc_auc_score, roc_curve
+)
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-from app.ml.model import FraudDetectionModel
-from app.ml.preprocessing import FeaturePreprocessor
+from app.ml import preprocessing
+from app.ml.model import FraudDetectionLSTM
+from app.ml.preprocessing import FeatureEngineer
+
+
+# Kaggle columns the pipeline uses (V3-V28 are never selected) and their
+# narrowest safe dtypes
+KAGGLE_DTYPES = {
+    'Time': np.float32,
+    'V1': np.float32,
+    'V2': np.float32,
+    'Amount': np.float32,
+    'Class': np.int8,
+}
+
+
+# Fitted preprocessors from earlier runs, keyed on the training data and the
+# source of the preprocessing module
+preprocessor_cache = Memory(Path('.cache') / 'prep', verbose=0)
+
+
+def feature_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Column arrays in the form FeatureEngineer.build_feature_matrix expects."""
+    columns = {
+        'amount': df['amount'].to_numpy(dtype=np.float32),
+        'transaction_date': df['transaction_date'].to_numpy(dtype='datetime64[us]'),
+        # Card ids are UUID strings at inference time
+        'card_id': df['card_id'].astype(str).to_numpy(dtype=object),
+    }
+    for column in ('merchant_category', 'transaction_type', 'device_info',
+                   'location', 'ip_address', 'merchant_name'):
+        columns[column] = df[column].to_numpy(dtype=object)
+    return columns
+
+
+def fit_preprocessor(data_hash: int, preprocessor_version: str, train_df: pd.DataFrame):
+    """Fit the feature scaler on train_df; returns (train_features, preprocessor)."""
+    preprocessor = FeatureEngineer()
+    # Fit on raw features, not through a scaler saved by an earlier run
+    preprocessor._scaler = None
+    raw_features = preprocessor.build_feature_matrix(feature_columns(train_df))
+    preprocessor._scaler = StandardScaler().fit(raw_features)
+    return preprocessor._scaler.transform(raw_features).astype(np.float32), preprocessor
+
+
+# train_df itself is left out of the cache key; data_hash stands in for it
+cached_fit_preprocessor = preprocessor_cache.cache(fit_preprocessor, ignore=['train_df'])
+
+
+# Test sequences per compiled inference call in evaluate_model
+INFERENCE_BATCH = 4096
+
+
+def write_json(path: Path, obj: Any):
+    """Write obj as indented JSON; numpy arrays and scalars are serialized natively."""
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
 
 
 class ModelTrainer:
@@ -41,8 +108,8 @@ class ModelTrainer:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
         # Initialize components
-        self.model = FraudDetectionModel()
-        self.preprocessor = FeaturePreprocessor()
+        self.model = FraudDetectionLSTM()
+        self.preprocessor = FeatureEngineer()
         
         # Training parameters
         self.sequence_length = 10
@@ -55,36 +122,49 @@ class ModelTrainer:
         print("Loading Kaggle Credit Card Fraud dataset...")
         
         # Load data
-        df = pd.read_csv(self.data_path)
+        df = pd.read_csv(
+            self.data_path,
+            usecols=list(KAGGLE_DTYPES),
+            dtype=KAGGLE_DTYPES,
+            engine=CSV_ENGINE
+        )
         print(f"Dataset shape: {df.shape}")
         print(f"Class distribution: {df['Class'].value_counts().to_dict()}")
         
-        # Convert Time to datetime features
-        df['datetime'] = pd.to_datetime(df['Time'], unit='s', origin='2013-09-01')
-        df['hour'] = df['datetime'].dt.hour
-        df['day'] = df['datetime'].dt.day
-        df['month'] = df['datetime'].dt.month
-        df['day_of_week'] = df['datetime'].dt.dayofweek
-        df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+        # Convert Time (seconds since 2013-09-01, a Sunday) to datetime
+        # features with integer arithmetic instead of .dt accessor passes
+        seconds = df['Time'].to_numpy().astype(np.int64)
+        days = seconds // 86400
+        dates = np.datetime64('2013-09-01', 'D') + days.astype('timedelta64[D]')
+        months = dates.astype('datetime64[M]')
+        df['transaction_date'] = dates.astype('datetime64[s]') + (seconds % 86400).astype('timedelta64[s]')
+        df['hour'] = ((seconds // 3600) % 24).astype(np.int8)
+        df['day'] = ((dates - months).astype(np.int64) + 1).astype(np.int8)
+        df['month'] = (months.astype(np.int64) % 12 + 1).astype(np.int8)
+        df['day_of_week'] = ((days + 6) % 7).astype(np.int8)  # Monday=0, as .dt.dayofweek
+        df['is_weekend'] = (df['day_of_week'] >= 5).astype(np.int8)
+        
+        # One seeded PCG64 generator for every synthetic column (no global state)
+        rng = np.random.default_rng(self.random_state)
+        n = len(df)
         
         # Add synthetic card_id (simulate multiple cards)
-        np.random.seed(self.random_state)
         num_cards = 1000
-        df['card_id'] = np.random.choice(range(1, num_cards + 1), size=len(df))
+        df['card_id'] = rng.integers(1, num_cards + 1, size=n)
         
         # Add synthetic merchant categories
         merchant_categories = [
             'retail', 'restaurant', 'gas', 'grocery', 'entertainment',
             'travel', 'healthcare', 'education', 'utilities', 'online'
         ]
-        df['merchant_category'] = np.random.choice(merchant_categories, size=len(df))
+        df['merchant_category'] = rng.choice(merchant_categories, size=n)
         
         # Add synthetic transaction types
         transaction_types = ['purchase', 'refund', 'cash_advance', 'payment']
-        df['transaction_type'] = np.random.choice(transaction_types, size=len(df), p=[0.7, 0.1, 0.15, 0.05])
+        df['transaction_type'] = rng.choice(transaction_types, size=n, p=[0.7, 0.1, 0.15, 0.05])
         
-        # Add synthetic merchant names
-        df['merchant_name'] = f"Merchant_{np.random.randint(1, 10000, size=len(df))}"
+        # Add synthetic merchant names (one per row, built as string arrays)
+        df['merchant_name'] = np.char.add('Merchant_', rng.integers(1, 10000, size=n).astype(str))
         
         # Rename columns to match our schema
         df = df.rename(columns={
@@ -94,19 +174,33 @@ class ModelTrainer:
             'Class': 'is_fraud'
         })
         
-        # Add location and device info (synthetic)
-        df['location'] = f"Location_{np.random.randint(1, 100, size=len(df))}"
-        df['ip_address'] = f"192.168.{np.random.randint(1, 255)}.{np.random.randint(1, 255)}"
-        df['device_info'] = json.dumps({
-            'device_type': np.random.choice(['mobile', 'desktop', 'tablet']),
-            'os': np.random.choice(['ios', 'android', 'windows', 'macos'])
-        })
+        # Add location and device info (synthetic), drawn per row
+        df['location'] = np.char.add('Location_', rng.integers(1, 100, size=n).astype(str))
+        ip_third = rng.integers(1, 255, size=n).astype(str)
+        ip_fourth = rng.integers(1, 255, size=n).astype(str)
+        df['ip_address'] = np.char.add(np.char.add(np.char.add('192.168.', ip_third), '.'), ip_fourth)
+        # Device type and OS as int8-backed categoricals. device_info stays for
+        # the preprocessor, but as a categorical over the 12 possible JSON
+        # strings (each encoded once) rather than a string per row.
+        device_types = ['mobile', 'desktop', 'tablet']
+        device_oses = ['ios', 'android', 'windows', 'macos']
+        type_idx = rng.integers(0, len(device_types), size=n)
+        os_idx = rng.integers(0, len(device_oses), size=n)
+        df['device_type'] = pd.Categorical.from_codes(type_idx, categories=device_types)
+        df['os'] = pd.Categorical.from_codes(os_idx, categories=device_oses)
+        df['device_info'] = pd.Categorical.from_codes(
+            type_idx * len(device_oses) + os_idx,
+            categories=[
+                json.dumps({'device_type': device_type, 'os': device_os})
+                for device_type in device_types for device_os in device_oses
+            ]
+        )
         
         # Select relevant columns for training
         feature_columns = [
-            'amount', 'hour', 'day', 'month', 'day_of_week', 'is_weekend',
+            'transaction_date', 'amount', 'hour', 'day', 'month', 'day_of_week', 'is_weekend',
             'card_id', 'merchant_category', 'transaction_type', 'merchant_name',
-            'location', 'ip_address', 'device_info', 'is_fraud'
+            'location', 'ip_address', 'device_type', 'os', 'device_info', 'is_fraud'
         ]
         
         # Add V features if they exist
@@ -115,9 +209,17 @@ class ModelTrainer:
         
         df = df[feature_columns].copy()
         
-        # Convert datetime columns
-        df['transaction_date'] = df['datetime']
-        df = df.drop('datetime', axis=1)
+        # Narrowest dtypes for the preprocess -> sequence -> train pipeline:
+        # float32 floats, smallest fitting ints, categorical strings
+        for column in df.columns:
+            series = df[column]
+            if pd.api.types.is_float_dtype(series):
+                df[column] = series.astype(np.float32)
+            elif pd.api.types.is_integer_dtype(series):
+                df[column] = pd.to_numeric(series, downcast='integer')
+            elif series.dtype == object:
+                df[column] = series.astype('category')
+        print(f"Memory usage: {df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
         
         print(f"Preprocessed dataset shape: {df.shape}")
         print(f"Final class distribution: {df['is_fraud'].value_counts().to_dict()}")
@@ -128,22 +230,17 @@ class ModelTrainer:
         """Prepare training, validation, and test datasets."""
         print("Preparing training data...")
         
-        # Split data by card_id to avoid data leakage
-        unique_cards = df['card_id'].unique()
-        train_cards, temp_cards = train_test_split(
-            unique_cards, test_size=(self.test_size + self.val_size), 
-            random_state=self.random_state, stratify=None
-        )
-        
-        val_cards, test_cards = train_test_split(
-            temp_cards, test_size=self.test_size/(self.test_size + self.val_size),
-            random_state=self.random_state
-        )
+        # Split data by card_id to avoid data leakage: each card falls in one
+        # of 100 buckets, and bucket ranges sized by val_size/test_size pick
+        # the split (one integer compare per row, deterministic per card)
+        buckets = df['card_id'].to_numpy() % 100
+        train_end = round((1 - self.test_size - self.val_size) * 100)
+        val_end = round((1 - self.test_size) * 100)
         
         # Create splits
-        train_df = df[df['card_id'].isin(train_cards)]
-        val_df = df[df['card_id'].isin(val_cards)]
-        test_df = df[df['card_id'].isin(test_cards)]
+        train_df = df[buckets < train_end]
+        val_df = df[(buckets >= train_end) & (buckets < val_end)]
+        test_df = df[buckets >= val_end]
         
         print(f"Train: {len(train_df)} samples ({train_df['is_fraud'].mean():.3%} fraud)")
         print(f"Val: {len(val_df)} samples ({val_df['is_fraud'].mean():.3%} fraud)")
@@ -151,9 +248,12 @@ class ModelTrainer:
         
         # Feature engineering
         print("Performing feature engineering...")
-        train_features = self.preprocessor.prepare_features(train_df, fit=True)
-        val_features = self.preprocessor.prepare_features(val_df, fit=False)
-        test_features = self.preprocessor.prepare_features(test_df, fit=False)
+        data_hash = int(pd.util.hash_pandas_object(train_df, index=False).sum())
+        # The whole module, so edits to its helpers invalidate the cache too
+        preprocessor_version = hashlib.sha256(inspect.getsource(preprocessing).encode()).hexdigest()
+        train_features, self.preprocessor = cached_fit_preprocessor(data_hash, preprocessor_version, train_df)
+        val_features = self.preprocessor.build_feature_matrix(feature_columns(val_df))
+        test_features = self.preprocessor.build_feature_matrix(feature_columns(test_df))
         
         # Create sequences
         print(f"Creating sequences (length={self.sequence_length})...")
@@ -183,6 +283,18 @@ class ModelTrainer:
         """Train the LSTM model."""
         print("Training LSTM model...")
         
+        # Half precision activations on GPUs (bfloat16 where supported): the
+        # LSTM matmuls run on tensor cores and each sample needs half the
+        # memory, so the batch can double. CPUs stay in float32.
+        batch_size = 256
+        gpus = tf.config.list_physical_devices('GPU')
+        if gpus:
+            compute_capability = tf.config.experimental.get_device_details(gpus[0]).get('compute_capability', (0, 0))
+            policy = 'mixed_bfloat16' if compute_capability >= (8, 0) else 'mixed_float16'
+            tf.keras.mixed_precision.set_global_policy(policy)
+            batch_size = 512
+            print(f"Mixed precision policy: {policy}")
+        
         # Calculate class weights for imbalanced data
         fraud_count = np.sum(train_labels == 1)
         normal_count = np.sum(train_labels == 0)
@@ -198,6 +310,8 @@ class ModelTrainer:
         
         # Setup callbacks
         callbacks = [
+            # Resume an interrupted run from the last finished epoch
+            tf.keras.callbacks.BackupAndRestore(backup_dir=str(self.output_dir / 'backup')),
             tf.keras.callbacks.EarlyStopping(
                 monitor='val_auc',
                 patience=10,
@@ -223,7 +337,7 @@ class ModelTrainer:
             train_sequences, train_labels,
             val_sequences, val_labels,
             epochs=50,
-            batch_size=256,
+            batch_size=batch_size,
             class_weights=class_weights,
             callbacks=callbacks
         )
@@ -238,15 +352,21 @@ class ModelTrainer:
         """Evaluate model on test set."""
         print("Evaluating model...")
         
-        # Make predictions
-        predictions_proba = self.model.predict(test_sequences)
+        # Make predictions: call the Keras model through one XLA-compiled
+        # function per batch shape instead of model.predict's dispatch
+        keras_model = self.model.model
+        infer = tf.function(lambda x: keras_model(x, training=False), jit_compile=True)
+        predictions_proba = np.concatenate([
+            infer(np.ascontiguousarray(test_sequences[start:start + INFERENCE_BATCH], dtype=np.float32)).numpy()
+            for start in range(0, len(test_sequences), INFERENCE_BATCH)
+        ] or [np.zeros((0, 1), dtype=np.float32)])
         predictions = (predictions_proba > 0.5).astype(int).flatten()
         
         # Calculate metrics
-        accuracy = np.mean(predictions == test_labels)
-        precision = np.sum((predictions == 1) & (test_labels == 1)) / np.sum(predictions == 1) if np.sum(predictions == 1) > 0 else 0
-        recall = np.sum((predictions == 1) & (test_labels == 1)) / np.sum(test_labels == 1) if np.sum(test_labels == 1) > 0 else 0
-        f1_score = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+        accuracy = accuracy_score(test_labels, predictions)
+        precision, recall, f1_score, _ = precision_recall_fscore_support(
+            test_labels, predictions, average='binary', zero_division=0
+        )
         auc_roc = roc_auc_score(test_labels, predictions_proba)
         
         # Classification report
@@ -265,8 +385,8 @@ class ModelTrainer:
             'f1_score': f1_score,
             'auc_roc': auc_roc,
             'classification_report': report,
-            'confusion_matrix': cm.tolist(),
-            'roc_curve': {'fpr': fpr.tolist(), 'tpr': tpr.tolist()}
+            'confusion_matrix': cm,
+            'roc_curve': {'fpr': fpr, 'tpr': tpr}
         }
         
         print(f"Test Results:")
@@ -291,17 +411,18 @@ class ModelTrainer:
         # Save preprocessor (scaler and encoders)
         preprocessor_path = self.output_dir / 'preprocessor.pkl'
         with open(preprocessor_path, 'wb') as f:
-            pickle.dump(self.preprocessor, f)
+            # Protocol 5 writes the numpy arrays inside the fitted scalers as raw buffers
+            pickle.dump(self.preprocessor, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # The scaler alone, where FeatureEngineer looks for it (ML_SCALER_PATH)
+        dump(self.preprocessor._scaler, self.output_dir / 'scaler.pkl')
         
         # Save training history
         history_path = self.output_dir / 'training_history.json'
-        with open(history_path, 'w') as f:
-            json.dump(history, f, indent=2)
+        write_json(history_path, getattr(history, 'history', history))
         
         # Save metrics
         metrics_path = self.output_dir / 'metrics.json'
-        with open(metrics_path, 'w') as f:
-            json.dump(metrics, f, indent=2)
+        write_json(metrics_path, metrics)
         
         # Save model info
         model_info = {
@@ -315,8 +436,7 @@ class ModelTrainer:
         }
         
         info_path = self.output_dir / 'model_info.json'
-        with open(info_path, 'w') as f:
-            json.dump(model_info, f, indent=2)
+        write_json(info_path, model_info)
         
         print(f"Artifacts saved to {self.output_dir}")
     
@@ -1,78 +1,349 @@
+import asyncio
+import os
+import uuid
+from datetime import date, datetime, timedelta
+
+import aiosqlite
+import fakeredis.aioredis
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import INET, JSONB
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
-from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+
+# Test settings, read when app.config is imported: the app's own engines
+# point at in-memory SQLite too (nothing is written to disk or sent over the
+# network), bcrypt is cheap for hashes created during tests, and a DEBUG
+# left on in a local .env does not turn on SQL echo for every statement
+#
+# An in-memory database is private to its process, so every pytest-xdist
+# worker (`pytest -n auto`) gets its own schema and seed data without a
+# per-worker URL
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+os.environ["DATABASE_URL"] = SQLALCHEMY_DATABASE_URL
+os.environ["DEBUG"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
 
-from app.database import Base, get_db
+from app.database import Base, get_async_db, get_db
+from app.redis_client import redis_client
 from app.main import app
+from app.models.card import Card, CardType
+from app.models.prediction import Prediction
+from app.models.transaction import Transaction
 from app.models.user import User
-from app.core.security import get_password_hash
+from app.core.security import create_access_token, get_password_hash
+from app.services.analytics_service import analytics_service
+from app.services.auth_service import invalidate_cached_user
+from app.services.transaction_service import TransactionService
 
+# Hashed once for every test_user instead of once per test
+TEST_PASSWORD = "TestPassword123!"
+TEST_PASSWORD_HASH = get_password_hash(TEST_PASSWORD)
+# Fixed so one access token (see auth_token) is valid for every test's test_user
+TEST_USER_ID = uuid.UUID("00000000-0000-4000-8000-000000000001")
+# Rows seeded once per session (see seed_data)
+SEEDED_CARD_ID = uuid.UUID("00000000-0000-4000-8000-000000000101")
+SEEDED_TRANSACTION_ID = uuid.UUID("00000000-0000-4000-8000-000000000201")
+SEEDED_PREDICTED_TRANSACTION_ID = uuid.UUID("00000000-0000-4000-8000-000000000202")
+SEEDED_PREDICTION_ID = uuid.UUID("00000000-0000-4000-8000-000000000301")
 
-# Create in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
+# Postgres-only column types, rendered as their SQLite equivalents in test DDL
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(INET, "sqlite")
+def _compile_inet_sqlite(type_, compiler, **kw):
+    return "VARCHAR(45)"
+
+
+# In-memory SQLite shared by every session through a single connection
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
+    echo=False,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-@pytest.fixture(scope="function")
-def db():
-    """Create a fresh database for each test."""
+# Let SQLAlchemy issue BEGIN/SAVEPOINT itself; pysqlite's own transaction
+# handling would otherwise break the per-test savepoints below
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+    # Server default of the UUID primary keys (stored as 32 hex chars on SQLite)
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: uuid.uuid4().hex)
+
+
+@event.listens_for(engine, "begin")
+def _begin_sqlite_transaction(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+class _SharedConnection:
+    """
+    The sync engine's sqlite3 connection, as handed to aiosqlite.
+
+    Transactions belong to the db fixture, so commit/rollback/close from the
+    async side do nothing: async writes land in the current test's outer
+    transaction and are rolled back with it.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# Checked out once and held, so the pool never resets (rolls back) the shared
+# connection while a test is using it
+_shared_pool_connection = None
+
+
+async def _connect_shared_sqlite():
+    global _shared_pool_connection
+    if _shared_pool_connection is None:
+        _shared_pool_connection = engine.raw_connection()
+    dbapi_connection = _shared_pool_connection.driver_connection
+    return await aiosqlite.Connection(lambda: _SharedConnection(dbapi_connection), iter_chunk_size=64)
+
+
+# get_async_db and the services' own sessions (session_factory) see the same
+# schema, seed data and per-test transaction as get_db
+async_engine = create_async_engine(
+    "sqlite+aiosqlite://",
+    async_creator=_connect_shared_sqlite,
+    poolclass=StaticPool,
+    echo=False,
+)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for the whole session, so async fixtures can be session-scoped too."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fake_redis():
+    """
+    In-process Redis behind the app's redis_client for the whole session.
+
+    redis_client.connect() keeps an existing client, so the app startup in
+    app_client leaves this one in place.
+    """
+    redis_client.client = fakeredis.aioredis.FakeRedis(decode_responses=False)
+    yield redis_client.client
+    redis_client.client = None
+
+
+@pytest.fixture(scope="session")
+def schema():
+    """Create the schema once for the whole test session."""
     Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="session")
+async def async_schema(schema):
+    """Open the async engine's single connection up front and close it at the end."""
+    # Concurrent first checkouts would otherwise each start an aiosqlite thread
+    async with async_engine.connect():
+        pass
+    yield
+    await async_engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def db(schema):
+    """
+    Session inside an outer transaction that is rolled back after each test.
+
+    Commits made by the code under test only release savepoints, so every
+    test starts from the same data without re-running DDL.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
 
 
 @pytest.fixture(scope="function")
-def client(db: Session):
-    """Create a test client with database override."""
+async def async_db(db, async_schema):
+    """AsyncSession on the same connection, and so the same rolled-back transaction, as `db`."""
+    async with AsyncTestingSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+async def app_client():
+    """One AsyncClient, and so one app startup/shutdown, for the whole session."""
+    # ASGITransport does not send lifespan events, so run startup/shutdown here
+    async with app.router.lifespan_context(app):
+        # DEBUG is off, so TrustedHostMiddleware only lets localhost through
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost") as test_client:
+            # DEBUG=false above puts the production middleware in front of
+            # every route; fail the whole API suite loudly if it rejects us
+            response = await test_client.get("/health")
+            assert response.status_code == 200, response.text
+            yield test_client
+
+
+@pytest.fixture(scope="function")
+def client(app_client: AsyncClient, db: Session, async_schema, monkeypatch):
+    """The shared test client, with the database dependencies pointed at this test's transaction."""
     def override_get_db():
-        try:
-            yield db
-        finally:
-            pass
+        yield db
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
     
+    # Users cached by a previous test may hold since rolled back changes
+    invalidate_cached_user(TEST_USER_ID)
     app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
-        yield test_client
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    monkeypatch.setattr(TransactionService, "session_factory", AsyncTestingSessionLocal)
+    monkeypatch.setattr(analytics_service, "session_factory", AsyncTestingSessionLocal)
+    yield app_client
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-def test_user(db: Session):
-    """Create a test user."""
-    user = User(
-        email="test@example.com",
-        username="testuser",
-        hashed_password=get_password_hash("TestPassword123!"),
-        full_name="Test User",
-        is_active=True,
-        is_verified=True
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+@pytest.fixture(scope="session")
+def test_user(schema):
+    """
+    Create the test user once, committed outside the per-test transactions.
+
+    Tests that change the user (profile, password) only do so inside their
+    own transaction, which is rolled back afterwards.
+    """
+    with TestingSessionLocal() as session:
+        user = User(
+            id=TEST_USER_ID,
+            email="test@example.com",
+            username="testuser",
+            hashed_password=TEST_PASSWORD_HASH,
+            full_name="Test User",
+            is_active=True,
+            is_verified=True
+        )
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        session.expunge(user)
     return user
 
 
+@pytest.fixture(scope="session")
+def seed_data(test_user):
+    """
+    Insert a card, two transactions and a prediction once per session.
+
+    test_transaction has no prediction yet (so one can be created for it);
+    test_prediction belongs to the other transaction.
+    """
+    now = datetime.utcnow()
+    transaction = {
+        "card_id": SEEDED_CARD_ID,
+        "amount": 100.50,
+        "merchant_name": "Test Merchant",
+        "merchant_category": "retail",
+        "location": "New York, NY",
+        "transaction_type": "purchase",
+        "transaction_date": now,
+        "is_fraud": False,
+        "fraud_score": 0.15,
+    }
+    with TestingSessionLocal() as session:
+        session.bulk_insert_mappings(Card, [{
+            "id": SEEDED_CARD_ID,
+            "user_id": test_user.id,
+            "card_number": "4111111111111111",
+            "card_type": CardType.CREDIT,
+            "expiry_date": date(now.year + 3, 12, 31),
+            "cvv": "123",
+            "is_active": True,
+        }])
+        session.bulk_insert_mappings(Transaction, [
+            {**transaction, "id": SEEDED_TRANSACTION_ID},
+            {**transaction, "id": SEEDED_PREDICTED_TRANSACTION_ID},
+        ])
+        session.bulk_insert_mappings(Prediction, [{
+            "id": SEEDED_PREDICTION_ID,
+            "transaction_id": SEEDED_PREDICTED_TRANSACTION_ID,
+            "user_id": test_user.id,
+            "model_version": "1.0.0",
+            "fraud_probability": 0.25,
+            "prediction_class": False,
+            "confidence_score": 0.75,
+            "risk_level": "low",
+            "processing_time_ms": 150,
+            # Set here rather than by the server default, so it is stored in
+            # the same format as the created_at a history cursor binds
+            "created_at": now,
+        }])
+        session.commit()
+
+
 @pytest.fixture
-def auth_headers(client, test_user):
-    """Get authentication headers for test user."""
-    response = client.post(
-        "/api/v1/login",
-        json={"email": "test@example.com", "password": "TestPassword123!"}
-    )
-    assert response.status_code == 200
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
+def test_card(db: Session, seed_data):
+    """The seeded card of test_user."""
+    return db.get(Card, SEEDED_CARD_ID)
+
+
+@pytest.fixture
+def test_transaction(db: Session, seed_data):
+    """A seeded transaction on test_card without a prediction."""
+    return db.get(Transaction, SEEDED_TRANSACTION_ID)
+
+
+@pytest.fixture
+def test_prediction(db: Session, seed_data):
+    """The seeded prediction (for a second transaction on test_card)."""
+    return db.get(Prediction, SEEDED_PREDICTION_ID)
+
+
+@pytest.fixture(scope="session")
+def auth_token():
+    """Access token for test_user, signed once for the whole session."""
+    # Outlives any test run, unlike the default 30 minute expiry
+    return create_access_token(subject=str(TEST_USER_ID), expires_delta=timedelta(days=1))
+
 
+@pytest.fixture(scope="session")
+def auth_headers(test_user, auth_token):
+    """Authentication headers for test user, shared by every test."""
+    return {"Authorization": f"Bearer {auth_token}"}
+
+
+@pytest.fixture
+def fresh_auth_headers(test_user):
+    """Headers with a token of their own, for tests that log out or change credentials."""
+    token = create_access_token(subject=str(TEST_USER_ID))
+    return {"Authorization": f"Bearer {token}"}
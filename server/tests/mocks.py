@@ -0,0 +1,11 @@
+"""Stand-ins for SQLAlchemy objects shared by the service tests."""
+
+
+class MockScalars:
+    """What `Result.scalars()` returns: the scalar values of a mocked result."""
+
+    def __init__(self, data):
+        self._data = data
+
+    def all(self):
+        return self._data if isinstance(self._data, list) else list(self._data)
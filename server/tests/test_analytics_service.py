@@ -1,17 +1,21 @@
-import asyncio
 from datetime import datetime, timedelta, date
-import types
+from uuid import uuid4
+
 import pytest
 
 from app.services.analytics_service import analytics_service
 from app import redis_client as redis_module
+from tests.mocks import MockScalars
+
+
+_USER_ID = uuid4()
 
 
 class MockResult:
     def __init__(self, scalar_value=None, first_value=None, scalars_list=None, rows=None):
         self._scalar = scalar_value
         self._first = first_value
-        self._scalars = scalars_list or []
+        self._scalars = MockScalars(scalars_list or [])
         self._rows = rows or []
 
     def scalar(self):
@@ -20,87 +24,136 @@ class MockResult:
     def first(self):
         return self._first
 
+    def one(self):
+        return self._first
+
     def scalars(self):
-        class _S:
-            def __init__(self, data):
-                self._data = data
-            def all(self):
-                return list(self._data)
-        return _S(self._scalars)
+        return self._scalars
 
     def all(self):
-        return list(self._rows)
+        return self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
 
 
 class MockAsyncSession:
     def __init__(self, results):
-        self._results = list(results)
+        self._results = iter(results)
+        self.execute_calls = 0
     async def execute(self, *_args, **_kwargs):
-        return self._results.pop(0)
+        self.execute_calls += 1
+        return next(self._results)
+
+
+class _TrendRow:
+    def __init__(self, d, total, fraud, total_amt, fraud_amt, grand_total, grand_fraud):
+        self.period_date = d
+        self.total_transactions = total
+        self.fraud_transactions = fraud
+        self.fraud_rate = (fraud / total * 100) if total else 0.0
+        self.total_amount = total_amt
+        self.fraud_amount = fraud_amt
+        self.grand_total_transactions = grand_total
+        self.grand_fraud_transactions = grand_fraud
+
+
+# The mocked query ignores its date window, so fixed days are enough
+_TRENDS_DAY = date(2024, 1, 1)
+_TRENDS_ROWS = [
+    _TrendRow(_TRENDS_DAY - timedelta(days=1), 2, 1, 100.0, 50.0, 5, 1),
+    _TrendRow(_TRENDS_DAY, 3, 0, 200.0, 0.0, 5, 1),
+]
 
 
 @pytest.mark.asyncio
-async def test_get_dashboard_metrics_no_cache(monkeypatch):
-    # Monkeypatch redis to disable cache
-    async def fake_get(_):
-        return None
-    async def fake_set(*_args, **_kwargs):
-        return True
-    monkeypatch.setattr(redis_module.redis_client, "get", fake_get, raising=True)
-    monkeypatch.setattr(redis_module.redis_client, "set", fake_set, raising=True)
+async def test_get_dashboard_metrics_no_cache():
+    # The session's FakeRedis (see conftest) starts with a cold cache
 
-    # Prepare DB execute call sequence: total, sum amount, fraud count, avg amount,
-    # high risk alerts, active cards, predictions aggregates
+    # Single round-trip: rollup totals, high risk alerts, active cards,
+    # then the prediction aggregates
     results = [
-        MockResult(scalar_value=4),                # total_transactions
-        MockResult(scalar_value=2050.88),          # total_amount
-        MockResult(scalar_value=2),                # fraud_count
-        MockResult(scalar_value=512.72),           # avg_amount
-        MockResult(scalar_value=1),                # high_risk_alerts
-        MockResult(scalar_value=2),                # active_cards
-        MockResult(first_value=(0.9, 37.0, 2)),    # predictions aggregates
+        MockResult(first_value=(4, 2050.88, 2, 1, 2, 0.9, 37.0, 2)),
     ]
     db = MockAsyncSession(results)
 
-    user_id = __import__("uuid").uuid4()
+    user_id = _USER_ID
     metrics = await analytics_service.get_dashboard_metrics(db, user_id, days=7)
 
     assert metrics["total_transactions"] == 4
     assert float(metrics["total_amount"]) == 2050.88
     assert metrics["fraud_count"] == 2
+    assert metrics["avg_transaction_amount"] == pytest.approx(512.72)
     assert metrics["high_risk_alerts"] == 1
     assert metrics["active_cards"] == 2
     assert metrics["total_transactions"] > 0
+    # All dashboard aggregates come from one statement
+    assert db.execute_calls == 1
 
 
 @pytest.mark.asyncio
-async def test_get_fraud_trends(monkeypatch):
-    # disable cache
-    async def fake_get(_):
-        return None
-    async def fake_set(*_args, **_kwargs):
-        return True
-    monkeypatch.setattr(redis_module.redis_client, "get", fake_get, raising=True)
-    monkeypatch.setattr(redis_module.redis_client, "set", fake_set, raising=True)
-
-    class Row:
-        def __init__(self, d, total, fraud, total_amt, fraud_amt):
-            self.period_date = d
-            self.total_transactions = total
-            self.fraud_transactions = fraud
-            self.total_amount = total_amt
-            self.fraud_amount = fraud_amt
-
-    today = datetime.utcnow().date()
-    rows = [
-        Row(datetime.utcnow() - timedelta(days=1), 2, 1, 100.0, 50.0),
-        Row(datetime.utcnow(), 3, 0, 200.0, 0.0),
-    ]
-
-    db = MockAsyncSession([MockResult(rows=rows)])
-    user_id = __import__("uuid").uuid4()
+async def test_get_fraud_trends():
+    db = MockAsyncSession([MockResult(rows=_TRENDS_ROWS)])
+    user_id = _USER_ID
 
     resp = await analytics_service.get_fraud_trends(db, user_id, days=7, period="daily")
     assert resp["period"] == "daily"
     assert len(resp["trends"]) == 2
     assert resp["summary"]["total_transactions"] == 5
+    assert resp["summary"]["total_fraud"] == 1
+    assert resp["trends"][-1]["date"] == _TRENDS_DAY
+
+
+@pytest.mark.asyncio
+async def test_get_fraud_trends_without_dashboard_view(async_db, seed_data, test_user):
+    # SQLite has no materialized views, so the trends are grouped from the
+    # base tables the view is defined over: both seeded transactions fall on
+    # today and neither is fraud
+    assert analytics_service.use_daily_view is False
+
+    resp = await analytics_service._compute_fraud_trends(async_db, test_user.id, 7, "daily")
+
+    assert resp["trends"] == [{
+        "date": datetime.utcnow().date(),
+        "total_transactions": 2,
+        "fraud_transactions": 0,
+        "fraud_rate": 0.0,
+        "total_amount": pytest.approx(201.0),
+        "fraud_amount": 0.0,
+    }]
+    assert resp["summary"]["total_transactions"] == 2
+    assert resp["summary"]["total_fraud"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_all_dashboard_only_computes_misses(monkeypatch):
+    cached_dashboard = {"total_transactions": 9}
+    written = {}
+
+    async def fake_get_many(keys, **_kwargs):
+        return [cached_dashboard, None, None, None]
+    async def fake_set_many(mapping, expire=None, packed=False):
+        written.update(mapping)
+        return True
+    monkeypatch.setattr(redis_module.redis_client, "get_many", fake_get_many, raising=True)
+    monkeypatch.setattr(redis_module.redis_client, "set_many", fake_set_many, raising=True)
+
+    # trends, geographic, merchant categories (dashboard is a cache hit) are
+    # computed concurrently, each on its own session
+    class SessionContext:
+        async def __aenter__(self):
+            return MockAsyncSession([MockResult(rows=[])])
+        async def __aexit__(self, *_args):
+            return False
+    monkeypatch.setattr(analytics_service, "session_factory", SessionContext, raising=False)
+
+    db = MockAsyncSession([])
+    user_id = _USER_ID
+
+    resp = await analytics_service.get_all_dashboard(db, user_id, days=7)
+    assert resp["dashboard"] == cached_dashboard
+    assert resp["trends"]["summary"]["total_transactions"] == 0
+    assert resp["geographic"]["total_locations"] == 0
+    assert resp["merchant_categories"] == []
+    assert f"dashboard_metrics:{user_id}:7" not in written
+    assert len(written) == 3
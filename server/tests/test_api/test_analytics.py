@@ -0,0 +1,29 @@
+import msgpack
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_get_fraud_trends_as_msgpack(client, auth_headers, test_transaction):
+    """Clients that accept msgpack get the same payload msgpack-encoded."""
+    response = await client.get(
+        "/api/v1/analytics/trends?days=7&period=daily",
+        headers={**auth_headers, "Accept": "application/msgpack"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content, raw=False)
+    assert data["period"] == "daily"
+    assert data["summary"]["total_transactions"] >= 1
+    assert all("fraud_rate" in trend for trend in data["trends"])
+
+
+@pytest.mark.asyncio
+async def test_get_fraud_trends_as_json_by_default(client, auth_headers, test_transaction):
+    """Without the msgpack Accept header the endpoint answers in JSON."""
+    response = await client.get(
+        "/api/v1/analytics/trends?days=7&period=daily",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["period"] == "daily"
@@ -1,123 +1,107 @@
 import pytest
 
-
-def test_register_user(client):
-    """Test user registration."""
-    response = client.post(
+from app.core.security import create_refresh_token, verify_password
+from app.models.user import User
+from app.redis_client import redis_client
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("email,username,statuses", [
+    ("newuser@example.com", "newuser", (201,)),
+    # Same email as test_user
+    ("test@example.com", "user2", (400, 409)),
+])
+async def test_register(client, test_user, email, username, statuses):
+    """Test user registration, and that a taken email is rejected."""
+    response = await client.post(
         "/api/v1/register",
         json={
-            "email": "newuser@example.com",
-            "username": "newuser",
+            "email": email,
+            "username": username,
             "password": "NewPassword123!",
             "full_name": "New User"
         }
     )
-    assert response.status_code == 201
-    data = response.json()
-    assert "access_token" in data
-    assert data["email"] == "newuser@example.com"
-    assert data["username"] == "newuser"
-
-
-def test_register_duplicate_email(client):
-    """Test registration with duplicate email."""
-    # First registration
-    client.post(
-        "/api/v1/register",
-        json={
-            "email": "duplicate@example.com",
-            "username": "user1",
-            "password": "Password123!",
-        }
-    )
-    
-    # Try to register again with same email
-    response = client.post(
-        "/api/v1/register",
-        json={
-            "email": "duplicate@example.com",
-            "username": "user2",
-            "password": "Password123!",
-        }
-    )
-    assert response.status_code == 400 or response.status_code == 409
-
-
-def test_login_success(client, test_user):
-    """Test successful login."""
-    response = client.post(
-        "/api/v1/login",
-        json={"email": "test@example.com", "password": "TestPassword123!"}
-    )
-    assert response.status_code == 200
-    data = response.json()
-    assert "access_token" in data
-    assert "refresh_token" in data
-    assert data["email"] == "test@example.com"
-
-
-def test_login_invalid_credentials(client):
-    """Test login with invalid credentials."""
-    response = client.post(
+    assert response.status_code in statuses
+    if response.status_code == 201:
+        data = response.json()
+        assert "access_token" in data
+        assert data["email"] == email
+        assert data["username"] == username
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("email,password,statuses", [
+    ("test@example.com", "TestPassword123!", (200,)),
+    ("nonexistent@example.com", "WrongPassword123!", (401, 404)),
+])
+async def test_login(client, test_user, email, password, statuses):
+    """Test login with valid and invalid credentials."""
+    response = await client.post(
         "/api/v1/login",
-        json={"email": "nonexistent@example.com", "password": "WrongPassword123!"}
+        json={"email": email, "password": password}
     )
-    assert response.status_code == 401 or response.status_code == 404
-
-
-def test_get_current_user(client, auth_headers):
-    """Test getting current user info."""
-    response = client.get("/api/v1/me", headers=auth_headers)
-    assert response.status_code == 200
-    data = response.json()
-    assert "email" in data
-    assert "username" in data
-
-
-def test_get_current_user_unauthorized(client):
-    """Test getting current user without authentication."""
-    response = client.get("/api/v1/me")
-    assert response.status_code == 401
-
-
-def test_refresh_token(client, test_user):
+    assert response.status_code in statuses
+    if response.status_code == 200:
+        data = response.json()
+        assert "access_token" in data
+        assert "refresh_token" in data
+        assert data["email"] == email
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("authenticated,status", [(True, 200), (False, 401)])
+async def test_get_current_user(client, auth_headers, authenticated, status):
+    """Test getting current user info, with and without authentication."""
+    response = await client.get("/api/v1/me", headers=auth_headers if authenticated else None)
+    assert response.status_code == status
+    if authenticated:
+        data = response.json()
+        assert "email" in data
+        assert "username" in data
+
+
+@pytest.mark.asyncio
+async def test_refresh_token(client, test_user):
     """Test token refresh."""
-    # First login
-    login_response = client.post(
-        "/api/v1/login",
-        json={"email": "test@example.com", "password": "TestPassword123!"}
-    )
-    refresh_token = login_response.json()["refresh_token"]
+    refresh_token = create_refresh_token(test_user.id)
+    # The session a login would have stored; refresh is refused without one
+    await redis_client.set_session(str(test_user.id), {"user_id": str(test_user.id), "email": test_user.email})
     
-    # Refresh token
-    response = client.post(
-        "/api/v1/refresh",
-        json={"refresh_token": refresh_token}
-    )
+    try:
+        response = await client.post(
+            "/api/v1/refresh",
+            json={"refresh_token": refresh_token}
+        )
+    finally:
+        await redis_client.delete_session(str(test_user.id))
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
 
 
-def test_refresh_token_invalid(client):
+@pytest.mark.asyncio
+async def test_refresh_token_invalid(client):
     """Test refresh with invalid token."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/refresh",
         json={"refresh_token": "invalid_token"}
     )
     assert response.status_code == 401
 
 
-def test_logout(client, auth_headers):
+@pytest.mark.asyncio
+async def test_logout(client, fresh_auth_headers):
     """Test logout."""
-    response = client.post("/api/v1/logout", headers=auth_headers)
+    response = await client.post("/api/v1/logout", headers=fresh_auth_headers)
     assert response.status_code == 200
     assert "message" in response.json()
 
 
-def test_update_profile(client, auth_headers):
+@pytest.mark.asyncio
+async def test_update_profile(client, auth_headers):
     """Test updating user profile."""
-    response = client.put(
+    response = await client.put(
         "/api/v1/me",
         headers=auth_headers,
         json={"full_name": "Updated Name", "username": "updateduser"}
@@ -128,11 +112,12 @@ def test_update_profile(client, auth_headers):
     assert data["username"] == "updateduser"
 
 
-def test_change_password(client, auth_headers, test_user):
+@pytest.mark.asyncio
+async def test_change_password(client, db, fresh_auth_headers, test_user):
     """Test changing password."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/change-password",
-        headers=auth_headers,
+        headers=fresh_auth_headers,
         json={
             "current_password": "TestPassword123!",
             "new_password": "NewPassword123!"
@@ -141,17 +126,8 @@ def test_change_password(client, auth_headers, test_user):
     assert response.status_code == 200
     assert "message" in response.json()
     
-    # Verify old password no longer works
-    login_response = client.post(
-        "/api/v1/login",
-        json={"email": "test@example.com", "password": "TestPassword123!"}
-    )
-    assert login_response.status_code != 200
-    
-    # Verify new password works
-    login_response = client.post(
-        "/api/v1/login",
-        json={"email": "test@example.com", "password": "NewPassword123!"}
-    )
-    assert login_response.status_code == 200
+    # Only the new password matches the stored hash
+    hashed_password = db.get(User, test_user.id).hashed_password
+    assert not verify_password("TestPassword123!", hashed_password)
+    assert verify_password("NewPassword123!", hashed_password)
 
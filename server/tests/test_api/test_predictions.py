@@ -1,93 +1,75 @@
-import pytest
+import asyncio
 from datetime import datetime
-from app.models.transaction import Transaction
-from app.models.card import Card
+
+import pytest
+
+from app.ml.inference import prediction_engine
 from app.models.prediction import Prediction
 
 
-@pytest.fixture
-def test_card(db, test_user):
-    """Create a test card."""
-    card = Card(
-        user_id=test_user.id,
-        card_number="4111111111111111",
-        card_type="credit",
-        expiry_month=12,
-        expiry_year=2025,
-        cvv="123",
-        is_active=True
-    )
-    db.add(card)
-    db.commit()
-    db.refresh(card)
-    return card
-
-
-@pytest.fixture
-def test_transaction(db, test_card):
-    """Create a test transaction."""
-    transaction = Transaction(
-        card_id=test_card.id,
-        amount=100.50,
-        merchant_name="Test Merchant",
-        merchant_category="retail",
-        location="New York, NY",
-        transaction_date=datetime.utcnow(),
-        is_fraud=False,
-        fraud_score=0.15
-    )
-    db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
-    return transaction
+# Read-only endpoints and the keys each response must carry
+READ_ONLY_ENDPOINTS = [
+    ("/api/v1/predictions/history", ("predictions", "total_count", "next_cursor")),
+    ("/api/v1/predictions/statistics", ("total_predictions", "fraud_rate")),
+    ("/api/v1/predictions/model/info", ("model_version",)),
+]
 
 
-@pytest.fixture
-def test_prediction(db, test_transaction):
-    """Create a test prediction."""
-    prediction = Prediction(
-        transaction_id=test_transaction.id,
-        model_version="1.0.0",
-        fraud_probability=0.25,
-        prediction_class=False,
-        confidence_score=0.75,
-        risk_level="low",
-        processing_time_ms=150
-    )
-    db.add(prediction)
-    db.commit()
-    db.refresh(prediction)
-    return prediction
+@pytest.mark.asyncio
+async def test_create_prediction(client, auth_headers, test_transaction, monkeypatch):
+    """Test creating a prediction for a transaction and reading it back."""
+    async def model_unavailable():
+        raise RuntimeError("no model in tests")
 
+    # Without a model the engine answers with its safe low-risk default, which
+    # is still saved like any other prediction
+    monkeypatch.setattr(prediction_engine, "_ensure_model_loaded", model_unavailable)
+    await prediction_engine._evict_cache([str(test_transaction.id)])
 
-def test_create_prediction(client, auth_headers, test_transaction):
-    """Test creating a prediction for a transaction."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/predictions/predict",
         headers=auth_headers,
         json={"transaction_id": str(test_transaction.id)}
     )
-    # Note: This may fail if ML model is not available, so we check for either success or service unavailable
-    assert response.status_code in [201, 503]
-    if response.status_code == 201:
-        data = response.json()
-        assert "prediction_id" in data
-        assert "is_fraud" in data
-        assert "fraud_probability" in data
+    assert response.status_code == 201
+    data = response.json()
+    assert data["transaction_id"] == str(test_transaction.id)
+    assert data["is_fraud"] is False
+    assert data["fraud_probability"] == 0.0
+    assert data["risk_level"] == "low"
+
+    response = await client.get(
+        f"/api/v1/predictions/{data['prediction_id']}",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["prediction_id"] == data["prediction_id"]
+    assert response.json()["transaction_id"] == str(test_transaction.id)
 
 
-def test_get_prediction_history(client, auth_headers, test_prediction):
-    """Test getting prediction history."""
-    response = client.get("/api/v1/predictions/history", headers=auth_headers)
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path,expected_keys", READ_ONLY_ENDPOINTS)
+async def test_read_only_endpoints(client, auth_headers, test_prediction, path, expected_keys):
+    """Test the read-only prediction endpoints."""
+    response = await client.get(path, headers=auth_headers)
     assert response.status_code == 200
     data = response.json()
-    assert "predictions" in data
-    assert "total" in data
+    assert all(key in data for key in expected_keys)
+
+
+@pytest.mark.asyncio
+async def test_read_only_endpoints_concurrently(client, auth_headers, test_prediction):
+    """Test the read-only prediction endpoints served side by side."""
+    responses = await asyncio.gather(
+        *(client.get(path, headers=auth_headers) for path, _ in READ_ONLY_ENDPOINTS)
+    )
+    assert all(response.status_code == 200 for response in responses)
 
 
-def test_get_prediction_history_with_pagination(client, auth_headers, test_prediction):
+@pytest.mark.asyncio
+async def test_get_prediction_history_with_pagination(client, auth_headers, test_prediction):
     """Test getting prediction history with pagination."""
-    response = client.get(
+    response = await client.get(
         "/api/v1/predictions/history?limit=10&offset=0",
         headers=auth_headers
     )
@@ -98,20 +80,71 @@ def test_get_prediction_history_with_pagination(client, auth_headers, test_predi
     assert "offset" in data
 
 
-def test_get_prediction_by_id(client, auth_headers, test_prediction):
+@pytest.mark.asyncio
+async def test_get_prediction_history_follows_cursor(
+    client, db, auth_headers, test_user, test_transaction, test_prediction
+):
+    """limit=1 pages chained through next_cursor return each prediction once, newest first."""
+    newer = Prediction(
+        transaction_id=test_transaction.id,
+        user_id=test_user.id,
+        model_version="1.0.0",
+        fraud_probability=0.6,
+        prediction_class=True,
+        confidence_score=0.6,
+        risk_level="medium",
+        processing_time_ms=120,
+        created_at=datetime.utcnow(),
+    )
+    db.add(newer)
+    db.commit()
+    newer_id = str(newer.id)
+
+    seen = []
+    params = {"limit": 1}
+    for _ in range(5):
+        response = await client.get(
+            "/api/v1/predictions/history", headers=auth_headers, params=params
+        )
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(prediction["prediction_id"] for prediction in data["predictions"])
+        if not data["next_cursor"]:
+            break
+        params = {"limit": 1, "cursor": data["next_cursor"]}
+    else:
+        pytest.fail("next_cursor never ran out")
+
+    assert seen == [newer_id, str(test_prediction.id)]
+
+
+@pytest.mark.asyncio
+async def test_get_prediction_history_malformed_cursor(client, auth_headers):
+    """A cursor that does not decode is a client error."""
+    response = await client.get(
+        "/api/v1/predictions/history",
+        headers=auth_headers,
+        params={"cursor": "not-a-cursor"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_prediction_by_id(client, auth_headers, test_prediction):
     """Test getting a specific prediction."""
-    response = client.get(
+    response = await client.get(
         f"/api/v1/predictions/{test_prediction.id}",
         headers=auth_headers
     )
     assert response.status_code == 200
     data = response.json()
-    assert data["id"] == str(test_prediction.id)
+    assert data["prediction_id"] == str(test_prediction.id)
 
 
-def test_submit_prediction_feedback(client, auth_headers, test_prediction):
+@pytest.mark.asyncio
+async def test_submit_prediction_feedback(client, auth_headers, test_prediction):
     """Test submitting feedback for a prediction."""
-    response = client.post(
+    response = await client.post(
         f"/api/v1/predictions/{test_prediction.id}/feedback",
         headers=auth_headers,
         json={
@@ -124,26 +157,10 @@ def test_submit_prediction_feedback(client, auth_headers, test_prediction):
     assert "message" in data
 
 
-def test_get_prediction_statistics(client, auth_headers, test_prediction):
-    """Test getting prediction statistics."""
-    response = client.get("/api/v1/predictions/statistics", headers=auth_headers)
-    assert response.status_code == 200
-    data = response.json()
-    assert "total_predictions" in data
-    assert "fraud_rate" in data
-
-
-def test_get_model_info(client, auth_headers):
-    """Test getting model information."""
-    response = client.get("/api/v1/predictions/model-info", headers=auth_headers)
-    assert response.status_code == 200
-    data = response.json()
-    assert "model_version" in data
-
-
-def test_create_prediction_unauthorized(client, test_transaction):
+@pytest.mark.asyncio
+async def test_create_prediction_unauthorized(client, test_transaction):
     """Test creating prediction without authentication."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/predictions/predict",
         json={"transaction_id": str(test_transaction.id)}
     )
@@ -1,49 +1,21 @@
+import base64
 import pytest
-from datetime import datetime, timedelta
-from app.models.transaction import Transaction
-from app.models.card import Card
-
-
-@pytest.fixture
-def test_card(db, test_user):
-    """Create a test card."""
-    card = Card(
-        user_id=test_user.id,
-        card_number="4111111111111111",
-        card_type="credit",
-        expiry_month=12,
-        expiry_year=2025,
-        cvv="123",
-        is_active=True
-    )
-    db.add(card)
-    db.commit()
-    db.refresh(card)
-    return card
-
-
-@pytest.fixture
-def test_transaction(db, test_card):
-    """Create a test transaction."""
-    transaction = Transaction(
-        card_id=test_card.id,
-        amount=100.50,
-        merchant_name="Test Merchant",
-        merchant_category="retail",
-        location="New York, NY",
-        transaction_date=datetime.utcnow(),
-        is_fraud=False,
-        fraud_score=0.15
-    )
-    db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
-    return transaction
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app.models.transaction import Transaction, TransactionType
 
 
-def test_create_transaction(client, auth_headers, test_card):
+# Any past timestamp will do, so one is taken at import for every test
+_NOW_ISO = datetime.utcnow().isoformat()
+
+
+@pytest.mark.asyncio
+async def test_create_transaction(client, auth_headers, test_card):
     """Test creating a new transaction."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/transactions",
         headers=auth_headers,
         json={
@@ -52,7 +24,7 @@ def test_create_transaction(client, auth_headers, test_card):
             "merchant_name": "New Merchant",
             "merchant_category": "electronics",
             "location": "San Francisco, CA",
-            "transaction_date": datetime.utcnow().isoformat()
+            "transaction_date": _NOW_ISO
         }
     )
     assert response.status_code == 201
@@ -62,18 +34,121 @@ def test_create_transaction(client, auth_headers, test_card):
     assert data["merchant_name"] == "New Merchant"
 
 
-def test_get_transactions(client, auth_headers, test_transaction):
+@pytest.mark.asyncio
+async def test_create_transaction_duplicate(client, auth_headers, test_card):
+    """The same card, amount and merchant twice within the window is a conflict."""
+    payload = {
+        "card_id": str(test_card.id),
+        "amount": "13.37",
+        # Not used by any other test, so no earlier fingerprint is still live
+        "merchant_name": "Twice Charged Store",
+        "merchant_category": "retail",
+        "transaction_date": _NOW_ISO
+    }
+    first = await client.post("/api/v1/transactions/", headers=auth_headers, json=payload)
+    assert first.status_code == 201
+
+    second = await client.post("/api/v1/transactions/", headers=auth_headers, json=payload)
+    assert second.status_code == 409
+    assert second.json()["message"] == "Duplicate transaction detected"
+
+
+# Headers in mixed case and padded; one good row, three bad amounts, and a row
+# whose unknown type and unparseable date fall back to the defaults
+IMPORT_CSV = b"""\
+ Amount ,Merchant_Name,MERCHANT_CATEGORY,Transaction_Type,Location,transaction_date
+12.50,Book Nook,books,refund,Leeds,2024-05-01T10:00:00
+abc,Bad Amount,misc,,,
+0,Zero Amount,misc,,,
+-3.00,Negative Amount,misc,,,
+7.25,Coffee Cart,food,teleport,,not-a-date
+"""
+
+
+@pytest.mark.asyncio
+async def test_import_transactions_csv(client, db, auth_headers, test_card):
+    """CSV upload maps the headers, imports good rows and counts the rest."""
+    response = await client.post(
+        "/api/v1/transactions/import",
+        headers=auth_headers,
+        files={"file": ("transactions.csv", IMPORT_CSV, "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["skipped"] == 2
+    assert data["errors"] == 1
+    assert data["card_id"] == str(test_card.id)
+
+    imported = {
+        t.merchant_name: t
+        for t in db.scalars(
+            select(Transaction).where(Transaction.merchant_name.in_(["Book Nook", "Coffee Cart"]))
+        )
+    }
+    assert imported["Book Nook"].amount == Decimal("12.50")
+    assert imported["Book Nook"].merchant_category == "books"
+    assert imported["Book Nook"].transaction_type == TransactionType.REFUND
+    assert imported["Book Nook"].location == "Leeds"
+    assert imported["Coffee Cart"].transaction_type == TransactionType.PURCHASE
+
+
+def _batch_item(test_card, n):
+    return {
+        "card_id": str(test_card.id),
+        "amount": f"{10 + n}.00",
+        "merchant_name": f"Batch Merchant {n}",
+        "merchant_category": "retail",
+        "transaction_date": _NOW_ISO
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_transactions_batch(client, auth_headers, test_card):
+    """Every transaction in a batch is created, in order."""
+    response = await client.post(
+        "/api/v1/transactions/batch",
+        headers=auth_headers,
+        json={"transactions": [_batch_item(test_card, n) for n in range(3)]}
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 3
+    assert len(set(data["transaction_ids"])) == 3
+
+    created = await client.get(
+        f"/api/v1/transactions/{data['transaction_ids'][0]}", headers=auth_headers
+    )
+    assert created.status_code == 200
+    assert created.json()["merchant_name"] == "Batch Merchant 0"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [0, 1001])
+async def test_create_transactions_batch_size_limits(client, auth_headers, test_card, size):
+    """Empty batches and batches over 1000 transactions are rejected."""
+    response = await client.post(
+        "/api/v1/transactions/batch",
+        headers=auth_headers,
+        json={"transactions": [_batch_item(test_card, n) for n in range(size)]}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_transactions(client, auth_headers, test_transaction):
     """Test getting list of transactions."""
-    response = client.get("/api/v1/transactions", headers=auth_headers)
+    response = await client.get("/api/v1/transactions", headers=auth_headers)
     assert response.status_code == 200
     data = response.json()
     assert "transactions" in data
     assert len(data["transactions"]) >= 1
 
 
-def test_get_transaction_by_id(client, auth_headers, test_transaction):
+@pytest.mark.asyncio
+async def test_get_transaction_by_id(client, auth_headers, test_transaction):
     """Test getting a specific transaction."""
-    response = client.get(
+    response = await client.get(
         f"/api/v1/transactions/{test_transaction.id}",
         headers=auth_headers
     )
@@ -83,10 +158,11 @@ def test_get_transaction_by_id(client, auth_headers, test_transaction):
     assert data["amount"] == str(test_transaction.amount)
 
 
-def test_get_transactions_with_filters(client, auth_headers, test_transaction):
+@pytest.mark.asyncio
+async def test_get_transactions_with_filters(client, auth_headers, test_transaction):
     """Test getting transactions with filters."""
     # Filter by is_fraud
-    response = client.get(
+    response = await client.get(
         "/api/v1/transactions?is_fraud=false",
         headers=auth_headers
     )
@@ -95,15 +171,53 @@ def test_get_transactions_with_filters(client, auth_headers, test_transaction):
     assert "transactions" in data
 
 
-def test_get_transactions_unauthorized(client):
+@pytest.mark.asyncio
+async def test_get_transactions_pages_with_cursor(client, auth_headers, test_transaction):
+    """Following next_cursor walks every transaction exactly once."""
+    seen = []
+    params = {"limit": 1}
+    for pages in range(1, 10):
+        response = await client.get("/api/v1/transactions/", headers=auth_headers, params=params)
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(transaction["id"] for transaction in data["transactions"])
+        if not data["next_cursor"]:
+            break
+        params = {"limit": 1, "cursor": data["next_cursor"]}
+    else:
+        pytest.fail("next_cursor never ran out")
+
+    # Both seeded transactions, one keyset page each
+    assert pages >= 2
+    assert len(seen) >= 2
+    assert len(seen) == len(set(seen))
+    assert str(test_transaction.id) in seen
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    base64.urlsafe_b64encode(b"yesterday|not-a-uuid").decode(),
+])
+async def test_get_transactions_malformed_cursor(client, auth_headers, cursor):
+    """A cursor that does not decode is a client error."""
+    response = await client.get(
+        "/api/v1/transactions/", headers=auth_headers, params={"cursor": cursor}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_transactions_unauthorized(client):
     """Test getting transactions without authentication."""
-    response = client.get("/api/v1/transactions")
+    response = await client.get("/api/v1/transactions")
     assert response.status_code == 401
 
 
-def test_get_transaction_stats(client, auth_headers, test_transaction):
+@pytest.mark.asyncio
+async def test_get_transaction_stats(client, auth_headers, test_transaction):
     """Test getting transaction statistics."""
-    response = client.get("/api/v1/transactions/stats", headers=auth_headers)
+    response = await client.get("/api/v1/transactions/stats", headers=auth_headers)
     assert response.status_code == 200
     data = response.json()
     assert "total_transactions" in data
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from app.ml.preprocessing import FeatureEngineer
+
+
+ROWS = [
+    # Saturday night, every field present
+    {
+        "card_id": "2f1c4b9e-0d7a-4c39-9a43-3b8d5f6e7a10",
+        "amount": 1250.75,
+        "merchant_name": "Night Owl Electronics",
+        "merchant_category": "Electronics",
+        "transaction_date": "2024-03-16T23:45:10",
+        "transaction_type": "online",
+        "location": "Austin, TX",
+        "ip_address": "203.0.113.7",
+        "device_info": '{"device_type": "Mobile"}',
+    },
+    # Every optional field missing
+    {
+        "card_id": None,
+        "amount": None,
+        "merchant_name": None,
+        "merchant_category": None,
+        "transaction_date": None,
+        "transaction_type": None,
+        "location": None,
+        "ip_address": None,
+        "device_info": None,
+    },
+    # Unparseable timestamp, malformed device JSON, empty card id
+    {
+        "card_id": "",
+        "amount": 19.99,
+        "merchant_name": "Corner Shop",
+        "merchant_category": "grocery",
+        "transaction_date": "31/02/2024 25:61",
+        "transaction_type": "purchase",
+        "location": "Leeds",
+        "ip_address": "10.0.x.1",
+        "device_info": '{"device_type": ',
+    },
+    # Device info as a dict, JSON that is not an object
+    {
+        "card_id": "9b0e3f52-6c1d-4e8a-b7f4-0a2d9c8e1f33",
+        "amount": 0.0,
+        "merchant_name": "",
+        "merchant_category": "grocery",
+        "transaction_date": "2024-01-01T05:59:59",
+        "transaction_type": "REFUND",
+        "location": "",
+        "ip_address": "",
+        "device_info": {"type": "Desktop"},
+    },
+    {
+        "card_id": "2f1c4b9e-0d7a-4c39-9a43-3b8d5f6e7a10",
+        "amount": 480.0,
+        "merchant_name": "night owl electronics",
+        "merchant_category": "electronics",
+        "transaction_date": "2024-02-29T12:00:00",
+        "transaction_type": "online",
+        "location": "austin, tx",
+        "ip_address": "198.51.100.23",
+        "device_info": "[1, 2]",
+    },
+]
+
+
+def _columns(rows):
+    """The rows as the column arrays the batch path receives (see _transactions_to_columns)."""
+    def objects(key):
+        column = np.empty(len(rows), dtype=object)
+        column[:] = [row[key] for row in rows]
+        return column
+
+    dates = []
+    for row in rows:
+        try:
+            dates.append(np.datetime64(row["transaction_date"], "us"))
+        except ValueError:
+            dates.append(np.datetime64("NaT", "us"))
+
+    columns = {
+        key: objects(key)
+        for key in (
+            "card_id", "merchant_name", "merchant_category", "transaction_type",
+            "location", "ip_address", "device_info",
+        )
+    }
+    columns["amount"] = np.array([row["amount"] or 0.0 for row in rows], dtype=np.float32)
+    columns["transaction_date"] = np.array(dates, dtype="datetime64[us]")
+    return columns
+
+
+def test_feature_matrix_matches_feature_vector_per_row():
+    engineer = FeatureEngineer()
+    # Compare raw features, whatever scaler happens to be on disk
+    engineer._scaler = None
+
+    matrix = engineer.build_feature_matrix(_columns(ROWS))
+
+    assert matrix.shape == (len(ROWS), engineer.feature_count)
+    for i, row in enumerate(ROWS):
+        np.testing.assert_allclose(
+            matrix[i], engineer.build_feature_vector(row), rtol=1e-5, atol=1e-6, err_msg=f"row {i}"
+        )
+
+
+@pytest.mark.parametrize("timestamp", [None, "31/02/2024 25:61"])
+def test_feature_matrix_zeroes_calendar_features_without_a_date(timestamp):
+    engineer = FeatureEngineer()
+    engineer._scaler = None
+    row = {**ROWS[0], "transaction_date": timestamp}
+
+    features = engineer.build_feature_matrix(_columns([row]))[0]
+
+    # hour, day, month, weekday, weekend and the night-time hint
+    assert features[[2, 3, 4, 5, 6, 16]].tolist() == [0.0] * 6
@@ -1,25 +1,32 @@
 import pytest
 from datetime import datetime
+from types import SimpleNamespace
 from uuid import uuid4
 
+from sqlalchemy.dialects import postgresql
+
+from app.ml.inference import PredictionResult, RiskLevel
 from app.services.prediction_service import prediction_service
+from tests.mocks import MockScalars
 
 
 class MockResult:
-    def __init__(self, scalar_value=None, scalars_list=None):
+    def __init__(self, scalar_value=None, scalars_list=None, rows=None):
         self._scalar = scalar_value
-        self._scalars = scalars_list or []
+        self._scalars = MockScalars(scalars_list or [])
+        self._rows = rows or []
 
     def scalar(self):
         return self._scalar
 
+    def scalar_one_or_none(self):
+        return self._scalar
+
+    def all(self):
+        return self._rows
+
     def scalars(self):
-        class _S:
-            def __init__(self, data):
-                self._data = data
-            def all(self):
-                return list(self._data)
-        return _S(self._scalars)
+        return self._scalars
 
 
 class MockPrediction:
@@ -36,11 +43,43 @@ class MockPrediction:
         self.feature_importance = {"amount": 0.5}
 
 
+class MockTransaction:
+    def __init__(self, id):
+        self.id = id
+        self.card_id = uuid4()
+        self.amount = 42.5
+        self.merchant_name = "Store"
+        self.merchant_category = "retail"
+        self.transaction_date = datetime.utcnow()
+        self.transaction_type = None
+        self.location = "NYC"
+        self.ip_address = None
+        self.device_info = None
+
+
 class MockAsyncSession:
     def __init__(self, results):
-        self._results = list(results)
-    async def execute(self, *_args, **_kwargs):
-        return self._results.pop(0)
+        self._results = iter(results)
+        self.executed = []
+        self.commits = 0
+    async def execute(self, *args, **_kwargs):
+        self.executed.append(args[0] if args else None)
+        return next(self._results)
+    async def commit(self):
+        self.commits += 1
+
+
+def _prediction_result(probability, risk_level):
+    return PredictionResult(
+        is_fraud=probability >= 0.5,
+        fraud_probability=probability,
+        confidence_score=0.5,
+        risk_level=risk_level,
+        model_version="v1",
+        processing_time_ms=1.0,
+        timestamp=datetime.utcnow().isoformat(),
+        prediction_id=str(uuid4()),
+    )
 
 
 @pytest.mark.asyncio
@@ -66,3 +105,166 @@ async def test_get_prediction_history_basic():
     assert total == 2
     assert len(items) == 2
     assert items[0].fraud_probability == 0.9
+
+
+@pytest.mark.asyncio
+async def test_batch_predict_writes_batch_in_bulk(monkeypatch):
+    transactions = [MockTransaction(uuid4()), MockTransaction(uuid4())]
+    saved = [MockPrediction(uuid4()), MockPrediction(uuid4())]
+    for txn, pred in zip(transactions, saved):
+        pred.transaction_id = txn.id
+
+    db = MockAsyncSession([
+        MockResult(scalars_list=transactions),  # authorized transactions
+        MockResult(scalars_list=saved),  # bulk prediction insert
+        MockResult(),  # bulk transaction update
+    ])
+
+    async def fake_predict_batch(_data):
+        return [
+            _prediction_result(0.1, RiskLevel.LOW),
+            _prediction_result(0.2, RiskLevel.LOW),
+        ]
+
+    monkeypatch.setattr(prediction_service.engine, "predict_batch", fake_predict_batch)
+
+    ids = [t.id for t in transactions]
+    results = await prediction_service.batch_predict(db, ids + ids[:1], uuid4())
+
+    assert len(db.executed) == 3
+    assert db.commits == 1
+    assert [r[3] for r in results] == [t.id for t in transactions]
+    assert [r[1] for r in results] == saved
+    assert all(r[2] is None for r in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_predict_reprediction_keeps_existing_row(monkeypatch):
+    transaction = MockTransaction(uuid4())
+    # The transaction was predicted before, so the upsert returns its old row
+    existing = MockPrediction(uuid4())
+    existing.transaction_id = transaction.id
+    result = _prediction_result(0.1, RiskLevel.LOW)
+
+    db = MockAsyncSession([
+        MockResult(scalars_list=[transaction]),
+        MockResult(scalars_list=[existing]),
+        MockResult(),
+    ])
+    recached = {}
+
+    async def fake_predict_batch(_data):
+        return [result]
+
+    async def fake_cache_results(results):
+        recached.update(results)
+
+    monkeypatch.setattr(prediction_service.engine, "predict_batch", fake_predict_batch)
+    monkeypatch.setattr(prediction_service.engine, "_cache_results", fake_cache_results)
+
+    await prediction_service.batch_predict(db, [transaction.id], uuid4())
+
+    # The conflict update keeps the primary key and starts the review over
+    sql = str(db.executed[1].compile(dialect=postgresql.dialect()))
+    set_clause = sql.split("DO UPDATE SET", 1)[1].split(" WHERE ", 1)[0]
+    assigned = {part.split(" = ", 1)[0].strip() for part in set_clause.split(",")}
+    assert "id" not in assigned
+    assert {"feedback", "feedback_notes", "reviewed_by", "reviewed_at", "created_at"} <= assigned
+    # The result, and its cache entry, name the row that was actually persisted
+    assert result.prediction_id == str(existing.id)
+    assert recached == {str(transaction.id): result}
+
+
+@pytest.mark.asyncio
+async def test_get_prediction_statistics_from_grouped_rows():
+    db = MockAsyncSession([
+        MockResult(rows=[
+            SimpleNamespace(risk_level="low", total=6, fraud=0, confidence_sum=4.8),
+            SimpleNamespace(risk_level="high", total=3, fraud=3, confidence_sum=2.4),
+            SimpleNamespace(risk_level="critical", total=1, fraud=1, confidence_sum=0.8),
+        ]),
+    ])
+
+    stats = await prediction_service.get_prediction_statistics(db, uuid4(), days=7)
+
+    assert len(db.executed) == 1
+    assert stats["total_predictions"] == 10
+    assert stats["fraud_predictions"] == 4
+    assert stats["fraud_rate"] == pytest.approx(0.4)
+    assert stats["high_risk_predictions"] == 4
+    assert stats["risk_level_breakdown"] == {"low": 6, "high": 3, "critical": 1}
+    assert stats["average_confidence"] == pytest.approx(0.8)
+
+
+@pytest.mark.asyncio
+async def test_get_prediction_statistics_empty_window():
+    db = MockAsyncSession([MockResult(rows=[])])
+
+    stats = await prediction_service.get_prediction_statistics(db, uuid4(), days=30)
+
+    assert stats["total_predictions"] == 0
+    assert stats["fraud_rate"] == 0
+    assert stats["average_confidence"] == 0
+    assert stats["risk_level_breakdown"] == {}
+
+
+@pytest.mark.asyncio
+async def test_batch_predict_inserts_alerts_for_high_risk_only(monkeypatch):
+    transactions = [MockTransaction(uuid4()), MockTransaction(uuid4())]
+    saved = [MockPrediction(uuid4()), MockPrediction(uuid4())]
+    for txn, pred in zip(transactions, saved):
+        pred.transaction_id = txn.id
+    alert = SimpleNamespace(id=uuid4(), transaction_id=transactions[1].id)
+
+    db = MockAsyncSession([
+        MockResult(scalars_list=transactions),
+        MockResult(scalars_list=saved),
+        MockResult(),
+        MockResult(scalars_list=[alert]),  # bulk alert insert
+    ])
+
+    async def fake_predict_batch(_data):
+        return [
+            _prediction_result(0.1, RiskLevel.LOW),
+            _prediction_result(0.95, RiskLevel.CRITICAL),
+        ]
+
+    monkeypatch.setattr(prediction_service.engine, "predict_batch", fake_predict_batch)
+
+    results = await prediction_service.batch_predict(
+        db, [t.id for t in transactions], uuid4()
+    )
+
+    assert len(db.executed) == 4
+    assert results[0][2] is None
+    assert results[1][2] is alert
+
+
+@pytest.mark.asyncio
+async def test_create_prediction_cache_hit_skips_prediction_lookup(monkeypatch):
+    transaction = MockTransaction(uuid4())
+    cached = _prediction_result(0.2, RiskLevel.LOW)
+    db = MockAsyncSession([MockResult(scalar_value=transaction)])
+
+    async def fake_check_cache(_transaction_id):
+        return cached
+
+    monkeypatch.setattr(prediction_service.engine, "_check_cache", fake_check_cache)
+
+    result, record, alert = await prediction_service.create_prediction(
+        db, transaction.id, uuid4()
+    )
+
+    assert len(db.executed) == 1
+    assert result is cached
+    assert str(record.id) == cached.prediction_id
+    assert record.transaction_id == transaction.id
+    assert alert is None
+
+
+@pytest.mark.asyncio
+async def test_batch_predict_empty_input_skips_database():
+    db = MockAsyncSession([])
+
+    assert await prediction_service.batch_predict(db, [], uuid4()) == []
+    assert db.executed == []
@@ -0,0 +1,108 @@
+import asyncio
+from uuid import uuid4
+
+import orjson
+import pytest
+
+from app.redis_client import _ZSTD_MAGIC, redis_client
+
+
+def _key():
+    # The FakeRedis instance lives for the whole session (see conftest)
+    return f"test:redis_client:{uuid4()}"
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_lock_holder_caches_and_releases():
+    key = _key()
+    calls = []
+
+    async def compute():
+        calls.append(key)
+        return {"total": 3}
+
+    assert await redis_client.get_or_compute(key, compute, expire=60) == {"total": 3}
+    assert await redis_client.get_or_compute(key, compute, expire=60) == {"total": 3}
+
+    assert len(calls) == 1
+    assert not await redis_client.exists(f"lock:{key}")
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_waiter_gets_lock_holders_result():
+    key = _key()
+    finish = asyncio.Event()
+    calls = []
+
+    async def slow_compute():
+        calls.append("holder")
+        await finish.wait()
+        return {"total": 5}
+
+    async def waiter_compute():
+        calls.append("waiter")
+        return {"total": -1}
+
+    holder = asyncio.create_task(
+        redis_client.get_or_compute(key, slow_compute, expire=60, packed=True)
+    )
+    while not await redis_client.exists(f"lock:{key}"):
+        await asyncio.sleep(0)
+    waiter = asyncio.create_task(
+        redis_client.get_or_compute(key, waiter_compute, expire=60, packed=True, poll_interval=0.01)
+    )
+    await asyncio.sleep(0.02)
+    finish.set()
+
+    assert await asyncio.gather(holder, waiter) == [{"total": 5}, {"total": 5}]
+    assert calls == ["holder"]
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_waiter_computes_when_holder_is_too_slow():
+    key = _key()
+    token = await redis_client.acquire_lock(key, 30)
+
+    async def compute():
+        return [1, 2, 3]
+
+    value = await redis_client.get_or_compute(
+        key, compute, expire=60, poll_interval=0.01, poll_attempts=2
+    )
+
+    assert value == [1, 2, 3]
+    assert await redis_client.get(key) == [1, 2, 3]
+    # The waiter never owned the lock, so it leaves it to the holder
+    assert await redis_client.release_lock(key, token)
+
+
+# Nested, with the repeated text packed payloads are meant to shrink
+PACKED_VALUE = {
+    "summary": {"total_transactions": 12, "overall_fraud_rate": 8.25},
+    "trends": [{"date": "2024-01-01", "fraud_rate": 0.0, "label": "steady " * 20}] * 10,
+    "period": "daily",
+}
+
+
+@pytest.mark.asyncio
+async def test_set_packed_round_trips_through_get():
+    key = _key()
+
+    assert await redis_client.set_packed(key, PACKED_VALUE, expire=60)
+
+    # Stored as a zstd frame, smaller than the JSON it replaces
+    raw = await redis_client.get_raw(key)
+    assert raw[:4] == _ZSTD_MAGIC
+    assert len(raw) < len(orjson.dumps(PACKED_VALUE))
+    assert await redis_client.get(key) == PACKED_VALUE
+    assert await redis_client.get_packed(key) == PACKED_VALUE
+
+
+@pytest.mark.asyncio
+async def test_set_many_packed_round_trips_through_get_many():
+    keys = [_key(), _key()]
+    values = [PACKED_VALUE, {"total": 1}]
+
+    assert await redis_client.set_many(dict(zip(keys, values)), expire=60, packed=True)
+
+    assert await redis_client.get_many(keys) == values